@@ -0,0 +1,22 @@
+import logging
+import os
+
+# The package does not configure logging on import. Applications configure logging themselves or call
+# configure_logging() to use the package configuration (log.conf).
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+
+def configure_logging(log_conf_file: str = None) -> None:
+    """Configures logging using the given configuration file. Call this once at application start if the package
+    shall handle logging (console output and global.log).
+
+    Parameters
+    ----------
+    log_conf_file : str
+        Path to a logging configuration file (fileConfig format). If None, the log.conf of the package is used.
+    """
+    import logging.config
+
+    if log_conf_file is None:
+        log_conf_file = os.path.join(os.path.dirname(__file__), "log.conf")
+    logging.config.fileConfig(fname=log_conf_file, disable_existing_loggers=False)
@@ -0,0 +1,5 @@
+import sys
+
+from kbc_evaluation.cli import main
+
+sys.exit(main())
@@ -0,0 +1,244 @@
+import logging
+from typing import Dict
+
+from kbc_evaluation.dataset import ParsedSet
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.streaming import StreamingEvaluationRunner, calculate_ranks
+
+logger = logging.getLogger(__name__)
+
+
+class AdjustedMetrics:
+    """Chance-adjusted rank metrics (Berrendorf et al., "Interpretable and Fair Comparison of Link Prediction or
+    Entity Alignment Methods with Adjusted Mean Rank"). The metrics relate the observed values to the values that
+    a random ranking of the candidate set of every task would achieve in expectation, so that results of datasets
+    with different numbers of entities and of the filtered and the non-filtered setting become comparable:
+
+    adjusted mean rank: MR / E[MR] (0: perfect, 1: random, smaller is better)
+    adjusted hits@n, adjusted MRR: (x - E[x]) / (1 - E[x]) (1: perfect, 0: random, larger is better)
+
+    The size of the candidate set of a task is the number of entities of the dataset; in the filtered setting, the
+    true entities of the task (gold entity excluded) are subtracted (see TripleStore.candidate_set_sizes). The
+    observed metrics and the expectations are taken over all prediction tasks of the test set; tasks that the
+    prediction file does not rank are completed by a random ranking. Type constraints are not taken into account.
+    """
+
+    @staticmethod
+    def expectations(sizes, n: int) -> Dict[str, float]:
+        """Calculates the expected metrics of a random ranking.
+
+        Parameters
+        ----------
+        sizes
+            Array with the candidate set size of every prediction task.
+        n : int
+            Hits@n.
+
+        Returns
+        -------
+        Dict[str, float]
+            "mean_rank", "hits_at_n", and "reciprocal_mean_rank" (hits@n relative to the number of tasks).
+        """
+        import numpy as np
+
+        sizes = np.asarray(sizes, dtype=np.int64).ravel()
+        sizes = sizes[sizes > 0]
+        if len(sizes) == 0:
+            return {"mean_rank": 0.0, "hits_at_n": 0.0, "reciprocal_mean_rank": 0.0}
+        # harmonic numbers H(k) for k = 0 ... max size: E[1 / rank] = H(size) / size
+        harmonic = np.concatenate(
+            [[0.0], np.cumsum(1.0 / np.arange(1, sizes.max() + 1))]
+        )
+        return {
+            "mean_rank": float(np.mean((sizes + 1) / 2)),
+            "hits_at_n": float(np.mean(np.minimum(n, sizes) / sizes)),
+            "reciprocal_mean_rank": float(np.mean(harmonic[sizes] / sizes)),
+        }
+
+    @staticmethod
+    def task_ranks(file_to_be_evaluated: str, data_set) -> Dict[str, tuple]:
+        """Reads the ranks of the prediction tasks of the test set from a prediction file together with the number
+        of listed candidates. Only the first record of a test triple counts, records of other triples are ignored.
+        The filtered ranks and lengths use the same filter as the evaluation engines (the true statements of the
+        dataset and the truths of the file).
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+            The prediction file.
+        data_set
+            The dataset of the file (DataSet or CustomDataSet).
+
+        Returns
+        -------
+        Dict[str, tuple]
+            Per mode ("raw", "filtered"): the ranks and the numbers of listed candidates, both int64 arrays of shape
+            (n, 2) aligned with the test triples (columns: heads, tails). The rank of a missing or unranked task
+            is 0.
+        """
+        import numpy as np
+
+        store = data_set.triple_store()
+        rows = {}
+        for row, triple in enumerate(store.sequence("test")):
+            rows.setdefault(tuple(triple), row)
+        tasks = {
+            mode: (
+                np.zeros((len(rows), 2), dtype=np.int64),
+                np.zeros((len(rows), 2), dtype=np.int64),
+            )
+            for mode in ("raw", "filtered")
+        }
+        filter_index = StreamingEvaluationRunner.file_filter_index(
+            file_to_be_evaluated, FilterIndex.from_data_set(data_set)
+        )
+        seen = set()
+        with open(file_to_be_evaluated, "rb") as f:
+            while True:
+                lines = [f.readline() for _ in range(3)]
+                if not lines[2]:
+                    break
+                # binary lines: "\r\n" line breaks are possible (see StreamingEvaluationRunner)
+                truth, heads, tails = ParsedSet.parse_record(
+                    *(line.rstrip(b"\r\n").decode("utf-8") for line in lines)
+                )
+                row = rows.get(tuple(truth))
+                if row is None or row in seen:
+                    continue
+                seen.add(row)
+                for column, predictions, gold, correct in (
+                    (
+                        0,
+                        heads,
+                        truth[0],
+                        filter_index.correct_heads(truth[1], truth[2]),
+                    ),
+                    (
+                        1,
+                        tails,
+                        truth[2],
+                        filter_index.correct_tails(truth[0], truth[1]),
+                    ),
+                ):
+                    raw, filtered = calculate_ranks(predictions, gold, correct)
+                    tasks["raw"][0][row, column] = raw or 0
+                    tasks["raw"][1][row, column] = len(predictions)
+                    tasks["filtered"][0][row, column] = filtered or 0
+                    tasks["filtered"][1][row, column] = sum(
+                        1 for prediction in predictions if prediction not in correct
+                    )
+        return tasks
+
+    @staticmethod
+    def completed_metrics(ranks, listed, sizes, n: int) -> Dict[str, float]:
+        """Calculates MR, hits@n, and MRR over all prediction tasks. A task without rank (the gold entity is not
+        among the listed candidates) is completed by a random ranking of its unlisted candidates: with k listed
+        candidates, the gold entity is at one of the positions k + 1, ..., size with equal probability.
+
+        Parameters
+        ----------
+        ranks
+            Array with the rank of every prediction task (0: no rank).
+        listed
+            Array with the number of listed candidates of every prediction task.
+        sizes
+            Array with the candidate set size of every prediction task.
+        n : int
+            Hits@n.
+
+        Returns
+        -------
+        Dict[str, float]
+            "mean_rank", "hits_at_n", and "reciprocal_mean_rank" (hits@n relative to the number of tasks).
+        """
+        import numpy as np
+
+        ranks = np.asarray(ranks, dtype=np.int64).ravel()
+        sizes = np.asarray(sizes, dtype=np.int64).ravel()
+        is_valid = sizes > 0
+        ranks, sizes = ranks[is_valid], sizes[is_valid]
+        if len(sizes) == 0:
+            return {"mean_rank": 0.0, "hits_at_n": 0.0, "reciprocal_mean_rank": 0.0}
+        # the gold entity is never listed in an unranked task: at least one candidate remains
+        listed = np.minimum(
+            np.asarray(listed, dtype=np.int64).ravel()[is_valid], sizes - 1
+        )
+        remaining = sizes - listed
+        is_ranked = ranks > 0
+        harmonic = np.concatenate(
+            [[0.0], np.cumsum(1.0 / np.arange(1, sizes.max() + 1))]
+        )
+        mean_rank = np.where(is_ranked, ranks, (listed + 1 + sizes) / 2)
+        hits_at_n = np.where(
+            is_ranked, ranks <= n, np.clip(n - listed, 0, remaining) / remaining
+        )
+        reciprocal_rank = np.where(
+            is_ranked,
+            1.0 / np.maximum(ranks, 1),
+            (harmonic[sizes] - harmonic[listed]) / remaining,
+        )
+        return {
+            "mean_rank": float(np.mean(mean_rank)),
+            "hits_at_n": float(np.mean(hits_at_n)),
+            "reciprocal_mean_rank": float(np.mean(reciprocal_rank)),
+        }
+
+    @staticmethod
+    def add_to_result(result, data_set) -> None:
+        """Calculates the adjusted metrics of a result and sets its adjusted fields (filtered_adjusted_mean_rank,
+        filtered_adjusted_hits_at_n, filtered_adjusted_reciprocal_mean_rank, and the non_filtered counterparts).
+        The observed metrics are calculated over all prediction tasks of the test set in a separate pass over the
+        evaluated file (result.evaluated_file): tasks that are missing in the file or not ranked are completed by a
+        random ranking (see completed_metrics). A file that covers only a part of the test set, hence, is not
+        rewarded with an adjusted mean rank near 0.
+
+        Parameters
+        ----------
+        result : EvaluatorResult
+            The result (modified).
+        data_set
+            The dataset of the result (DataSet or CustomDataSet).
+        """
+        import numpy as np
+
+        store = data_set.triple_store()
+        filtered_sizes = store.candidate_set_sizes("test")
+        if len(filtered_sizes) == 0:
+            logger.warning("No test triples: adjusted metrics cannot be calculated")
+            return
+        non_filtered_sizes = np.full(filtered_sizes.shape, len(store.entities()))
+        tasks = AdjustedMetrics.task_ranks(result.evaluated_file, data_set)
+        for prefix, mode, sizes in (
+            ("filtered_", "filtered", filtered_sizes),
+            ("non_filtered_", "raw", non_filtered_sizes),
+        ):
+            expected = AdjustedMetrics.expectations(sizes, result.n)
+            observed = AdjustedMetrics.completed_metrics(*tasks[mode], sizes, result.n)
+            setattr(
+                result,
+                prefix + "adjusted_mean_rank",
+                (
+                    observed["mean_rank"] / expected["mean_rank"]
+                    if expected["mean_rank"]
+                    else 0.0
+                ),
+            )
+            setattr(
+                result,
+                prefix + "adjusted_hits_at_n",
+                AdjustedMetrics._adjust(observed["hits_at_n"], expected["hits_at_n"]),
+            )
+            setattr(
+                result,
+                prefix + "adjusted_reciprocal_mean_rank",
+                AdjustedMetrics._adjust(
+                    observed["reciprocal_mean_rank"], expected["reciprocal_mean_rank"]
+                ),
+            )
+
+    @staticmethod
+    def _adjust(value: float, expectation: float) -> float:
+        if expectation >= 1.0:
+            # every random ranking is perfect (e.g. n >= number of candidates)
+            return 0.0
+        return (value - expectation) / (1.0 - expectation)
@@ -0,0 +1,439 @@
+import json
+import mmap
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from kbc_evaluation.dataset import DataSet
+
+
+class Benchmark:
+    """Benchmark suite. Every benchmark returns a dictionary of measurements so that results can be compared
+    across machines and versions. Run all benchmarks via ``python -m kbc_evaluation.benchmark``.
+    """
+
+    @staticmethod
+    def measure(function: Callable, *args, **kwargs) -> Dict[str, float]:
+        """Measures the runtime and the peak (Python heap) memory of the given function. The function is run twice:
+        once for timing and once with tracemalloc enabled (tracing slows down execution).
+
+        Parameters
+        ----------
+        function : Callable
+            The function to be measured.
+        args
+            Positional arguments for the function.
+        kwargs
+            Keyword arguments for the function.
+
+        Returns
+        -------
+        Dict[str, float]
+            "seconds": wall clock runtime
+            "peak_memory_bytes": peak memory allocated by Python during the run
+        """
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        seconds = time.perf_counter() - start
+
+        tracemalloc.start()
+        try:
+            function(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {"seconds": seconds, "peak_memory_bytes": peak}
+
+    @staticmethod
+    def export(
+        data_set: DataSet = DataSet.WN18,
+        file_format: str = "nt",
+        compression: str = None,
+    ) -> Dict[str, float]:
+        """Benchmarks the training file export (DataSet.write_training_file).
+
+        Parameters
+        ----------
+        data_set : DataSet
+            The dataset to be exported.
+        file_format : str
+            The export format ("nt" or "tsv").
+        compression : str
+            None, "gzip", or "zstd".
+
+        Returns
+        -------
+        Dict[str, float]
+            Runtime, peak memory, and the size of the written file in bytes.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            file_to_write = os.path.join(directory, "export")
+            result = Benchmark.measure(
+                DataSet.write_training_file,
+                data_set=data_set,
+                file_to_write=file_to_write,
+                file_format=file_format,
+                compression=compression,
+            )
+            result["file_size_bytes"] = os.path.getsize(file_to_write)
+        return result
+
+    @staticmethod
+    def startup(
+        module: str = "kbc_evaluation.evaluator", repetitions: int = 5
+    ) -> Dict[str, float]:
+        """Benchmarks the import time of a module in fresh interpreters.
+
+        Parameters
+        ----------
+        module : str
+            The module to be imported.
+        repetitions : int
+            Number of interpreter starts. The minimum and the median are reported.
+
+        Returns
+        -------
+        Dict[str, float]
+            "min_seconds" and "median_seconds" of the import,
+            "heavy_modules": optional heavy dependencies that were loaded by the import (should be empty).
+        """
+        script = (
+            "import sys, time, json\n"
+            "start = time.perf_counter()\n"
+            f"import {module}\n"
+            "seconds = time.perf_counter() - start\n"
+            "heavy = [m for m in ('numpy', 'tqdm', 'zstandard') if m in sys.modules]\n"
+            "print(json.dumps([seconds, heavy]))\n"
+        )
+        timings = []
+        heavy_modules = []
+        for _ in range(repetitions):
+            output = subprocess.run(
+                [sys.executable, "-c", script],
+                stdout=subprocess.PIPE,
+                check=True,
+                universal_newlines=True,
+            ).stdout
+            seconds, heavy_modules = json.loads(output.strip().splitlines()[-1])
+            timings.append(seconds)
+        timings.sort()
+        return {
+            "min_seconds": timings[0],
+            "median_seconds": timings[len(timings) // 2],
+            "heavy_modules": heavy_modules,
+        }
+
+    @staticmethod
+    def ingestion(
+        file_to_be_read: str = None,
+        records: int = 20000,
+        candidates: int = 100,
+        repetitions: int = 3,
+    ) -> Dict[str, float]:
+        """Benchmarks reading and parsing a prediction file: the readline loop against the BackgroundRecordReader.
+        On local disks with a warm page cache the difference is small; the reader pays off if reading blocks
+        (network file systems, object stores, cold caches), so pass such a file via file_to_be_read.
+
+        Parameters
+        ----------
+        file_to_be_read : str
+            The prediction file. If None, a synthetic file is generated.
+        records : int
+            Number of records of the synthetic file.
+        candidates : int
+            Number of head and tail candidates per record of the synthetic file.
+        repetitions : int
+            Number of runs per variant. The fastest run is reported.
+
+        Returns
+        -------
+        Dict[str, float]
+            Runtime and throughput (records/s, MB/s) of both variants and the speedup of the reader.
+        """
+        from kbc_evaluation.dataset import ParsedSet
+        from kbc_evaluation.reader import BackgroundRecordReader
+
+        def readline_loop(file_path: str) -> int:
+            number_of_records = 0
+            with open(file_path, "r", encoding="utf8") as f:
+                while True:
+                    truth = f.readline()
+                    heads = f.readline()
+                    tails = f.readline()
+                    if not truth or not heads or not tails:
+                        break
+                    ParsedSet.parse_record(truth, heads, tails)
+                    number_of_records += 1
+            return number_of_records
+
+        def background_reader(file_path: str) -> int:
+            number_of_records = 0
+            with BackgroundRecordReader(file_path, encoding="utf8") as reader:
+                for truth, heads, tails in reader:
+                    ParsedSet.parse_record(truth, heads, tails)
+                    number_of_records += 1
+            return number_of_records
+
+        with tempfile.TemporaryDirectory() as directory:
+            if file_to_be_read is None:
+                file_to_be_read = os.path.join(directory, "predictions.txt")
+                Benchmark._write_synthetic_predictions(
+                    file_to_be_read, records, candidates
+                )
+            megabytes = os.path.getsize(file_to_be_read) / 1e6
+            result = {"file_size_bytes": os.path.getsize(file_to_be_read)}
+            for name, function in [
+                ("readline", readline_loop),
+                ("background_reader", background_reader),
+            ]:
+                timings = []
+                for _ in range(repetitions):
+                    start = time.perf_counter()
+                    number_of_records = function(file_to_be_read)
+                    timings.append(time.perf_counter() - start)
+                seconds = min(timings)
+                result[f"{name}_seconds"] = seconds
+                result[f"{name}_records_per_second"] = number_of_records / seconds
+                result[f"{name}_mb_per_second"] = megabytes / seconds
+        result["speedup"] = (
+            result["readline_seconds"] / result["background_reader_seconds"]
+        )
+        return result
+
+    @staticmethod
+    def parser_allocations(
+        records: int = 2000, candidates: int = 100
+    ) -> Dict[str, float]:
+        """Benchmarks the memory that is allocated per candidate by the parsing engines: StreamingEvaluationRunner
+        (decodes and splits every line) against MappedEvaluationRunner (scans the bytes of the mapped file).
+
+        The records are evaluated one at a time with tracemalloc enabled only during the evaluation of the record;
+        the peaks are summed over all records. The records are read before (the streaming engine without its
+        BackgroundRecordReader), so that the memory of the reader chunks and queue is not included. This is done for
+        synthetic files with the given number of candidates per line and with twice this number. The difference,
+        divided by the additional candidates of all records (records * 2 * candidates), is the allocation per
+        candidate (memory that does not depend on the number of candidates cancels out).
+
+        Parameters
+        ----------
+        records : int
+            Number of records of the synthetic files.
+        candidates : int
+            Number of head and tail candidates per record of the smaller synthetic file.
+
+        Returns
+        -------
+        Dict[str, float]
+            Per engine: runtime (untraced, larger file), peak traced memory (whole run on the larger file), and the
+            bytes allocated per candidate.
+        """
+        from kbc_evaluation.filtering import FilterIndex
+        from kbc_evaluation.mapped import MappedEvaluationRunner
+        from kbc_evaluation.streaming import StreamingEvaluationRunner
+
+        engines = [
+            (
+                "streaming",
+                lambda file_path: StreamingEvaluationRunner(
+                    file_path, data_set=None, filter_index=FilterIndex()
+                ),
+            ),
+            (
+                "mapped",
+                lambda file_path: MappedEvaluationRunner(
+                    file_path, data_set=None, filter_index=FilterIndex()
+                ),
+            ),
+        ]
+        result = {}
+        with tempfile.TemporaryDirectory() as directory:
+            files = []
+            for candidates_per_line in (candidates, 2 * candidates):
+                file_path = os.path.join(
+                    directory, f"predictions_{candidates_per_line}.txt"
+                )
+                # same vocabulary: the truths (and their filter index) do not depend on the number of candidates
+                Benchmark._write_synthetic_predictions(
+                    file_path, records, candidates_per_line, entities=20 * candidates
+                )
+                files.append(file_path)
+            for name, create in engines:
+                record_bytes = [
+                    Benchmark._record_allocations(name, create(file_path))
+                    for file_path in files
+                ]
+                runner = create(files[1])
+                start = time.perf_counter()
+                runner.run()
+                result[f"{name}_seconds"] = time.perf_counter() - start
+                runner = create(files[1])
+                tracemalloc.start()
+                try:
+                    runner.run()
+                    result[f"{name}_peak_memory_bytes"] = (
+                        tracemalloc.get_traced_memory()[1]
+                    )
+                finally:
+                    tracemalloc.stop()
+                result[f"{name}_bytes_per_candidate"] = max(
+                    0.0,
+                    (record_bytes[1] - record_bytes[0]) / (records * 2 * candidates),
+                )
+        return result
+
+    @staticmethod
+    def _record_allocations(engine: str, runner) -> int:
+        """Evaluates the records of the file of a runner one at a time and sums the peaks of the memory traced
+        during the evaluation of each record (see parser_allocations).
+
+        Parameters
+        ----------
+        engine : str
+            "streaming" or "mapped".
+        runner
+            The StreamingEvaluationRunner or MappedEvaluationRunner.
+
+        Returns
+        -------
+        int
+            The summed peaks in bytes.
+        """
+        from kbc_evaluation.filtering import FilterIndex
+
+        def traced(evaluate, records) -> int:
+            total = 0
+            for record in records:
+                tracemalloc.start()
+                try:
+                    evaluate(*record)
+                    total += tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+            return total
+
+        if engine == "streaming":
+            filter_index = runner._file_filter_index()
+            with open(runner.file_to_be_evaluated, "rb") as f:
+                lines = f.readlines()
+            return traced(
+                lambda *lines: runner._evaluate_record(filter_index, *lines),
+                [lines[i : i + 3] for i in range(0, len(lines) - 2, 3)],
+            )
+        with open(runner.file_to_be_evaluated, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapping:
+            view = memoryview(mapping)
+            try:
+                records = [
+                    (mapping[boundaries[0] : boundaries[1]].split(b" "), boundaries)
+                    for boundaries in runner._records(mapping)
+                ]
+                filter_index = FilterIndex(parent=runner._filter_index)
+                filter_index.add_all(truth for truth, _ in records if len(truth) == 3)
+                return traced(
+                    lambda truth, boundaries: runner._evaluate_record(
+                        view, filter_index, truth, boundaries
+                    ),
+                    records,
+                )
+            finally:
+                # the mapping cannot be closed while it is exported
+                view.release()
+
+    @staticmethod
+    def _write_synthetic_predictions(
+        file_to_write: str, records: int, candidates: int, entities: int = None
+    ) -> None:
+        """Writes a random prediction file.
+
+        Parameters
+        ----------
+        file_to_write : str
+            The file that shall be written.
+        records : int
+            Number of records.
+        candidates : int
+            Number of head and tail candidates per record.
+        entities : int
+            Number of distinct entities (default: 10 * candidates).
+        """
+        import numpy
+
+        from kbc_evaluation.writer import PredictionWriter
+
+        if entities is None:
+            entities = 10 * candidates
+        entities = [f"e{i}" for i in range(entities)]
+        random = numpy.random.RandomState(42)
+        with PredictionWriter(file_to_write, entities, ["r"]) as writer:
+            for start in range(0, records, 1000):
+                size = min(1000, records - start)
+                triples = random.randint(0, len(entities), size=(size, 3))
+                triples[:, 1] = 0
+                writer.write_batch(
+                    triples,
+                    random.randint(0, len(entities), size=(size, candidates)),
+                    random.randint(0, len(entities), size=(size, candidates)),
+                )
+
+    @staticmethod
+    def run_all(data_set: DataSet = DataSet.WN18) -> List[Dict]:
+        """Runs all benchmarks.
+
+        Parameters
+        ----------
+        data_set : DataSet
+            The dataset to be used.
+
+        Returns
+        -------
+        List[Dict]
+            One entry per benchmark with the benchmark name, its parameters, and its measurements.
+        """
+        results = [
+            {
+                "benchmark": "startup",
+                "parameters": {"module": "kbc_evaluation.evaluator"},
+                **Benchmark.startup(),
+            }
+        ]
+        results.append(
+            {
+                "benchmark": "ingestion",
+                "parameters": {"records": 20000, "candidates": 100},
+                **Benchmark.ingestion(),
+            }
+        )
+        results.append(
+            {
+                "benchmark": "parser_allocations",
+                "parameters": {"records": 2000, "candidates": 100},
+                **Benchmark.parser_allocations(),
+            }
+        )
+        for file_format, compression in [
+            ("nt", None),
+            ("nt", "gzip"),
+            ("tsv", None),
+        ]:
+            parameters = {
+                "data_set": str(data_set),
+                "file_format": file_format,
+                "compression": compression,
+            }
+            measurements = Benchmark.export(
+                data_set=data_set, file_format=file_format, compression=compression
+            )
+            results.append(
+                {"benchmark": "export", "parameters": parameters, **measurements}
+            )
+        return results
+
+
+if __name__ == "__main__":
+    for benchmark_result in Benchmark.run_all():
+        print(json.dumps(benchmark_result))
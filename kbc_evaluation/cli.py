@@ -0,0 +1,385 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import sys
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ("text", "json", "csv")
+
+_SIZE_SUFFIXES = {"K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_size(value: str) -> int:
+    """Parses a number of bytes with an optional binary suffix (e.g. "512M", "2G").
+
+    Parameters
+    ----------
+    value : str
+        The size.
+
+    Returns
+    -------
+    int
+        The number of bytes.
+    """
+    value = value.strip().upper().rstrip("B")
+    factor = 1
+    if value and value[-1] in _SIZE_SUFFIXES:
+        factor = _SIZE_SUFFIXES[value[-1]]
+        value = value[:-1]
+    try:
+        return int(float(value) * factor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid size: {value}")
+
+
+def format_results(results: List, output_format: str) -> str:
+    """Formats evaluation results.
+
+    Parameters
+    ----------
+    results : List[EvaluatorResult]
+        The results (e.g. one per file and hits@n value).
+    output_format : str
+        "text", "json", or "csv" (one row per result).
+
+    Returns
+    -------
+    str
+        The formatted results.
+    """
+    from kbc_evaluation.evaluator import Evaluator
+
+    if output_format == "json":
+        return json.dumps([result.to_dict() for result in results], indent=2) + "\n"
+    if output_format == "csv":
+        output = io.StringIO()
+        if results:
+            writer = csv.DictWriter(output, fieldnames=list(results[0].to_dict()))
+            writer.writeheader()
+            for result in results:
+                writer.writerow(result.to_dict())
+        return output.getvalue()
+    return "".join(Evaluator.result_text(result) + "\n" for result in results)
+
+
+def evaluate_file(
+    file_to_be_evaluated: str,
+    data_set,
+    hits_at: List[int],
+    mode: str = "streaming",
+    workers: int = 1,
+    memory_budget: int = None,
+    is_calculate_adjusted_metrics: bool = False,
+) -> List:
+    """Evaluates a file with the selected engine.
+
+    Parameters
+    ----------
+    file_to_be_evaluated : str
+        The prediction file.
+    data_set
+        DataSet or CustomDataSet.
+    hits_at : List[int]
+        The n values for which results are calculated.
+    mode : str
+        "streaming" (one pass, constant memory, optionally parallel) or "in-memory" (Evaluator).
+    workers : int
+        Number of processes of the streaming mode (the file is split into shards).
+    memory_budget : int
+        Memory budget for the candidate lists of the in-memory mode (see ParsedSet).
+    is_calculate_adjusted_metrics : bool
+        True if the chance-adjusted metrics shall be calculated.
+
+    Returns
+    -------
+    List[EvaluatorResult]
+        One result per hits@n value.
+    """
+    from kbc_evaluation.evaluator import Evaluator
+
+    if mode == "streaming":
+        from kbc_evaluation.sharding import ShardedEvaluation
+        from kbc_evaluation.streaming import StreamingEvaluationRunner
+
+        if memory_budget is not None:
+            logger.warning("The memory budget only applies to the in-memory mode")
+        if workers > 1:
+            accumulator = ShardedEvaluation.evaluate_parallel(
+                file_to_be_evaluated, data_set, workers=workers, hits_at=hits_at
+            )
+        else:
+            accumulator = StreamingEvaluationRunner(
+                file_to_be_evaluated, data_set, hits_at=hits_at
+            ).run()
+        test_set_size = len(data_set.test_set())
+        results = [
+            accumulator.to_result(file_to_be_evaluated, test_set_size, n)
+            for n in hits_at
+        ]
+    else:
+        if workers > 1:
+            logger.warning("Workers only apply to the streaming mode")
+        # one parse for all n values
+        results = Evaluator.calculate_results_at(
+            file_to_be_evaluated, data_set, hits_at, memory_budget=memory_budget
+        )
+    if is_calculate_adjusted_metrics:
+        from kbc_evaluation.adjusted import AdjustedMetrics
+
+        for result in results:
+            AdjustedMetrics.add_to_result(result, data_set)
+    return results
+
+
+def main(args: List[str] = None) -> int:
+    """Command line interface: kbc-eval <command> (or python -m kbc_evaluation <command>).
+
+    Parameters
+    ----------
+    args : List[str]
+        The arguments (default: sys.argv[1:]).
+
+    Returns
+    -------
+    int
+        The exit code.
+    """
+    parser = _parser()
+    arguments = parser.parse_args(args)
+    if arguments.command is None:
+        parser.print_help()
+        return 2
+    _configure_logging(arguments)
+    progress_callback = None
+    if arguments.verbose and not sys.stderr.isatty():
+        from kbc_evaluation.progress import LoggingProgress, Progress
+
+        # no progress bars in logs: log the progress instead
+        progress_callback = LoggingProgress()
+        Progress.add_callback(progress_callback)
+    try:
+        return arguments.function(arguments)
+    finally:
+        if progress_callback is not None:
+            Progress.remove_callback(progress_callback)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="kbc-eval", description="Evaluation of knowledge base completion."
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Log progress to stderr."
+    )
+    parser.add_argument(
+        "--log-conf",
+        default=None,
+        help="Logging configuration file (fileConfig format) instead of stderr logging.",
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    def add_data_set(command: argparse.ArgumentParser) -> None:
+        command.add_argument(
+            "--data-set",
+            required=True,
+            help="Name of a built-in (wn18, fb15k) or custom dataset.",
+        )
+        command.add_argument(
+            "--data-set-directory",
+            default=None,
+            help="Directory with the split files; registers --data-set as custom dataset.",
+        )
+
+    def add_output(command: argparse.ArgumentParser, default: str = "text") -> None:
+        command.add_argument("--format", choices=OUTPUT_FORMATS, default=default)
+        command.add_argument(
+            "--output", default=None, help="Output file (default: stdout)."
+        )
+
+    def add_evaluation(command: argparse.ArgumentParser) -> None:
+        add_data_set(command)
+        command.add_argument(
+            "--hits-at", type=int, nargs="+", default=[10], help="Hits@n values."
+        )
+        command.add_argument(
+            "--mode", choices=("streaming", "in-memory"), default="streaming"
+        )
+        command.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes of the streaming mode (one shard per process).",
+        )
+        command.add_argument(
+            "--memory-budget",
+            type=parse_size,
+            default=None,
+            help="Memory budget for candidate lists in the in-memory mode (e.g. 512M).",
+        )
+        command.add_argument(
+            "--adjusted", action="store_true", help="Add chance-adjusted metrics."
+        )
+        add_output(command)
+
+    evaluate = commands.add_parser("evaluate", help="Evaluate a prediction file.")
+    evaluate.add_argument("file")
+    add_evaluation(evaluate)
+    evaluate.set_defaults(function=_evaluate)
+
+    batch = commands.add_parser("batch", help="Evaluate multiple prediction files.")
+    batch.add_argument("files", nargs="+")
+    add_evaluation(batch)
+    batch.set_defaults(function=_evaluate)
+
+    convert = commands.add_parser(
+        "convert", help="Convert a binary prediction file into the text format."
+    )
+    convert.add_argument("binary_file")
+    convert.add_argument("text_file")
+    convert.add_argument(
+        "--compression",
+        choices=("infer", "none", "gzip", "zstd"),
+        default="infer",
+        help="Compression of the text file.",
+    )
+    convert.set_defaults(function=_convert)
+
+    index = commands.add_parser(
+        "index", help="Build the sidecar index of a prediction file."
+    )
+    index.add_argument("file")
+    index.add_argument("--index-file", default=None)
+    index.set_defaults(function=_index)
+
+    validate = commands.add_parser(
+        "validate", help="Check a prediction file against a dataset."
+    )
+    validate.add_argument("file")
+    add_data_set(validate)
+    validate.add_argument("--max-examples", type=int, default=20)
+    validate.add_argument(
+        "--check-candidates",
+        action="store_true",
+        help="Check every candidate against the entities of the dataset.",
+    )
+    add_output(validate, default="json")
+    validate.set_defaults(function=_validate)
+
+    benchmark = commands.add_parser("benchmark", help="Run the benchmark suite.")
+    benchmark.add_argument("--data-set", default="wn18")
+    benchmark.add_argument("--data-set-directory", default=None)
+    benchmark.add_argument(
+        "--output", default=None, help="Output file (default: stdout)."
+    )
+    benchmark.set_defaults(function=_benchmark)
+    return parser
+
+
+def _configure_logging(arguments: argparse.Namespace) -> None:
+    if arguments.log_conf is not None:
+        from kbc_evaluation import configure_logging
+
+        configure_logging(arguments.log_conf)
+    else:
+        # stdout is reserved for the output
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.INFO if arguments.verbose else logging.WARNING,
+            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        )
+
+
+def _data_set(arguments: argparse.Namespace):
+    from kbc_evaluation.registry import DataSetRegistry
+
+    if arguments.data_set_directory is not None:
+        return DataSetRegistry.register(
+            name=arguments.data_set,
+            directory=arguments.data_set_directory,
+            is_overwrite=True,
+        )
+    return DataSetRegistry.get(arguments.data_set)
+
+
+def _write_output(arguments: argparse.Namespace, text: str) -> None:
+    if arguments.output is None:
+        sys.stdout.write(text)
+    else:
+        with open(arguments.output, "w", encoding="utf8") as f:
+            f.write(text)
+
+
+def _evaluate(arguments: argparse.Namespace) -> int:
+    data_set = _data_set(arguments)
+    files = arguments.files if arguments.command == "batch" else [arguments.file]
+    results = []
+    for file_to_be_evaluated in files:
+        results.extend(
+            evaluate_file(
+                file_to_be_evaluated,
+                data_set,
+                hits_at=arguments.hits_at,
+                mode=arguments.mode,
+                workers=arguments.workers,
+                memory_budget=arguments.memory_budget,
+                is_calculate_adjusted_metrics=arguments.adjusted,
+            )
+        )
+    _write_output(arguments, format_results(results, arguments.format))
+    return 0
+
+
+def _convert(arguments: argparse.Namespace) -> int:
+    from kbc_evaluation.writer import convert_to_text
+
+    compression = None if arguments.compression == "none" else arguments.compression
+    convert_to_text(arguments.binary_file, arguments.text_file, compression)
+    return 0
+
+
+def _index(arguments: argparse.Namespace) -> int:
+    from kbc_evaluation.index import PredictionIndex
+
+    index = PredictionIndex.build(arguments.file, index_file=arguments.index_file)
+    logger.info(f"Indexed {len(index)} records of {arguments.file}")
+    return 0
+
+
+def _validate(arguments: argparse.Namespace) -> int:
+    from kbc_evaluation.validation import PredictionValidator
+
+    report = PredictionValidator(
+        _data_set(arguments),
+        max_examples=arguments.max_examples,
+        is_check_candidates=arguments.check_candidates,
+    ).validate(arguments.file)
+    if arguments.format == "json":
+        text = json.dumps(report.to_dict(), indent=2) + "\n"
+    elif arguments.format == "csv":
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(["problem", "count"])
+        writer.writerows(report.counts.items())
+        text = output.getvalue()
+    else:
+        text = f"{arguments.file}: {'valid' if report.is_valid else 'invalid'} ({report.records} records)\n"
+        text += "".join(
+            f"{problem}: {count} (e.g. {report.examples[problem][:3]})\n"
+            for problem, count in report.counts.items()
+            if count > 0
+        )
+    _write_output(arguments, text)
+    return 0 if report.is_valid else 1
+
+
+def _benchmark(arguments: argparse.Namespace) -> int:
+    from kbc_evaluation.benchmark import Benchmark
+
+    results = Benchmark.run_all(_data_set(arguments))
+    _write_output(arguments, "".join(json.dumps(result) + "\n" for result in results))
+    return 0
@@ -0,0 +1,248 @@
+import heapq
+import logging
+from typing import Dict, Iterator, List, Tuple, Union
+
+from kbc_evaluation.dataset import DataSet, ParsedSet
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.index import PredictionIndex
+from kbc_evaluation.reader import BackgroundRecordReader
+from kbc_evaluation.streaming import StreamingEvaluationRunner, calculate_ranks
+
+logger = logging.getLogger(__name__)
+
+
+def reciprocal(rank: Union[int, None]) -> float:
+    """Reciprocal rank; 0 if the correct concept was not predicted."""
+    return 0.0 if rank is None else 1.0 / rank
+
+
+class ComparisonResult:
+    """Object holding the results of a paired comparison of two prediction files (A: baseline, B: candidate).
+
+    A task is won by B if B ranks the correct concept better than A (a concept that was not predicted counts as
+    worse than any rank). Deltas are given as differences of reciprocal ranks (B - A), so that the mean delta is the
+    difference of the MRR on the paired tasks.
+    """
+
+    def __init__(self, file_a: str, file_b: str):
+        self.file_a = file_a
+        self.file_b = file_b
+
+        # number of (valid) records in the files, records of A for which B has a record
+        self.records_a = 0
+        self.records_b = 0
+        self.paired_records = 0
+
+        # key: "raw" or "filtered", value: statistics over all paired tasks
+        self.modes = {
+            mode: ComparisonResult._statistics() for mode in ("raw", "filtered")
+        }
+
+        # key: "raw" or "filtered", value: key: relation, value: statistics of the tasks of the relation
+        self.relations = {"raw": {}, "filtered": {}}
+
+        # tasks with the largest loss (gain) in filtered reciprocal rank, largest first
+        self.regressions = []
+        self.improvements = []
+
+    @staticmethod
+    def _statistics() -> Dict[str, Union[int, float]]:
+        return {"tasks": 0, "wins": 0, "losses": 0, "ties": 0, "mrr_delta": 0.0}
+
+    def to_dict(self) -> Dict:
+        """Get the result as JSON serializable dictionary.
+
+        Returns
+        -------
+        Dict
+            The result.
+        """
+        return dict(vars(self))
+
+
+class PairedComparison:
+    """Compares two prediction files for the same dataset task by task in a single streaming pass.
+
+    If both files contain the records in the same order (e.g. both were written in test set order), they are read in
+    lockstep. Else, the records of A are joined with the records of B via the sidecar index of B (see
+    PredictionIndex; the index is built if necessary). Candidate lists are never held in memory, but the memory is
+    linear in the number of records: filtering needs the truths of both files (one child FilterIndex per file on top
+    of the shared dataset index), and the join of misaligned files holds the offset index of B. The accumulated
+    statistics depend only on the number of relations and top_n.
+    """
+
+    def __init__(
+        self,
+        file_a: str,
+        file_b: str,
+        data_set: DataSet,
+        filter_index: FilterIndex = None,
+    ):
+        """Constructor.
+
+        Parameters
+        ----------
+        file_a : str
+            Prediction file of the baseline.
+        file_b : str
+            Prediction file of the candidate.
+        data_set : DataSet
+            The dataset for which predictions have been made.
+        filter_index : FilterIndex
+            Index of the true statements of the dataset. If None, it is built from data_set.
+        """
+        self.file_a = file_a
+        self.file_b = file_b
+        self.data_set = data_set
+        self._filter_index = filter_index
+        self.records_a = 0
+        self.records_b = 0
+        self.paired_records = 0
+
+    def tasks(self) -> Iterator[tuple]:
+        """Iterates over the paired prediction tasks (in the order of file A). Each file is filtered with the dataset
+        and its own truths, exactly like in a separate evaluation.
+
+        Returns
+        -------
+        Iterator[tuple]
+            Per task: head, relation, tail, direction ("heads" or "tails"), raw rank in A, raw rank in B,
+            filtered rank in A, filtered rank in B. Ranks are None if the correct concept was not predicted.
+        """
+        if self._filter_index is None:
+            self._filter_index = FilterIndex.from_data_set(self.data_set)
+        index_a = StreamingEvaluationRunner.file_filter_index(
+            self.file_a, self._filter_index
+        )
+        index_b = StreamingEvaluationRunner.file_filter_index(
+            self.file_b, self._filter_index
+        )
+        self.records_a = self.records_b = self.paired_records = 0
+        prediction_index_b = None
+        with BackgroundRecordReader(
+            self.file_a, encoding="utf8"
+        ) as reader_a, BackgroundRecordReader(self.file_b, encoding="utf8") as reader_b:
+            records_b = iter(reader_b)
+            for record_a in reader_a:
+                truth, heads_a, tails_a = ParsedSet.parse_record(*record_a)
+                if len(truth) != 3:
+                    continue
+                self.records_a += 1
+                predictions_b = None
+                if prediction_index_b is None:
+                    record_b = next(records_b, None)
+                    if record_b is not None:
+                        truth_b, heads_b, tails_b = ParsedSet.parse_record(*record_b)
+                        self.records_b += 1
+                        if truth_b == truth:
+                            predictions_b = heads_b, tails_b
+                        else:
+                            logger.info(
+                                f"The records of {self.file_b} are not aligned with {self.file_a}. "
+                                f"Joining via the index."
+                            )
+                            prediction_index_b = PredictionIndex.get(self.file_b)
+                if prediction_index_b is not None:
+                    predictions_b = prediction_index_b.read_triple(tuple(truth))
+                if predictions_b is None:
+                    continue
+                self.paired_records += 1
+                h, r, t = truth
+                heads_b, tails_b = predictions_b
+                correct_heads_a = index_a.correct_heads(r, t)
+                correct_heads_b = index_b.correct_heads(r, t)
+                raw_a, filtered_a = calculate_ranks(heads_a, h, correct_heads_a)
+                raw_b, filtered_b = calculate_ranks(heads_b, h, correct_heads_b)
+                yield h, r, t, "heads", raw_a, raw_b, filtered_a, filtered_b
+                correct_tails_a = index_a.correct_tails(h, r)
+                correct_tails_b = index_b.correct_tails(h, r)
+                raw_a, filtered_a = calculate_ranks(tails_a, t, correct_tails_a)
+                raw_b, filtered_b = calculate_ranks(tails_b, t, correct_tails_b)
+                yield h, r, t, "tails", raw_a, raw_b, filtered_a, filtered_b
+            if prediction_index_b is None:
+                for _ in records_b:
+                    self.records_b += 1
+            else:
+                self.records_b = len(prediction_index_b)
+                prediction_index_b.close()
+
+    def compare(self, top_n: int = 20) -> ComparisonResult:
+        """Runs the comparison.
+
+        Parameters
+        ----------
+        top_n : int
+            Number of regressions and improvements that are reported.
+
+        Returns
+        -------
+        ComparisonResult
+            The result data structure.
+        """
+        result = ComparisonResult(self.file_a, self.file_b)
+        # min heaps of (delta, sequence number, task) holding the top_n tasks
+        regressions = []
+        improvements = []
+        sequence_number = 0
+        for h, r, t, direction, raw_a, raw_b, filtered_a, filtered_b in self.tasks():
+            for mode, rank_a, rank_b in (
+                ("raw", raw_a, raw_b),
+                ("filtered", filtered_a, filtered_b),
+            ):
+                delta = reciprocal(rank_b) - reciprocal(rank_a)
+                relation_statistics = result.relations[mode].get(r)
+                if relation_statistics is None:
+                    relation_statistics = ComparisonResult._statistics()
+                    result.relations[mode][r] = relation_statistics
+                for statistics in (result.modes[mode], relation_statistics):
+                    statistics["tasks"] += 1
+                    statistics["mrr_delta"] += delta
+                    if delta > 0:
+                        statistics["wins"] += 1
+                    elif delta < 0:
+                        statistics["losses"] += 1
+                    else:
+                        statistics["ties"] += 1
+
+            delta = reciprocal(filtered_b) - reciprocal(filtered_a)
+            if delta != 0 and top_n > 0:
+                sequence_number += 1
+                heap = regressions if delta < 0 else improvements
+                entry = (
+                    abs(delta),
+                    sequence_number,
+                    {
+                        "triple": [h, r, t],
+                        "direction": direction,
+                        "filtered_rank_a": filtered_a,
+                        "filtered_rank_b": filtered_b,
+                        "raw_rank_a": raw_a,
+                        "raw_rank_b": raw_b,
+                        "reciprocal_delta": delta,
+                    },
+                )
+                if len(heap) < top_n:
+                    heapq.heappush(heap, entry)
+                elif entry[0] > heap[0][0]:
+                    heapq.heapreplace(heap, entry)
+
+        # sums to means
+        for mode in result.modes:
+            for statistics in [result.modes[mode]] + list(
+                result.relations[mode].values()
+            ):
+                if statistics["tasks"] > 0:
+                    statistics["mrr_delta"] /= statistics["tasks"]
+        result.records_a = self.records_a
+        result.records_b = self.records_b
+        result.paired_records = self.paired_records
+        result.regressions = PairedComparison._sorted_tasks(regressions)
+        result.improvements = PairedComparison._sorted_tasks(improvements)
+        return result
+
+    @staticmethod
+    def _sorted_tasks(heap: List[Tuple[float, int, Dict]]) -> List[Dict]:
+        """Get the tasks of a heap, largest delta first (ties in file order)."""
+        return [
+            task for _, _, task in sorted(heap, key=lambda entry: (-entry[0], entry[1]))
+        ]
@@ -0,0 +1,135 @@
+import gzip
+import io
+from typing import Union
+
+# compression identifiers and the file suffixes from which they are inferred
+GZIP = "gzip"
+ZSTD = "zstd"
+_SUFFIXES = {".gz": GZIP, ".gzip": GZIP, ".zst": ZSTD, ".zstd": ZSTD}
+
+# default buffer size for writers (bytes)
+DEFAULT_BUFFER_SIZE = 4 * 1024 * 1024
+
+
+def infer_compression(file_path: str) -> Union[str, None]:
+    """Infers the compression from the file suffix.
+
+    Parameters
+    ----------
+    file_path : str
+        The file path.
+
+    Returns
+    -------
+    Union[str, None]
+        "gzip", "zstd", or None if the file shall not be compressed.
+    """
+    for suffix, compression in _SUFFIXES.items():
+        if file_path.lower().endswith(suffix):
+            return compression
+    return None
+
+
+def open_binary_writer(
+    file_path: str, compression: str = None, buffer_size: int = DEFAULT_BUFFER_SIZE
+) -> io.BufferedIOBase:
+    """Opens a buffered binary stream for writing, optionally compressed.
+
+    Parameters
+    ----------
+    file_path : str
+        The file that shall be written.
+    compression : str
+        None (no compression), "gzip", or "zstd". zstd requires the optional package ``zstandard``.
+    buffer_size : int
+        Size of the write buffer in bytes.
+
+    Returns
+    -------
+    io.BufferedIOBase
+        The stream. The caller is responsible for closing it.
+    """
+    if compression is None:
+        return open(file_path, "wb", buffering=buffer_size)
+    if compression == GZIP:
+        # compression level 6 is a good trade-off between speed and size for large text files
+        return io.BufferedWriter(
+            gzip.open(file_path, "wb", compresslevel=6), buffer_size=buffer_size
+        )
+    if compression == ZSTD:
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(
+                "zstd compression requires the optional package 'zstandard' (pip install zstandard)."
+            ) from e
+        raw = open(file_path, "wb")
+        return io.BufferedWriter(
+            zstandard.ZstdCompressor().stream_writer(raw, closefd=True),
+            buffer_size=buffer_size,
+        )
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def open_text_writer(
+    file_path: str, compression: str = None, buffer_size: int = DEFAULT_BUFFER_SIZE
+) -> io.TextIOBase:
+    """Opens a buffered UTF-8 text stream for writing, optionally compressed.
+
+    Parameters
+    ----------
+    file_path : str
+        The file that shall be written.
+    compression : str
+        None (no compression), "gzip", or "zstd".
+    buffer_size : int
+        Size of the write buffer in bytes.
+
+    Returns
+    -------
+    io.TextIOBase
+        The stream. The caller is responsible for closing it.
+    """
+    return io.TextIOWrapper(
+        open_binary_writer(file_path, compression, buffer_size),
+        encoding="utf8",
+        newline="\n",
+    )
+
+
+def open_binary_reader(
+    file_path: str, compression: str = None, buffer_size: int = DEFAULT_BUFFER_SIZE
+) -> io.BufferedIOBase:
+    """Opens a buffered binary stream for reading, optionally compressed.
+
+    Parameters
+    ----------
+    file_path : str
+        The file that shall be read.
+    compression : str
+        None (no compression), "gzip", or "zstd". zstd requires the optional package ``zstandard``.
+    buffer_size : int
+        Size of the read buffer in bytes.
+
+    Returns
+    -------
+    io.BufferedIOBase
+        The stream. The caller is responsible for closing it.
+    """
+    if compression is None:
+        return open(file_path, "rb", buffering=buffer_size)
+    if compression == GZIP:
+        return io.BufferedReader(gzip.open(file_path, "rb"), buffer_size=buffer_size)
+    if compression == ZSTD:
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(
+                "zstd compression requires the optional package 'zstandard' (pip install zstandard)."
+            ) from e
+        raw = open(file_path, "rb")
+        return io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(raw, closefd=True),
+            buffer_size=buffer_size,
+        )
+    raise ValueError(f"Unknown compression: {compression}")
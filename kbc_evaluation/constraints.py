@@ -0,0 +1,79 @@
+import logging
+from typing import Dict, FrozenSet, Union
+
+logger = logging.getLogger(__name__)
+
+
+class TypeConstraints:
+    """Observed domain and range of the relations of a dataset (type constraints for the evaluation).
+
+    A candidate head (tail) of a relation is type compatible if it appears as head (tail) of the relation in the
+    training split. The domains and ranges are stored as sorted ID arrays (see TripleStore.domains_and_ranges) and
+    are only converted to label sets for the relations that are actually looked up. A set membership test costs the
+    same as the filter lookup of the filtered evaluation.
+
+    Relations without training triples are not constrained.
+    """
+
+    def __init__(self, data_set, split: str = "train"):
+        """Constructor.
+
+        Parameters
+        ----------
+        data_set
+            DataSet or CustomDataSet.
+        split : str
+            The split from which domains and ranges are derived.
+        """
+        self._store = data_set.triple_store()
+        self._arrays = self._store.domains_and_ranges(split)
+        self._relation_ids = self._store.relation_ids()
+
+        # key: (kind, relation), value: set of entity labels (None: not constrained)
+        self._sets: Dict[tuple, Union[FrozenSet[str], None]] = {}
+
+    def domain(self, relation: str) -> Union[FrozenSet[str], None]:
+        """Get the heads that are type compatible with the relation.
+
+        Parameters
+        ----------
+        relation : str
+            The relation.
+
+        Returns
+        -------
+        Union[FrozenSet[str], None]
+            The entity labels. None if the relation is not constrained.
+        """
+        return self._labels("domain", relation)
+
+    def range(self, relation: str) -> Union[FrozenSet[str], None]:
+        """Get the tails that are type compatible with the relation.
+
+        Parameters
+        ----------
+        relation : str
+            The relation.
+
+        Returns
+        -------
+        Union[FrozenSet[str], None]
+            The entity labels. None if the relation is not constrained.
+        """
+        return self._labels("range", relation)
+
+    def _labels(self, kind: str, relation: str) -> Union[FrozenSet[str], None]:
+        key = (kind, relation)
+        if key not in self._sets:
+            labels = None
+            relation_id = self._relation_ids.get(relation)
+            if relation_id is not None:
+                offsets = self._arrays[kind + "_offsets"]
+                ids = self._arrays[kind + "_ids"][
+                    offsets[relation_id] : offsets[relation_id + 1]
+                ]
+                if len(ids) > 0:
+                    entities = self._store.entities()
+                    labels = frozenset(entities[i] for i in ids.tolist())
+            self._sets[key] = labels
+        return self._sets[key]
@@ -1,20 +1,31 @@
 import json
 import os
-import logging.config
-import sys
+import logging
+import time
 from enum import Enum
-import io
-from typing import List, Dict, Tuple, Union
+import itertools
+from typing import List, Dict, Tuple, Union, Iterator
 import re
-from tqdm import tqdm
 
-logconf_file = os.path.join(os.path.dirname(__file__), "log.conf")
-logging.config.fileConfig(fname=logconf_file, disable_existing_loggers=False)
+from kbc_evaluation.compression import infer_compression, open_text_writer
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.instrumentation import Instrumentation
+from kbc_evaluation.progress import Progress
+from kbc_evaluation.reader import BackgroundRecordReader
+from kbc_evaluation.triples import TripleStore, default_cache_directory
+
 logger = logging.getLogger(__name__)
 
 # making sure that the relative path works
 package_directory = os.path.dirname(os.path.abspath(__file__))
 
+# key: name of the DataSet member, value: TripleStore (enum members cannot hold state themselves)
+_triple_stores = {}
+
+# file formats for the training file export (see DataSet.write_training_file)
+FORMAT_NT = "nt"
+FORMAT_TSV = "tsv"
+
 
 class DataSet(Enum):
     """The datasets that are available for evaluation. If a new enum value shall be added, a triple is to be stated with
@@ -100,16 +111,71 @@ class DataSet(Enum):
             )
             return None
 
-        if self.value[3].endswith(".txt"):
+        return DataSet._parse_definitions_file(self.value[3])
+
+    def triple_store(self) -> TripleStore:
+        """Get the integer encoded, memory-mapped representation of the splits of this dataset.
+        The encoding is cached on disk (see kbc_evaluation.triples.default_cache_directory).
+
+        Returns
+        -------
+        TripleStore
+            The triple store.
+        """
+        if self.name not in _triple_stores:
+            _triple_stores[self.name] = TripleStore(
+                split_paths={
+                    "train": self.train_set_path(),
+                    "valid": self.valid_set_path(),
+                    "test": self.test_set_path(),
+                },
+                cache_directory=default_cache_directory(self.name.lower()),
+            )
+        return _triple_stores[self.name]
+
+    def leakage_analysis(self, split: str = "train") -> "LeakageAnalysis":
+        """Get the test leakage analysis of this dataset (duplicate and inverse entity pairs in the given split).
+
+        Parameters
+        ----------
+        split : str
+            The split in which leaking patterns are searched.
+
+        Returns
+        -------
+        LeakageAnalysis
+            The analysis.
+        """
+        from kbc_evaluation.leakage import LeakageAnalysis
+
+        return LeakageAnalysis(self, split)
+
+    @staticmethod
+    def _parse_definitions_file(
+        file_path: str,
+    ) -> Union[Dict[str, Tuple[str, str]], None]:
+        """Parses a definitions file (see definitions_map).
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the definitions file. Supported are tab separated text files (.txt) and JSON files (.json).
+
+        Returns
+        -------
+        Union[Dict[str, Tuple[str, str]], None]
+            The definitions map. None if the file format is not supported.
+        """
+        if file_path.endswith(".txt"):
             result = {}
-            with open(self.value[3], "r", encoding="utf-8") as f:
+            with open(file_path, "r", encoding="utf-8") as f:
                 for line in f:
                     line = line.replace("\n", "")
                     tokens = line.split(sep="\t")
                     result[tokens[0]] = (tokens[1], tokens[2].rstrip())
             return result
-        elif self.value[3].endswith(".json"):
-            with open(self.value[3]) as json_file:
+        elif file_path.endswith(".json"):
+            with open(file_path) as json_file:
                 data = json.load(json_file)
                 result = {}
                 for key in data:
@@ -130,13 +196,26 @@ class DataSet(Enum):
         List[List[str]]
             List of triples.
         """
-        result = []
+        return list(DataSet._iterate_tab_separated_data(file_path))
+
+    @staticmethod
+    def _iterate_tab_separated_data(file_path) -> Iterator[List[str]]:
+        """Streams the given file triple by triple (without materializing it).
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the file that shall be read. Expected format: token \tab token \tab token
+
+        Returns
+        -------
+        Iterator[List[str]]
+            Iterator over the triples.
+        """
         with open(file_path, "r", encoding="utf-8") as f:
             for line in f:
                 line = line.replace("\n", "")
-                tokens = line.split(sep="\t")
-                result.append(tokens)
-        return result
+                yield line.split(sep="\t")
 
     def test_set_path(self) -> str:
         """Get the test dataset path of the given dataset.
@@ -169,7 +248,12 @@ class DataSet(Enum):
         return self.value[2]
 
     @staticmethod
-    def write_training_file_nt(data_set, file_to_write: str) -> None:
+    def write_training_file_nt(
+        data_set,
+        file_to_write: str,
+        compression: str = None,
+        iri_prefix: str = "",
+    ) -> None:
         """File in NT format that can be parsed by jRDF2Vec (https://github.com/dwslab/jRDF2Vec).
 
         Parameters
@@ -178,15 +262,109 @@ class DataSet(Enum):
             The dataset that shall be persisted as NT file for vector training.
         file_to_write : str
             The file that shall be written.
+        compression : str
+            None (inferred from the file suffix: .gz or .zst), "gzip", or "zstd".
+        iri_prefix : str
+            Prefix that is prepended to every token to obtain absolute IRIs (e.g. "http://example.org/").
         """
+        DataSet.write_training_file(
+            data_set=data_set,
+            file_to_write=file_to_write,
+            file_format=FORMAT_NT,
+            compression=compression,
+            iri_prefix=iri_prefix,
+        )
 
-        with io.open(file_to_write, "w+", encoding="utf8") as f:
-            data_to_write = data_set.train_set()
-            data_to_write.extend(data_set.valid_set())
-            for triple in data_to_write:
-                f.write(
-                    "<" + triple[0] + "> <" + triple[1] + "> <" + triple[2] + "> .\n"
-                )
+    @staticmethod
+    def write_training_file(
+        data_set,
+        file_to_write: str,
+        file_format: str = "nt",
+        compression: str = None,
+        iri_prefix: str = "",
+        lines_per_write: int = 65536,
+    ) -> None:
+        """Streams the training and the validation split into a training file for vector training. The splits are
+        never materialized, lines are written in large batches.
+
+        Parameters
+        ----------
+        data_set : DataSet
+            The dataset that shall be persisted for vector training.
+        file_to_write : str
+            The file that shall be written.
+        file_format : str
+            "nt": N-Triples (optionally with an IRI prefix).
+            "tsv": Tab separated integer IDs (head \tab relation \tab tail). The ID mappings are written to
+            <file_to_write>.entities.tsv and <file_to_write>.relations.tsv (format: id \tab token).
+        compression : str
+            None (inferred from the file suffix: .gz or .zst), "gzip", or "zstd".
+        iri_prefix : str
+            Prefix that is prepended to every token in the NT format.
+        lines_per_write : int
+            Number of lines that are joined before they are handed to the (buffered) writer.
+        """
+        if compression is None:
+            compression = infer_compression(file_to_write)
+        triples = itertools.chain(
+            DataSet._iterate_tab_separated_data(data_set.train_set_path()),
+            DataSet._iterate_tab_separated_data(data_set.valid_set_path()),
+        )
+
+        entity_ids = {}
+        relation_ids = {}
+        if file_format == FORMAT_NT:
+            lines = (
+                f"<{iri_prefix}{h}> <{iri_prefix}{r}> <{iri_prefix}{t}> .\n"
+                for h, r, t in triples
+            )
+        elif file_format == FORMAT_TSV:
+            lines = DataSet._tsv_id_lines(triples, entity_ids, relation_ids)
+        else:
+            raise ValueError(f"Unknown file format: {file_format}")
+
+        with open_text_writer(file_to_write, compression) as f:
+            while True:
+                batch = "".join(itertools.islice(lines, lines_per_write))
+                if not batch:
+                    break
+                f.write(batch)
+
+        if file_format == FORMAT_TSV:
+            for suffix, ids in (
+                (".entities.tsv", entity_ids),
+                (".relations.tsv", relation_ids),
+            ):
+                with open_text_writer(file_to_write + suffix) as f:
+                    f.writelines(f"{i}\t{token}\n" for token, i in ids.items())
+
+    @staticmethod
+    def _tsv_id_lines(
+        triples: Iterator[List[str]],
+        entity_ids: Dict[str, int],
+        relation_ids: Dict[str, int],
+    ) -> Iterator[str]:
+        """Maps the given triples to lines of integer IDs. IDs are assigned in order of first appearance.
+
+        Parameters
+        ----------
+        triples : Iterator[List[str]]
+            The triples to be mapped.
+        entity_ids : Dict[str, int]
+            The entity mapping. It is extended while iterating.
+        relation_ids : Dict[str, int]
+            The relation mapping. It is extended while iterating.
+
+        Returns
+        -------
+        Iterator[str]
+            One line per triple.
+        """
+        for h, r, t in triples:
+            h_id = entity_ids.setdefault(h, len(entity_ids))
+            r_id = relation_ids.setdefault(r, len(relation_ids))
+            t_id = entity_ids.setdefault(t, len(entity_ids))
+            yield f"{h_id}\t{r_id}\t{t_id}\n"
 
 
 class ParsedSet:
@@ -196,6 +374,9 @@ class ParsedSet:
         data_set: DataSet,
         is_apply_filtering: bool = False,
         is_stop_early: bool = True,
+        is_apply_type_constraints: bool = False,
+        memory_budget: int = None,
+        filter_index: FilterIndex = None,
     ):
         """Constructor. Note that the file is immediately parsed.
 
@@ -210,12 +391,27 @@ class ParsedSet:
             disk consumption. In some cases (debugging, analyzing results), it may make sense to not stop early.
         data_set : DataSet
             The dataset that is to be used.
+        is_apply_type_constraints : bool
+            True if candidates that are not type compatible with the relation shall be removed (see
+            TypeConstraints). The constraints are applied in the filtering pass.
+        memory_budget : int
+            If given, candidate lists beyond this (estimated) number of bytes are spilled to a temporary file and
+            read back lazily (see SpillingPredictions). Useful together with is_stop_early=False on large files.
+        filter_index : FilterIndex
+            If given, the true statements for filtering are looked up in this index (e.g. the index of an
+            IncrementalFilterIndex) instead of being read from the split files of the dataset.
         """
         self.data_set = data_set
         self.file_to_be_evaluated = file_to_be_evaluated
         self.is_apply_filtering = is_apply_filtering
+        self.is_apply_type_constraints = is_apply_type_constraints
         self.total_prediction_tasks = 0
-        self.triple_predictions = {}
+        if memory_budget is None:
+            self.triple_predictions = {}
+        else:
+            from kbc_evaluation.spill import SpillingPredictions
+
+            self.triple_predictions = SpillingPredictions(memory_budget)
         self.is_stop_early = is_stop_early
 
         # initialize lookup datastructures for filtering (contains only true statements)
@@ -224,50 +420,98 @@ class ParsedSet:
         # value: list of str
         self._sp_map = {}
         self._po_map = {}
+        self._filter_index = filter_index
+
+        # measurements are only taken if the instrumentation is enabled
+        is_instrumented = Instrumentation.enabled
+        tokenize_seconds = 0.0
+        candidates = 0
+
+        # the file is read in a background thread while the records are parsed
+        with BackgroundRecordReader(
+            self.file_to_be_evaluated, encoding="utf8"
+        ) as records:
+            logger.info("Reading provided file...")
+            progress = Progress.stage(
+                "parse",
+                total=os.path.getsize(self.file_to_be_evaluated),
+                unit="bytes",
+            )
+            characters_read = 0
+            with Instrumentation.stage("parse"), progress:
+                for truth, heads, tails in records:
+                    if progress.is_active:
+                        # characters approximate bytes (exact for ASCII files)
+                        characters_read += len(truth) + len(heads) + len(tails)
+                        progress.update(
+                            characters_read, self.total_prediction_tasks // 2 + 1
+                        )
+                    # parse the lines
+                    if is_instrumented:
+                        start = time.perf_counter()
+                        truth, heads, tails = self._parse_lines(truth, heads, tails)
+                        tokenize_seconds += time.perf_counter() - start
+                        candidates += len(heads) + len(tails)
+                    else:
+                        truth, heads, tails = self._parse_lines(truth, heads, tails)
+
+                    # triple predictions is a dictionary mapping from a triple(str, str, str) - representing (h, l, t) -
+                    # to a tuple holding the list of predictions (unfiltered) where the first elements holds the head
+                    # predictions and the last element holds the tail predictions.
+                    self.triple_predictions[(truth[0], truth[1], truth[2])] = (
+                        heads,
+                        tails,
+                    )
+                    self.total_prediction_tasks += 2
+
+            if is_instrumented:
+                Instrumentation.record("parse.tokenize", tokenize_seconds)
+                Instrumentation.count("parse.records", self.total_prediction_tasks // 2)
+                Instrumentation.count("parse.candidates", candidates)
+                Instrumentation.count(
+                    "parse.bytes_read", os.path.getsize(self.file_to_be_evaluated)
+                )
 
-        with open(self.file_to_be_evaluated, "r", encoding="utf8") as f:
-            print("Reading provided file...")
-            while True:
-                # read three lines
-                truth = f.readline()
-                if not truth:
-                    break
-                heads = f.readline()
-                if not heads:
-                    break
-                tails = f.readline()
-                if not tails:
-                    break
-
-                # parse the lines
-                truth, heads, tails = self._parse_lines(truth, heads, tails)
-
-                # triple predictions is a dictionary mapping from a triple(str, str, str) - representing (h, l, t) -
-                # to a tuple holding the list of predictions (unfiltered) where the first elements holds the head
-                # predictions and the last element holds the tail predictions.
-                self.triple_predictions[(truth[0], truth[1], truth[2])] = (heads, tails)
-                self.total_prediction_tasks += 2
-
-            if self.is_apply_filtering:
-                self._apply_filtering()
+            if self.is_apply_filtering or self.is_apply_type_constraints:
+                with Instrumentation.stage("filtering"):
+                    self._apply_filtering()
 
     def _apply_filtering(self) -> None:
         """
-        Loops over self.triple_predictions and applies the filtering.
-        This method changes self.triple_predictions (deletes correct ones)
+        Loops over self.triple_predictions and applies the filtering and/or the type constraints.
+        This method changes self.triple_predictions (deletes correct ones and type incompatible ones)
         """
         logger.info("Apply Filtering")
-        self._parse_dataset_files()
-        new_triple_predictions = {}
+        if self.is_apply_filtering and self._filter_index is None:
+            with Instrumentation.stage("filtering.index"):
+                self._parse_dataset_files()
+        constraints = None
+        if self.is_apply_type_constraints:
+            from kbc_evaluation.constraints import TypeConstraints
+
+            with Instrumentation.stage("filtering.constraints"):
+                constraints = TypeConstraints(self.data_set)
+        is_instrumented = Instrumentation.enabled
+        candidates_scanned = 0
+        filtered_out = 0
+        if isinstance(self.triple_predictions, dict):
+            new_triple_predictions = {}
+        else:
+            # a spilling map is updated in place (replacing values does not change the order of the keys)
+            new_triple_predictions = self.triple_predictions
         total = len(self.triple_predictions)
-        with tqdm(total=total, file=sys.stdout) as pbar:
-            for truth, prediction in self.triple_predictions.items():
+        with Progress.stage("filtering", total=total) as progress:
+            for i, (truth, prediction) in enumerate(self.triple_predictions.items()):
                 # processing heads
                 heads = prediction[0]
 
                 # we are predicting heads currently, let's obtain all correct heads!
-                po_key = truth[1] + "_" + truth[2]
-                correct_heads = self._po_map[po_key]
+                if self._filter_index is not None:
+                    correct_heads = self._filter_index.correct_heads(truth[1], truth[2])
+                else:
+                    po_key = truth[1] + "_" + truth[2]
+                    correct_heads = self._po_map.get(po_key, ())
+                domain = None if constraints is None else constraints.domain(truth[1])
 
                 new_heads = []
                 for predicted_head in heads:
@@ -277,15 +521,21 @@ class ParsedSet:
                             break
                         else:
                             continue
-                    if predicted_head not in correct_heads:
+                    if predicted_head not in correct_heads and (
+                        domain is None or predicted_head in domain
+                    ):
                         new_heads.append(predicted_head)
 
                 # processing tails
                 tails = prediction[1]
 
                 # let's obtain all correct tails!
-                sp_key = truth[0] + "_" + truth[1]
-                correct_tails = self._sp_map[sp_key]
+                if self._filter_index is not None:
+                    correct_tails = self._filter_index.correct_tails(truth[0], truth[1])
+                else:
+                    sp_key = truth[0] + "_" + truth[1]
+                    correct_tails = self._sp_map.get(sp_key, ())
+                range_ = None if constraints is None else constraints.range(truth[1])
                 new_tails = []
                 for predicted_tail in tails:
                     if predicted_tail == truth[2]:
@@ -294,14 +544,47 @@ class ParsedSet:
                             break
                         else:
                             continue
-                    if predicted_tail not in correct_tails:
+                    if predicted_tail not in correct_tails and (
+                        range_ is None or predicted_tail in range_
+                    ):
                         new_tails.append(predicted_tail)
 
+                if is_instrumented:
+                    scanned = self._number_of_scanned_candidates(
+                        heads, truth[0]
+                    ) + self._number_of_scanned_candidates(tails, truth[2])
+                    candidates_scanned += scanned
+                    filtered_out += scanned - len(new_heads) - len(new_tails)
+
                 # replace with new predictions
                 new_triple_predictions[truth] = (new_heads, new_tails)
-                pbar.update(1)
+                progress.update(i + 1)
         self.triple_predictions = new_triple_predictions
 
+        if is_instrumented:
+            Instrumentation.count("filtering.records", total)
+            Instrumentation.count("filtering.candidates_scanned", candidates_scanned)
+            Instrumentation.count("filtering.filtered_out", filtered_out)
+
+    def _number_of_scanned_candidates(self, predictions: List[str], gold: str) -> int:
+        """Get the number of candidates that the filtering loop looks at (for instrumentation only).
+
+        Parameters
+        ----------
+        predictions : List[str]
+            The unfiltered predictions.
+        gold : str
+            The correct concept.
+
+        Returns
+        -------
+        int
+            Number of scanned candidates.
+        """
+        if self.is_stop_early and gold in predictions:
+            return predictions.index(gold) + 1
+        return len(predictions)
+
     def _parse_dataset_files(self) -> None:
         """This is only required for filtering.
 
@@ -343,6 +626,35 @@ class ParsedSet:
             parsed tails.
 
         """
+        truth, heads, tails = ParsedSet.parse_record(truth_line, heads_line, tails_line)
+
+        # add to filter indices
+        if self.is_apply_filtering:
+            self._add_triple_to_filter_set(triple=truth)
+
+        return truth, heads, tails
+
+    @staticmethod
+    def parse_record(
+        truth_line: str, heads_line: str, tails_line: str
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """Parses a single record (three lines) of a prediction file without any side effects.
+
+        Parameters
+        ----------
+        truth_line : str
+            True line containing the correct triple.
+        heads_line : str
+            Line containing the heads.
+        tails_line : str
+            Line containing the tails.
+
+        Returns
+        -------
+        Tuple[List[str], List[str], List[str]]
+            Tuple with element 0 being the parsed truth, element 1 being the parsed heads, and element 2 being the
+            parsed tails.
+        """
         # parse truth
         truth = truth_line.split(" ")
         if len(truth) != 3:
@@ -350,37 +662,35 @@ class ParsedSet:
         else:
             truth[2] = truth[2].replace("\n", "")
 
-        # add to filter indices
-        if self.is_apply_filtering:
-            self._add_triple_to_filter_set(triple=truth)
+        heads = ParsedSet._parse_predictions_line(heads_line, "\tHeads: ")
+        tails = ParsedSet._parse_predictions_line(tails_line, "\tTails: ")
+        return truth, heads, tails
 
-        # parse heads
-        heads = []
-        heads_prefix = "\tHeads: "
-        if not heads_line.startswith(heads_prefix):
-            logger.error(f"Invalid heads line: {heads_line}")
-        else:
-            heads = heads_line[len(heads_prefix) :]
-            heads = heads.replace("\n", "")
-            heads = re.sub(
-                r"_{[0-9]*[.,][0-9]*}", "", heads
-            )  # remove confidences if given
-            heads = heads.split(" ")
-
-        # parse tails
-        tails = []
-        tails_prefix = "\tTails: "
-        if not tails_line.startswith(tails_prefix):
-            logger.error(f"Invalid tails line: {tails_line}")
-        else:
-            tails = tails_line[len(tails_prefix) :]
-            tails = tails.replace("\n", "")
-            tails = re.sub(
-                r"_{[0-9]*[.,][0-9]*}", "", tails
-            )  # remove confidences if given
-            tails = tails.split(" ")
+    @staticmethod
+    def _parse_predictions_line(line: str, prefix: str) -> List[str]:
+        """Parses a heads or tails line.
 
-        return truth, heads, tails
+        Parameters
+        ----------
+        line : str
+            The line to be parsed.
+        prefix : str
+            The expected prefix of the line including the leading tab.
+
+        Returns
+        -------
+        List[str]
+            The predicted concepts in the order of the file. Empty if the line is invalid.
+        """
+        if not line.startswith(prefix):
+            logger.error(f"Invalid {prefix.strip()[:-1].lower()} line: {line}")
+            return []
+        predictions = line[len(prefix) :]
+        predictions = predictions.replace("\n", "")
+        predictions = re.sub(
+            r"_{-?[0-9]*[.,][0-9]*}", "", predictions
+        )  # remove confidences if given
+        return predictions.split(" ")
 
     def _add_triple_to_filter_set(self, triple: List) -> None:
         """Adds the triple to the self._sp_map and self._po_map in order to apply the filtering later.
@@ -0,0 +1,166 @@
+import logging
+from typing import Dict, Iterable, List
+
+from kbc_evaluation.ranks import RankDump
+
+logger = logging.getLogger(__name__)
+
+
+class DegreeBuckets:
+    """Buckets of prediction tasks by the degree of the gold entity in the training set (long-tail analysis).
+
+    The degrees are precomputed once per dataset (see TripleStore.degrees). The bucket boundaries are quantiles of
+    the degrees of the gold entities of the test set, so that the buckets hold similar numbers of test tasks.
+    Bucket i contains the tasks whose gold entity has a degree d with boundaries[i - 1] < d <= boundaries[i].
+
+    The metrics are calculated from the columns of a RankDump with a few vectorized operations, so bucketing adds
+    negligible cost to an evaluation that keeps its ranks.
+    """
+
+    def __init__(
+        self,
+        data_set,
+        quantiles: Iterable[float] = (0.25, 0.5, 0.75),
+        split: str = "train",
+    ):
+        """Constructor.
+
+        Parameters
+        ----------
+        data_set
+            DataSet or CustomDataSet.
+        quantiles : Iterable[float]
+            Quantiles (in (0, 1)) of the gold degrees at which buckets are split. Equal boundaries are merged.
+        split : str
+            The split in which the degrees are counted.
+        """
+        import numpy as np
+
+        store = data_set.triple_store()
+        self.degrees = store.degrees(split)
+        self.entity_ids = store.entity_ids()
+        test = store.split("test")
+        gold_degrees = np.concatenate(
+            [self.degrees[test[:, 0]], self.degrees[test[:, 2]]]
+        )
+        if len(gold_degrees) == 0:
+            self.boundaries = np.array([], dtype=np.int64)
+        else:
+            # degrees are integers: d <= 3.5 is equivalent to d <= 3
+            self.boundaries = np.unique(
+                np.floor(np.quantile(gold_degrees, sorted(quantiles))).astype(np.int64)
+            )
+
+    def labels(self) -> List[str]:
+        """Get the labels of the buckets (degree ranges).
+
+        Returns
+        -------
+        List[str]
+            One label per bucket.
+        """
+        boundaries = self.boundaries.tolist()
+        if len(boundaries) == 0:
+            return ["all"]
+        labels = [f"<={boundaries[0]}"]
+        for lower, upper in zip(boundaries, boundaries[1:]):
+            labels.append(str(upper) if upper == lower + 1 else f"{lower + 1}-{upper}")
+        labels.append(f">{boundaries[-1]}")
+        return labels
+
+    def entity_degrees(self, entities) -> "numpy.ndarray":
+        """Get the degrees of the given entity labels (0 for entities that are not in the dataset).
+
+        Parameters
+        ----------
+        entities
+            Array or list of entity labels.
+
+        Returns
+        -------
+        numpy.ndarray
+            The degrees.
+        """
+        import numpy as np
+
+        ids = np.array(
+            [self.entity_ids.get(str(entity), -1) for entity in entities],
+            dtype=np.int64,
+        )
+        result = np.zeros(len(ids), dtype=np.int64)
+        result[ids >= 0] = self.degrees[ids[ids >= 0]]
+        return result
+
+    def evaluate(
+        self, dump: RankDump, n: int = 10, is_filtered: bool = True
+    ) -> List[Dict]:
+        """Calculates the metrics per bucket. Head and tail tasks are pooled: a head task belongs to the bucket of
+        its head, a tail task to the bucket of its tail.
+
+        Parameters
+        ----------
+        dump : RankDump
+            The ranks of the evaluation.
+        n : int
+            Hits@n.
+        is_filtered : bool
+            True for filtered ranks, False for raw ranks.
+
+        Returns
+        -------
+        List[Dict]
+            Per bucket: label, tasks, found (tasks where the gold entity was predicted), hits_at_n, hits_at_n_relative
+            (hits / tasks), mean_rank and mean_reciprocal_rank (over the found tasks, like EvaluationRunner.mean_rank).
+        """
+        import numpy as np
+
+        vocabulary_degrees = self.entity_degrees(dump.entities)
+        degrees = np.concatenate(
+            [
+                vocabulary_degrees[dump.columns["head"]],
+                vocabulary_degrees[dump.columns["tail"]],
+            ]
+        )
+        ranks = np.concatenate(
+            [
+                dump.ranks(is_filtered, "heads"),
+                dump.ranks(is_filtered, "tails"),
+            ]
+        ).astype(np.float64)
+        buckets = np.searchsorted(self.boundaries, degrees, side="left")
+        bucket_count = len(self.boundaries) + 1
+        found = ranks > 0
+
+        def per_bucket(weights) -> "numpy.ndarray":
+            return np.bincount(buckets, weights=weights, minlength=bucket_count)
+
+        tasks = per_bucket(None)
+        found_tasks = per_bucket(found.astype(np.float64))
+        hits = per_bucket((found & (ranks <= n)).astype(np.float64))
+        rank_sums = per_bucket(ranks)
+        reciprocal_sums = per_bucket(
+            np.divide(1.0, ranks, out=np.zeros_like(ranks), where=found)
+        )
+
+        result = []
+        for i, label in enumerate(self.labels()):
+            result.append(
+                {
+                    "label": label,
+                    "tasks": int(tasks[i]),
+                    "found": int(found_tasks[i]),
+                    "hits_at_n": int(hits[i]),
+                    "hits_at_n_relative": (
+                        float(hits[i] / tasks[i]) if tasks[i] else 0.0
+                    ),
+                    "mean_rank": (
+                        float(rank_sums[i] / found_tasks[i]) if found_tasks[i] else 0.0
+                    ),
+                    "mean_reciprocal_rank": (
+                        float(reciprocal_sums[i] / found_tasks[i])
+                        if found_tasks[i]
+                        else 0.0
+                    ),
+                }
+            )
+        return result
@@ -1,11 +1,13 @@
-import logging.config
+import logging
 import os
-from typing import Tuple
+import time
+from typing import Dict, List, Tuple, Union
 
 from kbc_evaluation.dataset import DataSet, ParsedSet
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.instrumentation import Instrumentation
+from kbc_evaluation.progress import Progress
 
-logconf_file = os.path.join(os.path.dirname(__file__), "log.conf")
-logging.config.fileConfig(fname=logconf_file, disable_existing_loggers=False)
 logger = logging.getLogger(__name__)
 
 
@@ -35,6 +37,12 @@ class EvaluatorResult:
         non_filtered_reciprocal_mean_rank_heads: float,
         non_filtered_reciprocal_mean_rank_tails: float,
         non_filtered_reciprocal_mean_rank_all: float,
+        filtered_adjusted_mean_rank: float = None,
+        filtered_adjusted_hits_at_n: float = None,
+        filtered_adjusted_reciprocal_mean_rank: float = None,
+        non_filtered_adjusted_mean_rank: float = None,
+        non_filtered_adjusted_hits_at_n: float = None,
+        non_filtered_adjusted_reciprocal_mean_rank: float = None,
     ):
         # setting the general variables
         self.evaluated_file = evaluated_file
@@ -45,8 +53,9 @@ class EvaluatorResult:
         self.filtered_hits_at_n_heads = filtered_hits_at_n_heads
         self.filtered_hits_at_n_tails = filtered_hits_at_n_tails
         self.filtered_hits_at_n_all = filtered_hits_at_n_all
-        self.filtered_hits_at_n_relative = self.filtered_hits_at_n_all / (
-            2 * test_set_size
+        # an empty test set (e.g. an empty subset of a RankDump) has no relative hits
+        self.filtered_hits_at_n_relative = (
+            self.filtered_hits_at_n_all / (2 * test_set_size) if test_set_size else 0.0
         )
         self.filtered_mean_rank_heads = filtered_mean_rank_heads
         self.filtered_mean_rank_tails = filtered_mean_rank_tails
@@ -59,8 +68,10 @@ class EvaluatorResult:
         self.non_filtered_hits_at_n_heads = non_filtered_hits_at_n_heads
         self.non_filtered_hits_at_n_tails = non_filtered_hits_at_n_tails
         self.non_filtered_hits_at_n_all = non_filtered_hits_at_n_all
-        self.non_filtered_hits_at_n_relative = self.non_filtered_hits_at_n_all / (
-            2 * test_set_size
+        self.non_filtered_hits_at_n_relative = (
+            self.non_filtered_hits_at_n_all / (2 * test_set_size)
+            if test_set_size
+            else 0.0
         )
         self.non_filtered_mean_rank_heads = non_filtered_mean_rank_heads
         self.non_filtered_mean_rank_tails = non_filtered_mean_rank_tails
@@ -75,6 +86,48 @@ class EvaluatorResult:
             non_filtered_reciprocal_mean_rank_all
         )
 
+        # optional chance-adjusted results (see AdjustedMetrics; None if not calculated)
+        self.filtered_adjusted_mean_rank = filtered_adjusted_mean_rank
+        self.filtered_adjusted_hits_at_n = filtered_adjusted_hits_at_n
+        self.filtered_adjusted_reciprocal_mean_rank = (
+            filtered_adjusted_reciprocal_mean_rank
+        )
+        self.non_filtered_adjusted_mean_rank = non_filtered_adjusted_mean_rank
+        self.non_filtered_adjusted_hits_at_n = non_filtered_adjusted_hits_at_n
+        self.non_filtered_adjusted_reciprocal_mean_rank = (
+            non_filtered_adjusted_reciprocal_mean_rank
+        )
+
+    def to_dict(self) -> Dict:
+        """Get the result as JSON serializable dictionary.
+
+        Returns
+        -------
+        Dict
+            All result values (including the derived relative hits@n values).
+        """
+        return dict(vars(self))
+
+    @staticmethod
+    def from_dict(values: Dict) -> "EvaluatorResult":
+        """Restores a result from its dictionary representation.
+
+        Parameters
+        ----------
+        values : Dict
+            Dictionary as returned by to_dict.
+
+        Returns
+        -------
+        EvaluatorResult
+            The result data structure.
+        """
+        values = dict(values)
+        # derived values are calculated by the constructor
+        values.pop("filtered_hits_at_n_relative", None)
+        values.pop("non_filtered_hits_at_n_relative", None)
+        return EvaluatorResult(**values)
+
 
 class EvaluationRunner:
     """This class calculates evaluation scores for a single file."""
@@ -84,6 +137,9 @@ class EvaluationRunner:
         file_to_be_evaluated: str,
         data_set: DataSet,
         is_apply_filtering: bool = False,
+        is_apply_type_constraints: bool = False,
+        memory_budget: int = None,
+        filter_index: FilterIndex = None,
     ):
         """Constructor
 
@@ -95,13 +151,21 @@ class EvaluationRunner:
             The dataset for which predictions have been made.
         is_apply_filtering : bool
             Indicates whether filtering is desired (if True, results will likely improve).
+        is_apply_type_constraints : bool
+            Indicates whether candidates that are not type compatible with the relation (not observed as head/tail
+            of the relation in the training set) shall be removed.
+        memory_budget : int
+            If given, candidate lists beyond this (estimated) number of bytes are spilled to disk (see ParsedSet).
+        filter_index : FilterIndex
+            If given, the true statements for filtering are looked up in this index (see ParsedSet).
         """
 
         self._file_to_be_evaluated = file_to_be_evaluated
         self._is_apply_filtering = is_apply_filtering
+        self._is_apply_type_constraints = is_apply_type_constraints
 
         if file_to_be_evaluated is None or not os.path.isfile(file_to_be_evaluated):
-            logging.error(
+            logger.error(
                 f"The evaluator will not work because the specified file "
                 f"does not exist {file_to_be_evaluated}"
             )
@@ -113,6 +177,9 @@ class EvaluationRunner:
             is_apply_filtering=self._is_apply_filtering,
             file_to_be_evaluated=self._file_to_be_evaluated,
             data_set=data_set,
+            is_apply_type_constraints=self._is_apply_type_constraints,
+            memory_budget=memory_budget,
+            filter_index=filter_index,
         )
 
     def mean_rank(self) -> Tuple[int, int, int, float, float, float]:
@@ -139,38 +206,113 @@ class EvaluationRunner:
         reciprocal_head_rank = 0
         reciprocal_tail_rank = 0
 
+        with Instrumentation.stage("mean_rank"), Progress.stage(
+            "mean_rank", total=len(self.parsed.triple_predictions)
+        ) as progress:
+            for i, (truth, prediction) in enumerate(
+                self.parsed.triple_predictions.items()
+            ):
+                try:
+                    h_index = (
+                        prediction[0].index(truth[0]) + 1
+                    )  # (first position has index 0)
+                    head_rank += h_index
+                    reciprocal_head_rank += 1.0 / h_index
+                except ValueError:
+                    logger.error(
+                        f"ERROR: Failed to retrieve head predictions for (correct) head concept: {truth[0]} "
+                        f"Triple: {truth}"
+                    )
+                    ignored_heads += 1
+                try:
+                    t_index = (
+                        prediction[1].index(truth[2]) + 1
+                    )  # (first position has index 0)
+                    tail_rank += t_index
+                    reciprocal_tail_rank += 1.0 / t_index
+                except ValueError:
+                    logger.error(
+                        f"ERROR: Failed to retrieve tail predictions for (correct) tail concept: {truth[2]} "
+                        f"Triple: {truth}"
+                    )
+                    ignored_tails += 1
+                progress.update(i + 1)
+
+        return EvaluationRunner.aggregate_mean_rank(
+            total_tasks=self.parsed.total_prediction_tasks,
+            ignored_heads=ignored_heads,
+            ignored_tails=ignored_tails,
+            head_rank=head_rank,
+            tail_rank=tail_rank,
+            reciprocal_head_rank=reciprocal_head_rank,
+            reciprocal_tail_rank=reciprocal_tail_rank,
+        )
+
+    def task_ranks(
+        self,
+    ) -> Dict[Tuple[str, str, str], Tuple[Union[int, None], Union[int, None]]]:
+        """Get the rank of every prediction task (filtered ranks if the runner applies filtering).
+
+        Returns
+        -------
+        Dict[Tuple[str, str, str], Tuple[Union[int, None], Union[int, None]]]
+            Key: truth triple, value: head rank and tail rank (first position is 1). None if the correct concept
+            was not predicted.
+        """
+        result = {}
         for truth, prediction in self.parsed.triple_predictions.items():
-            try:
-                h_index = (
-                    prediction[0].index(truth[0]) + 1
-                )  # (first position has index 0)
-                head_rank += h_index
-                reciprocal_head_rank += 1.0 / h_index
-            except ValueError:
-                logging.error(
-                    f"ERROR: Failed to retrieve head predictions for (correct) head concept: {truth[0]} "
-                    f"Triple: {truth}"
-                )
-                ignored_heads += 1
-            try:
-                t_index = (
-                    prediction[1].index(truth[2]) + 1
-                )  # (first position has index 0)
-                tail_rank += t_index
-                reciprocal_tail_rank += 1.0 / t_index
-            except ValueError:
-                logging.error(
-                    f"ERROR: Failed to retrieve tail predictions for (correct) tail concept: {truth[2]} "
-                    f"Triple: {truth}"
-                )
-                ignored_tails += 1
+            ranks = []
+            for predictions, gold in (
+                (prediction[0], truth[0]),
+                (prediction[1], truth[2]),
+            ):
+                try:
+                    ranks.append(predictions.index(gold) + 1)
+                except ValueError:
+                    ranks.append(None)
+            result[truth] = (ranks[0], ranks[1])
+        return result
 
+    @staticmethod
+    def aggregate_mean_rank(
+        total_tasks: int,
+        ignored_heads: int,
+        ignored_tails: int,
+        head_rank: int,
+        tail_rank: int,
+        reciprocal_head_rank: float,
+        reciprocal_tail_rank: float,
+    ) -> Tuple[int, int, int, float, float, float]:
+        """Calculates MR and MRR from rank sums. This is shared by all evaluation engines so that they report
+        identical numbers.
+
+        Parameters
+        ----------
+        total_tasks : int
+            Number of prediction tasks (two per triple: heads and tails).
+        ignored_heads : int
+            Number of head tasks where the correct head was not found.
+        ignored_tails : int
+            Number of tail tasks where the correct tail was not found.
+        head_rank : int
+            Sum of the ranks of the found heads.
+        tail_rank : int
+            Sum of the ranks of the found tails.
+        reciprocal_head_rank : float
+            Sum of the reciprocal ranks of the found heads.
+        reciprocal_tail_rank : float
+            Sum of the reciprocal ranks of the found tails.
+
+        Returns
+        -------
+        Tuple[int, int, int, float, float, float]
+            See mean_rank.
+        """
         mean_head_rank = 0
         mean_tail_rank = 0
         mean_reciprocal_head_rank = 0
         mean_reciprocal_tail_rank = 0
-        total_tasks = self.parsed.total_prediction_tasks
-        if total_tasks - ignored_heads > 0:
+        if total_tasks / 2 - ignored_heads > 0:
             denominator = total_tasks / 2.0 - ignored_heads
             mean_head_rank = head_rank / denominator
             mean_reciprocal_head_rank = reciprocal_head_rank / denominator
@@ -179,11 +321,11 @@ class EvaluationRunner:
             mean_tail_rank = tail_rank / denominator
             mean_reciprocal_tail_rank = reciprocal_tail_rank / denominator
 
-        logging.info(
+        logger.info(
             f"Mean Head Rank: {mean_head_rank} ({ignored_heads} ignored lines)\n"
             + f"Mean Reciprocal Head Rank: {mean_reciprocal_head_rank} ({ignored_heads} ignored lines)"
         )
-        logging.info(
+        logger.info(
             f"Mean Tail Rank: {mean_tail_rank} ({ignored_tails} ignored lines)\n"
             + f"Mean Reciprocal Tail Rank: {mean_reciprocal_tail_rank} ({ignored_tails} ignored lines)"
         )
@@ -192,10 +334,16 @@ class EvaluationRunner:
         mean_reciprocal_rank = 0
         if (total_tasks - ignored_tails - ignored_heads) > 0:
             single_tasks = total_tasks / 2
-            mean_rank = (
-                head_rank / (single_tasks - ignored_heads)
-                + tail_rank / (single_tasks - ignored_tails)
-            ) / 2
+            if single_tasks - ignored_heads <= 0:
+                # possible for subsets of the test set (e.g. single relations)
+                mean_rank = mean_tail_rank
+            elif single_tasks - ignored_tails <= 0:
+                mean_rank = mean_head_rank
+            else:
+                mean_rank = (
+                    head_rank / (single_tasks - ignored_heads)
+                    + tail_rank / (single_tasks - ignored_tails)
+                ) / 2
 
             total_completed_tasks = total_tasks - ignored_tails - ignored_heads
             mean_reciprocal_rank = (
@@ -206,8 +354,8 @@ class EvaluationRunner:
                 / total_completed_tasks
             )
         mean_rank_rounded = round(mean_rank)
-        logging.info(f"Mean rank: {mean_rank}; rounded: {mean_rank_rounded}")
-        logging.info(f"Mean reciprocal rank: {mean_reciprocal_rank}")
+        logger.info(f"Mean rank: {mean_rank}; rounded: {mean_rank_rounded}")
+        logger.info(f"Mean reciprocal rank: {mean_reciprocal_rank}")
         return (
             round(mean_head_rank),
             round(mean_tail_rank),
@@ -235,28 +383,42 @@ class EvaluationRunner:
         heads_hits = 0
         tails_hits = 0
 
-        for truth, prediction in self.parsed.triple_predictions.items():
-            # perform the actual evaluation
-            if truth[0] in prediction[0][:n]:
-                heads_hits += 1
-            if truth[2] in prediction[1][:n]:
-                tails_hits += 1
+        with Instrumentation.stage("hits_at"), Progress.stage(
+            "hits_at", total=len(self.parsed.triple_predictions)
+        ) as progress:
+            for i, (truth, prediction) in enumerate(
+                self.parsed.triple_predictions.items()
+            ):
+                # perform the actual evaluation
+                if truth[0] in prediction[0][:n]:
+                    heads_hits += 1
+                if truth[2] in prediction[1][:n]:
+                    tails_hits += 1
+                progress.update(i + 1)
 
         result = heads_hits + tails_hits
-        logging.info(f"Hits@{n} Heads: {heads_hits}")
-        logging.info(f"Hits@{n} Tails: {tails_hits}")
-        logging.info(f"Hits@{n} Total: {result}")
+        logger.info(f"Hits@{n} Heads: {heads_hits}")
+        logger.info(f"Hits@{n} Tails: {tails_hits}")
+        logger.info(f"Hits@{n} Total: {result}")
         return heads_hits, tails_hits, result
 
 
 class Evaluator:
     """This class provides powerful evaluation reporting capabilities."""
 
+    # settings of calculate_results that are part of the key of a stored result (see ResultStore)
+    _STORE_OPTIONS = {"filtering": ["data_set", "evaluated_file"]}
+
     @staticmethod
     def calculate_results(
         file_to_be_evaluated: str,
         data_set: DataSet,
         n: int = 10,
+        rank_dump_file: str = None,
+        result_store=None,
+        is_apply_type_constraints: bool = False,
+        is_calculate_adjusted_metrics: bool = False,
+        memory_budget: int = None,
     ) -> EvaluatorResult:
         """Given the file_to_be_evaluated and a data_set, this method calculates hits at n.
 
@@ -266,60 +428,191 @@ class Evaluator:
         data_set : DataSet
         n : int
             Hits@n. This parameter specifies the n. Default value 10.
+        rank_dump_file : str
+            If given, the ranks of all prediction tasks are written to this file (see RankDump), so that further
+            metrics can be calculated without evaluating the file again.
+        result_store : ResultStore
+            If given, the result is looked up in the store (by the content of the file) and only calculated if it
+            is not stored yet. The calculated result is stored. The store is bypassed if a rank dump is requested.
+        is_apply_type_constraints : bool
+            If True, type incompatible candidates are removed in the non-filtered and in the filtered evaluation
+            (see TypeConstraints).
+        is_calculate_adjusted_metrics : bool
+            If True, the chance-adjusted metrics are calculated in addition (see AdjustedMetrics).
+        memory_budget : int
+            If given, candidate lists beyond this (estimated) number of bytes are spilled to disk (see ParsedSet).
 
         Returns
         -------
         EvaluatorResult
             The result data structure.
         """
+        if is_calculate_adjusted_metrics:
+            from kbc_evaluation.adjusted import AdjustedMetrics
+
+            result = Evaluator.calculate_results(
+                file_to_be_evaluated,
+                data_set,
+                n,
+                rank_dump_file=rank_dump_file,
+                result_store=result_store,
+                is_apply_type_constraints=is_apply_type_constraints,
+                memory_budget=memory_budget,
+            )
+            AdjustedMetrics.add_to_result(result, data_set)
+            return result
+
+        if result_store is not None and rank_dump_file is None:
+            options = dict(Evaluator._STORE_OPTIONS)
+            if is_apply_type_constraints:
+                options["type_constraints"] = "train"
+            key = result_store.key(file_to_be_evaluated, data_set, n, options)
+            result = result_store.get(key)
+            if result is not None:
+                logger.info(f"Using the stored result for {file_to_be_evaluated}")
+                result.evaluated_file = file_to_be_evaluated
+                return result
+            result = Evaluator.calculate_results(
+                file_to_be_evaluated,
+                data_set,
+                n,
+                is_apply_type_constraints=is_apply_type_constraints,
+                memory_budget=memory_budget,
+            )
+            result_store.put(key, result, data_set, options)
+            return result
+
+        return Evaluator.calculate_results_at(
+            file_to_be_evaluated,
+            data_set,
+            [n],
+            rank_dump_file=rank_dump_file,
+            is_apply_type_constraints=is_apply_type_constraints,
+            memory_budget=memory_budget,
+        )[0]
+
+    @staticmethod
+    def calculate_results_at(
+        file_to_be_evaluated: str,
+        data_set: DataSet,
+        hits_at: List[int],
+        rank_dump_file: str = None,
+        is_apply_type_constraints: bool = False,
+        memory_budget: int = None,
+    ) -> List[EvaluatorResult]:
+        """Calculates the results for multiple hits@n values. The file is parsed and ranked only once (one
+        non-filtered and one filtered runner), only hits@n is calculated per n.
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+        data_set : DataSet
+        hits_at : List[int]
+            The n values for which results are calculated.
+        rank_dump_file : str
+            If given, the ranks of all prediction tasks are written to this file (see RankDump).
+        is_apply_type_constraints : bool
+            If True, type incompatible candidates are removed (see TypeConstraints).
+        memory_budget : int
+            If given, candidate lists beyond this (estimated) number of bytes are spilled to disk (see ParsedSet).
 
+        Returns
+        -------
+        List[EvaluatorResult]
+            One result per hits@n value.
+        """
+        start = time.perf_counter()
         evaluator = EvaluationRunner(
             file_to_be_evaluated=file_to_be_evaluated,
             is_apply_filtering=False,
             data_set=data_set,
+            is_apply_type_constraints=is_apply_type_constraints,
+            memory_budget=memory_budget,
         )
 
-        non_filtered_hits_at_10 = evaluator.calculate_hits_at(n)
+        non_filtered_hits = [evaluator.calculate_hits_at(n) for n in hits_at]
         test_set_size = len(data_set.test_set())
         non_filtered_mr = evaluator.mean_rank()
+        if rank_dump_file is not None:
+            non_filtered_ranks = evaluator.task_ranks()
 
         evaluator = EvaluationRunner(
             file_to_be_evaluated=file_to_be_evaluated,
             is_apply_filtering=True,
             data_set=data_set,
+            is_apply_type_constraints=is_apply_type_constraints,
+            memory_budget=memory_budget,
         )
-        filtered_hits_at_10 = evaluator.calculate_hits_at(n)
+        filtered_hits = [evaluator.calculate_hits_at(n) for n in hits_at]
         filtered_mr = evaluator.mean_rank()
-
-        return EvaluatorResult(
-            evaluated_file=file_to_be_evaluated,
-            test_set_size=test_set_size,
-            n=n,
-            filtered_hits_at_n_heads=filtered_hits_at_10[0],
-            filtered_hits_at_n_tails=filtered_hits_at_10[1],
-            filtered_hits_at_n_all=filtered_hits_at_10[2],
-            filtered_mean_rank_heads=filtered_mr[0],
-            filtered_mean_rank_tails=filtered_mr[1],
-            filtered_mean_rank_all=filtered_mr[2],
-            filtered_reciprocal_mean_rank_heads=filtered_mr[3],
-            filtered_reciprocal_mean_rank_tails=filtered_mr[4],
-            filtered_reciprocal_mean_rank_all=filtered_mr[5],
-            non_filtered_hits_at_n_heads=non_filtered_hits_at_10[0],
-            non_filtered_hits_at_n_tails=non_filtered_hits_at_10[1],
-            non_filtered_hits_at_n_all=non_filtered_hits_at_10[2],
-            non_filtered_mean_rank_heads=non_filtered_mr[0],
-            non_filtered_mean_rank_tails=non_filtered_mr[1],
-            non_filtered_mean_rank_all=non_filtered_mr[2],
-            non_filtered_reciprocal_mean_rank_heads=non_filtered_mr[3],
-            non_filtered_reciprocal_mean_rank_tails=non_filtered_mr[4],
-            non_filtered_reciprocal_mean_rank_all=non_filtered_mr[5],
-        )
+        if rank_dump_file is not None:
+            from kbc_evaluation.ranks import RankDump
+
+            filtered_ranks = evaluator.task_ranks()
+            RankDump.from_rows(
+                (
+                    [*truth, *ranks, *filtered_ranks[truth]]
+                    for truth, ranks in non_filtered_ranks.items()
+                ),
+                evaluated_file=file_to_be_evaluated,
+                test_set_size=test_set_size,
+            ).write(rank_dump_file)
+
+        Instrumentation.record("calculate_results", time.perf_counter() - start)
+        return [
+            EvaluatorResult(
+                evaluated_file=file_to_be_evaluated,
+                test_set_size=test_set_size,
+                n=n,
+                filtered_hits_at_n_heads=filtered_hits_at_n[0],
+                filtered_hits_at_n_tails=filtered_hits_at_n[1],
+                filtered_hits_at_n_all=filtered_hits_at_n[2],
+                filtered_mean_rank_heads=filtered_mr[0],
+                filtered_mean_rank_tails=filtered_mr[1],
+                filtered_mean_rank_all=filtered_mr[2],
+                filtered_reciprocal_mean_rank_heads=filtered_mr[3],
+                filtered_reciprocal_mean_rank_tails=filtered_mr[4],
+                filtered_reciprocal_mean_rank_all=filtered_mr[5],
+                non_filtered_hits_at_n_heads=non_filtered_hits_at_n[0],
+                non_filtered_hits_at_n_tails=non_filtered_hits_at_n[1],
+                non_filtered_hits_at_n_all=non_filtered_hits_at_n[2],
+                non_filtered_mean_rank_heads=non_filtered_mr[0],
+                non_filtered_mean_rank_tails=non_filtered_mr[1],
+                non_filtered_mean_rank_all=non_filtered_mr[2],
+                non_filtered_reciprocal_mean_rank_heads=non_filtered_mr[3],
+                non_filtered_reciprocal_mean_rank_tails=non_filtered_mr[4],
+                non_filtered_reciprocal_mean_rank_all=non_filtered_mr[5],
+            )
+            for n, filtered_hits_at_n, non_filtered_hits_at_n in zip(
+                hits_at, filtered_hits, non_filtered_hits
+            )
+        ]
 
     @staticmethod
     def write_result_object_to_file(
         file_to_be_written: str,
         result_object: EvaluatorResult,
     ) -> None:
+        text = Evaluator.result_text(result_object)
+        with open(file_to_be_written, "w+", encoding="utf8") as f:
+            f.write(text)
+
+        logger.info(text)
+
+    @staticmethod
+    def result_text(result_object: EvaluatorResult) -> str:
+        """Get the human readable report of a result (as written by write_result_object_to_file).
+
+        Parameters
+        ----------
+        result_object : EvaluatorResult
+            The result.
+
+        Returns
+        -------
+        str
+            The report.
+        """
         non_filtered_text = (
             f"\nThis is the evaluation of file {result_object.evaluated_file}\n\n"
             + "Non-filtered Results\n"
@@ -336,6 +629,12 @@ class Evaluator:
             + f"Mean reciprocal rank (Tails): {result_object.non_filtered_reciprocal_mean_rank_tails}\n"
             + f"Mean reciprocal rank (All): {result_object.non_filtered_reciprocal_mean_rank_all}\n"
         )
+        if result_object.non_filtered_adjusted_mean_rank is not None:
+            non_filtered_text += (
+                f"Adjusted mean rank: {result_object.non_filtered_adjusted_mean_rank}\n"
+                + f"Adjusted hits at {result_object.n}: {result_object.non_filtered_adjusted_hits_at_n}\n"
+                + f"Adjusted mean reciprocal rank: {result_object.non_filtered_adjusted_reciprocal_mean_rank}\n"
+            )
 
         filtered_text = (
             "\nFiltered Results\n"
@@ -352,12 +651,14 @@ class Evaluator:
             + f"Mean reciprocal rank (Tails): {result_object.filtered_reciprocal_mean_rank_tails}\n"
             + f"Mean reciprocal rank (All): {result_object.filtered_reciprocal_mean_rank_all}\n"
         )
+        if result_object.filtered_adjusted_mean_rank is not None:
+            filtered_text += (
+                f"Adjusted mean rank: {result_object.filtered_adjusted_mean_rank}\n"
+                + f"Adjusted hits at {result_object.n}: {result_object.filtered_adjusted_hits_at_n}\n"
+                + f"Adjusted mean reciprocal rank: {result_object.filtered_adjusted_reciprocal_mean_rank}\n"
+            )
 
-        with open(file_to_be_written, "w+", encoding="utf8") as f:
-            f.write(non_filtered_text + "\n")
-            f.write(filtered_text)
-
-        logger.info(non_filtered_text + "\n" + filtered_text)
+        return non_filtered_text + "\n" + filtered_text
 
     @staticmethod
     def write_results_to_file(
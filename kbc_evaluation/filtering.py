@@ -0,0 +1,166 @@
+import logging
+from typing import Iterable, List, Set
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = frozenset()
+
+
+class FilterIndex:
+    """Lookup structure of true statements for filtered evaluation (as described in Bordes et al.).
+
+    In contrast to the maps of ParsedSet, the index is independent of a prediction file. It can be built once per
+    dataset and shared. Prediction file specific statements (the truths of the file) can be added to a lightweight
+    child index that falls back to its parent, so that the shared index is never modified.
+    """
+
+    def __init__(self, parent: "FilterIndex" = None):
+        """Constructor.
+
+        Parameters
+        ----------
+        parent : FilterIndex
+            Optional parent index. Lookups return the union of this index and the parent.
+        """
+        self.parent = parent
+        # key: (head, relation), value: set of correct tails
+        self._tails = {}
+        # key: (relation, tail), value: set of correct heads
+        self._heads = {}
+
+    def __len__(self) -> int:
+        """Number of (distinct) statements in this index (without the parent)."""
+        return sum(len(tails) for tails in self._tails.values())
+
+    @staticmethod
+    def from_data_set(data_set, is_bytes: bool = False) -> "FilterIndex":
+        """Builds the index from the training, validation, and test split of the given dataset.
+
+        Parameters
+        ----------
+        data_set : DataSet
+            The dataset (DataSet or CustomDataSet).
+        is_bytes : bool
+            True if the concepts shall be stored as UTF-8 encoded bytes (for bytes-level parsers) instead of str.
+
+        Returns
+        -------
+        FilterIndex
+            The index.
+        """
+        index = FilterIndex()
+        for name, split in (
+            ("Training", data_set.train_set),
+            ("Validation", data_set.valid_set),
+            ("Test", data_set.test_set),
+        ):
+            logger.info(f"Read {name} File")
+            triples = split()
+            if is_bytes:
+                triples = (
+                    [concept.encode("utf-8") for concept in triple]
+                    for triple in triples
+                )
+            index.add_all(triples)
+        return index
+
+    def add(self, triple: List[str]) -> None:
+        """Adds a true statement.
+
+        Parameters
+        ----------
+        triple : List[str]
+            The triple to be added. The list has a length of 3.
+        """
+        h, r, t = triple[0], triple[1], triple[2]
+        tails = self._tails.get((h, r))
+        if tails is None:
+            self._tails[(h, r)] = {t}
+        else:
+            tails.add(t)
+        heads = self._heads.get((r, t))
+        if heads is None:
+            self._heads[(r, t)] = {h}
+        else:
+            heads.add(h)
+
+    def add_all(self, triples: Iterable[List[str]]) -> None:
+        """Adds multiple true statements.
+
+        Parameters
+        ----------
+        triples : Iterable[List[str]]
+            The triples to be added.
+        """
+        for triple in triples:
+            self.add(triple)
+
+    def remove(self, triple: List[str]) -> None:
+        """Removes a statement from this index (not from the parent). Statements that are not in the index are
+        ignored.
+
+        Parameters
+        ----------
+        triple : List[str]
+            The triple to be removed. The list has a length of 3.
+        """
+        h, r, t = triple[0], triple[1], triple[2]
+        for lookup, key, concept in (
+            (self._tails, (h, r), t),
+            (self._heads, (r, t), h),
+        ):
+            concepts = lookup.get(key)
+            if concepts is not None:
+                concepts.discard(concept)
+                if not concepts:
+                    del lookup[key]
+
+    def correct_heads(self, relation: str, tail: str) -> Set[str]:
+        """Get all heads h for which (h, relation, tail) is true.
+
+        Parameters
+        ----------
+        relation : str
+            The relation.
+        tail : str
+            The tail.
+
+        Returns
+        -------
+        Set[str]
+            The correct heads. Do not modify the returned set.
+        """
+        heads = self._heads.get((relation, tail), _EMPTY)
+        if self.parent is None:
+            return heads
+        parent_heads = self.parent.correct_heads(relation, tail)
+        if not heads:
+            return parent_heads
+        if not parent_heads:
+            return heads
+        return heads | parent_heads
+
+    def correct_tails(self, head: str, relation: str) -> Set[str]:
+        """Get all tails t for which (head, relation, t) is true.
+
+        Parameters
+        ----------
+        head : str
+            The head.
+        relation : str
+            The relation.
+
+        Returns
+        -------
+        Set[str]
+            The correct tails. Do not modify the returned set.
+        """
+        tails = self._tails.get((head, relation), _EMPTY)
+        if self.parent is None:
+            return tails
+        parent_tails = self.parent.correct_tails(head, relation)
+        if not tails:
+            return parent_tails
+        if not parent_tails:
+            return tails
+        return tails | parent_tails
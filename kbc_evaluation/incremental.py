@@ -0,0 +1,446 @@
+import json
+import logging
+import os
+from typing import Dict, Iterable, List
+
+from kbc_evaluation.filtering import FilterIndex
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalFilterIndex:
+    """Persistent set of true statements for filtered evaluation against an evolving knowledge graph.
+
+    The statements are stored like the TripleStore stores the splits: integer encoded int32 arrays of shape (n, 3)
+    and append-only entity and relation vocabularies. The directory holds a compacted base snapshot and a log of
+    deltas (one .npz file per applied delta with the added statements and the tombstones of removed statements).
+    Applying a delta only writes the delta, i.e., its cost depends on the size of the delta, not on the size of the
+    graph. When the deltas become too large relative to the base (or too many), they are compacted into a new base.
+
+    The current snapshot is derived in one vectorized pass over the base and all deltas (for every statement in
+    the log, only its last operation counts). The FilterIndex (and FilterKernel) built from it is flat, so lookups
+    during the evaluation cost the same no matter how many deltas have been applied. A FilterIndex that was
+    obtained through filter_index() is updated in place by later deltas.
+    """
+
+    _VERSION = 1
+    _META_FILE = "meta.json"
+    _ENTITIES_FILE = "entities.txt"
+    _RELATIONS_FILE = "relations.txt"
+
+    def __init__(
+        self, directory: str, compaction_ratio: float = 0.25, max_deltas: int = 16
+    ):
+        """Constructor. Opens the index in the given directory (an empty index if the directory contains none).
+
+        Parameters
+        ----------
+        directory : str
+            Directory of the index.
+        compaction_ratio : float
+            The deltas are compacted once they contain more statements than compaction_ratio times the size of the
+            base.
+        max_deltas : int
+            The deltas are compacted once there are more than max_deltas of them.
+        """
+        self.directory = directory
+        self.compaction_ratio = compaction_ratio
+        self.max_deltas = max_deltas
+        os.makedirs(directory, exist_ok=True)
+        meta_file = os.path.join(directory, IncrementalFilterIndex._META_FILE)
+        if os.path.isfile(meta_file):
+            with open(meta_file, "r", encoding="utf-8") as f:
+                self._meta = json.load(f)
+            if self._meta.get("version") != IncrementalFilterIndex._VERSION:
+                raise ValueError(
+                    f"Unsupported filter index version in {directory}: {self._meta.get('version')}"
+                )
+        else:
+            self._meta = {
+                "version": IncrementalFilterIndex._VERSION,
+                "generation": 0,
+                "base": None,
+                "base_size": 0,
+                "deltas": [],
+            }
+        self._entities = self._read_vocabulary(IncrementalFilterIndex._ENTITIES_FILE)
+        self._relations = self._read_vocabulary(IncrementalFilterIndex._RELATIONS_FILE)
+        self._entity_ids = {e: i for i, e in enumerate(self._entities)}
+        self._relation_ids = {r: i for i, r in enumerate(self._relations)}
+        # the current snapshot (derived lazily)
+        self._triples = None
+        # key: is_bytes, value: FilterIndex of the current snapshot (kept up to date)
+        self._filter_indices = {}
+
+    def __len__(self) -> int:
+        """Number of statements of the current snapshot."""
+        return len(self.triples())
+
+    @property
+    def generation(self) -> int:
+        """Number of deltas that have been applied since the index was created."""
+        return self._meta["generation"]
+
+    @property
+    def deltas(self) -> int:
+        """Number of deltas that have not been compacted yet."""
+        return len(self._meta["deltas"])
+
+    @staticmethod
+    def from_data_set(data_set, directory: str, **kwargs) -> "IncrementalFilterIndex":
+        """Creates an index whose base consists of the training, validation, and test split of the given dataset.
+        An existing index in the directory is replaced. The encoded splits of the TripleStore are reused.
+
+        Parameters
+        ----------
+        data_set
+            DataSet or CustomDataSet.
+        directory : str
+            Directory of the index.
+        kwargs
+            Further arguments of the constructor.
+
+        Returns
+        -------
+        IncrementalFilterIndex
+            The index.
+        """
+        import numpy as np
+
+        store = data_set.triple_store()
+        index = IncrementalFilterIndex(directory, **kwargs)
+        index._entities = list(store.entities())
+        index._relations = list(store.relations())
+        index._entity_ids = dict(store.entity_ids())
+        index._relation_ids = dict(store.relation_ids())
+        for file_name, labels in (
+            (IncrementalFilterIndex._ENTITIES_FILE, index._entities),
+            (IncrementalFilterIndex._RELATIONS_FILE, index._relations),
+        ):
+            with open(os.path.join(directory, file_name), "w", encoding="utf-8") as f:
+                f.writelines(label + "\n" for label in labels)
+        triples = index._fold(
+            np.concatenate(
+                [store.split(split) for split in ("train", "valid", "test")]
+            ),
+            [],
+        )
+        old_files = index._files()
+        index._meta["generation"] = 0
+        index._meta["deltas"] = []
+        index._write_base(triples)
+        index._remove_files(old_files - index._files())
+        return index
+
+    def apply_delta(self, added_file: str = None, removed_file: str = None) -> None:
+        """Applies a delta given as tab separated triple files (the format of the splits).
+
+        Parameters
+        ----------
+        added_file : str
+            File with the statements that were added to the graph.
+        removed_file : str
+            File with the statements that were removed from the graph.
+        """
+        from kbc_evaluation.dataset import DataSet
+
+        self.apply_triples(
+            added=(
+                ()
+                if added_file is None
+                else DataSet._iterate_tab_separated_data(added_file)
+            ),
+            removed=(
+                ()
+                if removed_file is None
+                else DataSet._iterate_tab_separated_data(removed_file)
+            ),
+        )
+
+    def apply_triples(
+        self, added: Iterable[List[str]] = (), removed: Iterable[List[str]] = ()
+    ) -> None:
+        """Applies a delta. A statement that is added and removed in the same delta is removed.
+
+        Parameters
+        ----------
+        added : Iterable[List[str]]
+            The statements that were added to the graph.
+        removed : Iterable[List[str]]
+            The statements that were removed from the graph (tombstones; unknown statements are ignored).
+        """
+        import numpy as np
+
+        entity_count = len(self._entities)
+        relation_count = len(self._relations)
+        added = [list(triple) for triple in added]
+        removed = [list(triple) for triple in removed]
+        delta = {
+            "added": self._encode(added, is_extend=True),
+            "removed": self._encode(removed, is_extend=False),
+        }
+        # the vocabularies are appended before the delta is committed by the meta file; labels of an interrupted
+        # delta are harmless
+        for file_name, labels, count in (
+            (IncrementalFilterIndex._ENTITIES_FILE, self._entities, entity_count),
+            (IncrementalFilterIndex._RELATIONS_FILE, self._relations, relation_count),
+        ):
+            if len(labels) > count:
+                with open(
+                    os.path.join(self.directory, file_name), "a", encoding="utf-8"
+                ) as f:
+                    f.writelines(label + "\n" for label in labels[count:])
+        generation = self._meta["generation"] + 1
+        file_name = f"delta_{generation:08d}.npz"
+        np.savez(os.path.join(self.directory, file_name), **delta)
+        self._meta["generation"] = generation
+        self._meta["deltas"].append(
+            {
+                "file": file_name,
+                "added": len(delta["added"]),
+                "removed": len(delta["removed"]),
+            }
+        )
+        self._write_meta()
+
+        if self._triples is not None:
+            self._triples = self._fold(self._triples, [delta])
+        for is_bytes, index in self._filter_indices.items():
+            # additions first: a statement that is added and removed in the same delta is removed
+            for triples, update in ((added, index.add), (removed, index.remove)):
+                for triple in triples:
+                    update(
+                        [concept.encode("utf-8") for concept in triple]
+                        if is_bytes
+                        else triple
+                    )
+        logger.info(
+            f"Applied delta {generation}: {len(added)} added, {len(removed)} removed"
+        )
+        if self._is_compaction_due():
+            self.compact()
+
+    def compact(self) -> None:
+        """Folds the deltas into a new base and removes the delta files."""
+        if not self._meta["deltas"]:
+            return
+        # the snapshot is folded before the deltas are dropped from the meta data (triples() may not be loaded yet)
+        triples = self.triples()
+        old_files = self._files()
+        self._meta["deltas"] = []
+        self._write_base(triples)
+        self._remove_files(old_files - self._files())
+        logger.info(
+            f"Compacted filter index (generation {self.generation}, {self._meta['base_size']} statements)"
+        )
+
+    def triples(self) -> "numpy.ndarray":
+        """Get the current snapshot.
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of shape (n, 3) with the IDs (head, relation, tail) of the statements, sorted. The IDs are
+            positions in entities() and relations().
+        """
+        import numpy as np
+
+        if self._triples is None:
+            base = np.zeros((0, 3), dtype=np.int32)
+            if self._meta["base"] is not None:
+                base = np.load(
+                    os.path.join(self.directory, self._meta["base"]), mmap_mode="r"
+                )
+            deltas = []
+            for delta in self._meta["deltas"]:
+                with np.load(os.path.join(self.directory, delta["file"])) as data:
+                    deltas.append({"added": data["added"], "removed": data["removed"]})
+            self._triples = self._fold(base, deltas)
+        return self._triples
+
+    def entities(self) -> List[str]:
+        """Get the entity vocabulary (the position of a label is its ID)."""
+        return self._entities
+
+    def relations(self) -> List[str]:
+        """Get the relation vocabulary (the position of a label is its ID)."""
+        return self._relations
+
+    def filter_index(self, is_bytes: bool = False) -> FilterIndex:
+        """Get a FilterIndex of the current snapshot. The index is cached and updated by later deltas.
+
+        Parameters
+        ----------
+        is_bytes : bool
+            True if the concepts shall be stored as UTF-8 encoded bytes (for bytes-level parsers) instead of str.
+
+        Returns
+        -------
+        FilterIndex
+            The index. Do not modify it.
+        """
+        index = self._filter_indices.get(is_bytes)
+        if index is None:
+            entities = self._entities
+            relations = self._relations
+            if is_bytes:
+                entities = [label.encode("utf-8") for label in entities]
+                relations = [label.encode("utf-8") for label in relations]
+            index = FilterIndex()
+            index.add_all(
+                (entities[h], relations[r], entities[t])
+                for h, r, t in self.triples().tolist()
+            )
+            self._filter_indices[is_bytes] = index
+        return index
+
+    def kernel(self) -> "FilterKernel":
+        """Get a FilterKernel of the current snapshot (IDs of this index).
+
+        Returns
+        -------
+        FilterKernel
+            The kernel.
+        """
+        from kbc_evaluation.kernel import FilterKernel
+
+        return FilterKernel(self.triples())
+
+    def _encode(self, triples: List[List[str]], is_extend: bool) -> "numpy.ndarray":
+        """Maps labeled triples to IDs.
+
+        Parameters
+        ----------
+        triples : List[List[str]]
+            The triples.
+        is_extend : bool
+            True if unknown labels shall be added to the vocabularies. Else, triples with unknown labels are
+            dropped (they cannot be part of the index).
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of shape (n, 3), int32.
+        """
+        import numpy as np
+
+        encoded = []
+        for triple in triples:
+            ids = []
+            for concept, labels, label_ids in (
+                (triple[0], self._entities, self._entity_ids),
+                (triple[1], self._relations, self._relation_ids),
+                (triple[2], self._entities, self._entity_ids),
+            ):
+                concept_id = label_ids.get(concept)
+                if concept_id is None and is_extend:
+                    concept_id = label_ids[concept] = len(labels)
+                    labels.append(concept)
+                ids.append(concept_id)
+            if None not in ids:
+                encoded.append(ids)
+        return np.array(encoded, dtype=np.int32).reshape(-1, 3)
+
+    def _fold(self, base, deltas: List[Dict]) -> "numpy.ndarray":
+        """Applies deltas to a set of statements in one vectorized pass.
+
+        Parameters
+        ----------
+        base
+            Array of shape (n, 3) with the IDs of the statements.
+        deltas : List[Dict]
+            The deltas in the order of application ("added" and "removed" arrays of shape (n, 3)).
+
+        Returns
+        -------
+        numpy.ndarray
+            The resulting statements (sorted, distinct).
+        """
+        import numpy as np
+
+        entity_count = max(len(self._entities), 1)
+        relation_count = max(len(self._relations), 1)
+        if entity_count * entity_count * relation_count >= 2**63:
+            raise ValueError("The vocabularies are too large for int64 statement keys")
+
+        def pack(triples) -> "numpy.ndarray":
+            triples = np.asarray(triples, dtype=np.int64).reshape(-1, 3)
+            return (
+                triples[:, 0] * relation_count + triples[:, 1]
+            ) * entity_count + triples[:, 2]
+
+        keys = np.unique(pack(base))
+        if deltas:
+            # sequence number of every operation: removals of a delta come after its additions
+            operations = np.concatenate(
+                [pack(delta[kind]) for delta in deltas for kind in ("added", "removed")]
+            )
+            sequence = np.concatenate(
+                [
+                    np.full(len(delta[kind]), 2 * i + j, dtype=np.int64)
+                    for i, delta in enumerate(deltas)
+                    for j, kind in enumerate(("added", "removed"))
+                ]
+            )
+            order = np.lexsort((sequence, operations))
+            operations = operations[order]
+            sequence = sequence[order]
+            # only the last operation on a statement counts
+            is_last = np.append(operations[1:] != operations[:-1], True)
+            operations = operations[is_last]
+            is_removed = sequence[is_last] % 2 == 1
+            keys = np.union1d(keys, operations[~is_removed])
+            keys = keys[~np.isin(keys, operations[is_removed])]
+        return np.stack(
+            [
+                keys // entity_count // relation_count,
+                keys // entity_count % relation_count,
+                keys % entity_count,
+            ],
+            axis=1,
+        ).astype(np.int32)
+
+    def _is_compaction_due(self) -> bool:
+        delta_sizes = sum(d["added"] + d["removed"] for d in self._meta["deltas"])
+        return (
+            len(self._meta["deltas"]) > self.max_deltas
+            or delta_sizes > self.compaction_ratio * self._meta["base_size"]
+        )
+
+    def _write_base(self, triples) -> None:
+        import numpy as np
+
+        file_name = f"base_{self._meta['generation']:08d}.npy"
+        np.save(os.path.join(self.directory, file_name), triples)
+        self._meta["base"] = file_name
+        self._meta["base_size"] = len(triples)
+        self._triples = triples
+        self._write_meta()
+
+    def _write_meta(self) -> None:
+        """Writes the meta file atomically. It commits the base and the deltas that it references."""
+        meta_file = os.path.join(self.directory, IncrementalFilterIndex._META_FILE)
+        temporary_file = meta_file + ".tmp"
+        with open(temporary_file, "w", encoding="utf-8") as f:
+            json.dump(self._meta, f)
+        os.replace(temporary_file, meta_file)
+
+    def _files(self) -> set:
+        """Get the base and delta files that are referenced by the meta data."""
+        files = {d["file"] for d in self._meta["deltas"]}
+        if self._meta["base"] is not None:
+            files.add(self._meta["base"])
+        return files
+
+    def _remove_files(self, file_names: Iterable[str]) -> None:
+        for file_name in file_names:
+            path = os.path.join(self.directory, file_name)
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def _read_vocabulary(self, file_name: str) -> List[str]:
+        path = os.path.join(self.directory, file_name)
+        if not os.path.isfile(path):
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return [line.rstrip("\n") for line in f]
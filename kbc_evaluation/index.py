@@ -0,0 +1,387 @@
+import logging
+import os
+from typing import Dict, Iterator, List, Tuple, Union
+
+from kbc_evaluation.dataset import ParsedSet
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionIndex:
+    """Sidecar byte-offset index for a prediction file.
+
+    The index records the byte offset of every record (truth line, heads line, tails line) of a prediction file.
+    Records can then be read by truth triple or by relation without parsing the whole file. The index is persisted
+    next to the prediction file (suffix ``.idx``) in the following tab separated format:
+
+    - header: ``#kbc_index`` \\tab version \\tab file size \\tab file modification time (ns)
+    - one line per record: byte offset \\tab head \\tab relation \\tab tail
+    """
+
+    INDEX_SUFFIX = ".idx"
+    _HEADER = "#kbc_index"
+    _VERSION = "1"
+
+    def __init__(
+        self,
+        prediction_file: str,
+        offsets: List[int],
+        truths: List[Tuple[str, str, str]],
+    ):
+        """Constructor. Use PredictionIndex.build, PredictionIndex.load, or PredictionIndex.get to obtain an index.
+
+        Parameters
+        ----------
+        prediction_file : str
+            Path to the indexed prediction file.
+        offsets : List[int]
+            The byte offset of each record in file order.
+        truths : List[Tuple[str, str, str]]
+            The truth triple of each record in file order.
+        """
+        self.prediction_file = prediction_file
+        self._offsets = offsets
+        self._truths = truths
+        self._file = None
+
+        # key: truth triple, value: record numbers (in file order)
+        self._triple_records: Dict[Tuple[str, str, str], List[int]] = {}
+        # key: relation, value: record numbers (in file order)
+        self._relation_records: Dict[str, List[int]] = {}
+        for record_number, truth in enumerate(truths):
+            self._triple_records.setdefault(truth, []).append(record_number)
+            self._relation_records.setdefault(truth[1], []).append(record_number)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def default_index_file(prediction_file: str) -> str:
+        """Get the default location of the sidecar index for the given prediction file.
+
+        Parameters
+        ----------
+        prediction_file : str
+            Path to the prediction file.
+
+        Returns
+        -------
+        str
+            Path to the sidecar index file.
+        """
+        return prediction_file + PredictionIndex.INDEX_SUFFIX
+
+    @staticmethod
+    def build(
+        prediction_file: str, index_file: str = None, is_write_index: bool = True
+    ) -> "PredictionIndex":
+        """Scans the prediction file once and builds the index. Candidates are not parsed.
+
+        Parameters
+        ----------
+        prediction_file : str
+            Path to the prediction file.
+        index_file : str
+            Path to the index file that shall be written. If None, the default sidecar location is used.
+        is_write_index : bool
+            True if the index shall be persisted.
+
+        Returns
+        -------
+        PredictionIndex
+            The index.
+        """
+        logger.info(f"Building index for {prediction_file}")
+        offsets = []
+        truths = []
+        offset = 0
+        with open(prediction_file, "rb") as f:
+            while True:
+                truth = f.readline()
+                heads = f.readline()
+                tails = f.readline()
+                if not truth or not heads or not tails:
+                    break
+                tokens = truth.decode("utf-8").rstrip("\r\n").split(" ")
+                if len(tokens) != 3:
+                    logger.error(
+                        f"Problem indexing the following triple (offset {offset}): {tokens}"
+                    )
+                else:
+                    offsets.append(offset)
+                    truths.append((tokens[0], tokens[1], tokens[2]))
+                offset += len(truth) + len(heads) + len(tails)
+
+        index = PredictionIndex(
+            prediction_file=prediction_file, offsets=offsets, truths=truths
+        )
+        if is_write_index:
+            index.write(index_file)
+        return index
+
+    @staticmethod
+    def load(prediction_file: str, index_file: str = None) -> "PredictionIndex":
+        """Loads a persisted index.
+
+        Parameters
+        ----------
+        prediction_file : str
+            Path to the prediction file.
+        index_file : str
+            Path to the index file. If None, the default sidecar location is used.
+
+        Returns
+        -------
+        PredictionIndex
+            The index.
+
+        Raises
+        ------
+        ValueError
+            If the index file is not a valid index or if it is stale (the prediction file changed after indexing).
+        """
+        if index_file is None:
+            index_file = PredictionIndex.default_index_file(prediction_file)
+        offsets = []
+        truths = []
+        with open(index_file, "r", encoding="utf-8") as f:
+            header = f.readline().rstrip("\n").split("\t")
+            if (
+                len(header) != 4
+                or header[0] != PredictionIndex._HEADER
+                or header[1] != PredictionIndex._VERSION
+            ):
+                raise ValueError(f"Invalid index file: {index_file}")
+            if header[2:] != PredictionIndex._file_signature(prediction_file):
+                raise ValueError(
+                    f"The index {index_file} is stale: {prediction_file} changed after indexing."
+                )
+            for line in f:
+                tokens = line.rstrip("\n").split("\t")
+                offsets.append(int(tokens[0]))
+                truths.append((tokens[1], tokens[2], tokens[3]))
+        return PredictionIndex(
+            prediction_file=prediction_file, offsets=offsets, truths=truths
+        )
+
+    @staticmethod
+    def get(
+        prediction_file: str, index_file: str = None, is_write_index: bool = True
+    ) -> "PredictionIndex":
+        """Loads the index of the given prediction file. If there is no (up-to-date) index, it is built and, if
+        is_write_index, persisted. If the index cannot be persisted (e.g. read-only directory), it is only kept in
+        memory.
+
+        Parameters
+        ----------
+        prediction_file : str
+            Path to the prediction file.
+        index_file : str
+            Path to the index file. If None, the default sidecar location is used.
+        is_write_index : bool
+            True if a built index shall be persisted.
+
+        Returns
+        -------
+        PredictionIndex
+            The index.
+        """
+        if index_file is None:
+            index_file = PredictionIndex.default_index_file(prediction_file)
+        if os.path.isfile(index_file):
+            try:
+                return PredictionIndex.load(prediction_file, index_file)
+            except ValueError as e:
+                logger.info(f"Rebuilding index. Reason: {e}")
+        index = PredictionIndex.build(prediction_file, is_write_index=False)
+        if is_write_index:
+            try:
+                index.write(index_file)
+            except OSError as e:
+                logger.warning(
+                    f"Could not write the index {index_file} ({e}); using it in memory"
+                )
+        return index
+
+    def write(self, index_file: str = None) -> None:
+        """Persists the index.
+
+        Parameters
+        ----------
+        index_file : str
+            Path to the index file. If None, the default sidecar location is used.
+        """
+        if index_file is None:
+            index_file = PredictionIndex.default_index_file(self.prediction_file)
+        signature = PredictionIndex._file_signature(self.prediction_file)
+        with open(index_file, "w", encoding="utf-8") as f:
+            f.write(
+                "\t".join(
+                    [PredictionIndex._HEADER, PredictionIndex._VERSION] + signature
+                )
+                + "\n"
+            )
+            f.writelines(
+                f"{offset}\t{truth[0]}\t{truth[1]}\t{truth[2]}\n"
+                for offset, truth in zip(self._offsets, self._truths)
+            )
+
+    def truths(self) -> List[Tuple[str, str, str]]:
+        """Get the truth triples of all records in file order.
+
+        Returns
+        -------
+        List[Tuple[str, str, str]]
+            Truth triples (may contain duplicates if the prediction file contains duplicates).
+        """
+        return self._truths
+
+    def relations(self) -> List[str]:
+        """Get the relations that appear in the prediction file.
+
+        Returns
+        -------
+        List[str]
+            The distinct relations in order of first appearance.
+        """
+        return list(self._relation_records.keys())
+
+    def offset(self, record_number: int) -> int:
+        """Get the byte offset of the given record.
+
+        Parameters
+        ----------
+        record_number : int
+            The position of the record in the file (starting at 0).
+
+        Returns
+        -------
+        int
+            Byte offset of the truth line of the record.
+        """
+        return self._offsets[record_number]
+
+    def records_for_triple(self, triple: Tuple[str, str, str]) -> List[int]:
+        """Get the record numbers of the given truth triple.
+
+        Parameters
+        ----------
+        triple : Tuple[str, str, str]
+            The truth triple.
+
+        Returns
+        -------
+        List[int]
+            Record numbers in file order. Empty if the triple is not contained.
+        """
+        return self._triple_records.get(tuple(triple), [])
+
+    def records_for_relation(self, relation: str) -> List[int]:
+        """Get the record numbers of all truth triples with the given relation.
+
+        Parameters
+        ----------
+        relation : str
+            The relation.
+
+        Returns
+        -------
+        List[int]
+            Record numbers in file order. Empty if the relation is not contained.
+        """
+        return self._relation_records.get(relation, [])
+
+    def read_record(
+        self, record_number: int
+    ) -> Tuple[Tuple[str, str, str], Tuple[List[str], List[str]]]:
+        """Seeks to the given record and parses it.
+
+        Parameters
+        ----------
+        record_number : int
+            The position of the record in the file (starting at 0).
+
+        Returns
+        -------
+        Tuple[Tuple[str, str, str], Tuple[List[str], List[str]]]
+            [0] The truth triple.
+            [1] The head predictions and the tail predictions (unfiltered, like in ParsedSet.triple_predictions).
+        """
+        if self._file is None:
+            self._file = open(self.prediction_file, "rb")
+        self._file.seek(self._offsets[record_number])
+        truth, heads, tails = ParsedSet.parse_record(
+            self._file.readline().decode("utf-8"),
+            self._file.readline().decode("utf-8"),
+            self._file.readline().decode("utf-8"),
+        )
+        return (truth[0], truth[1], truth[2]), (heads, tails)
+
+    def read_triple(
+        self, triple: Tuple[str, str, str]
+    ) -> Union[Tuple[List[str], List[str]], None]:
+        """Reads the predictions for the given truth triple. If the triple appears multiple times, the last record is
+        used (consistent with ParsedSet).
+
+        Parameters
+        ----------
+        triple : Tuple[str, str, str]
+            The truth triple.
+
+        Returns
+        -------
+        Union[Tuple[List[str], List[str]], None]
+            The head predictions and the tail predictions. None if the triple is not contained.
+        """
+        records = self.records_for_triple(triple)
+        if len(records) == 0:
+            return None
+        return self.read_record(records[-1])[1]
+
+    def read_relation(
+        self, relation: str
+    ) -> Iterator[Tuple[Tuple[str, str, str], Tuple[List[str], List[str]]]]:
+        """Reads all records of the given relation.
+
+        Parameters
+        ----------
+        relation : str
+            The relation.
+
+        Returns
+        -------
+        Iterator[Tuple[Tuple[str, str, str], Tuple[List[str], List[str]]]]
+            Truth triple and (head predictions, tail predictions) for each record in file order.
+        """
+        for record_number in self.records_for_relation(relation):
+            yield self.read_record(record_number)
+
+    def close(self) -> None:
+        """Closes the underlying prediction file handle (if any was opened)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def _file_signature(prediction_file: str) -> List[str]:
+        """Get the values that are used to detect stale indices.
+
+        Parameters
+        ----------
+        prediction_file : str
+            Path to the prediction file.
+
+        Returns
+        -------
+        List[str]
+            [0] File size in bytes.
+            [1] Modification time in nanoseconds.
+        """
+        stat = os.stat(prediction_file)
+        return [str(stat.st_size), str(stat.st_mtime_ns)]
@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, Union
+
+logger = logging.getLogger(__name__)
+
+
+class _Stage:
+    """Context manager that measures one execution of a stage."""
+
+    __slots__ = ("_name", "_start")
+
+    def __init__(self, name: str):
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        Instrumentation.record(self._name, time.perf_counter() - self._start)
+
+
+class _NullStage:
+    """Context manager that does nothing (used while instrumentation is disabled)."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Instrumentation:
+    """Process-wide timing and counter instrumentation of the evaluation stages.
+
+    Instrumentation is disabled by default. While disabled, stage() returns a shared no-op context manager and
+    count() returns immediately, i.e., the overhead is a function call per stage (not per record or candidate).
+
+    Stage names used within the package:
+        parse, parse.tokenize, filtering, filtering.index, mean_rank, hits_at, calculate_results
+
+    Counter names used within the package (prefixed with the stage):
+        parse.bytes_read, parse.records, parse.candidates,
+        filtering.records, filtering.candidates_scanned, filtering.filtered_out
+    """
+
+    enabled = False
+    _lock = threading.Lock()
+    # key: stage name, value: [number of calls, total seconds]
+    _stages: Dict[str, list] = {}
+    # key: counter name, value: counter value
+    _counters: Dict[str, int] = {}
+    _peak_rss_bytes = 0
+
+    @staticmethod
+    def enable(is_reset: bool = True) -> None:
+        """Enables the instrumentation.
+
+        Parameters
+        ----------
+        is_reset : bool
+            True if previously collected measurements shall be discarded.
+        """
+        if is_reset:
+            Instrumentation.reset()
+        Instrumentation.enabled = True
+
+    @staticmethod
+    def disable() -> None:
+        """Disables the instrumentation. Collected measurements are kept."""
+        Instrumentation.enabled = False
+
+    @staticmethod
+    def reset() -> None:
+        """Discards all measurements."""
+        with Instrumentation._lock:
+            Instrumentation._stages = {}
+            Instrumentation._counters = {}
+            Instrumentation._peak_rss_bytes = 0
+
+    @staticmethod
+    def stage(name: str):
+        """Get a context manager that measures the runtime of the enclosed block.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+
+        Returns
+        -------
+            Context manager.
+        """
+        if not Instrumentation.enabled:
+            return _NULL_STAGE
+        return _Stage(name)
+
+    @staticmethod
+    def record(name: str, seconds: float, calls: int = 1) -> None:
+        """Records the runtime of a stage (use this in hot loops where a context manager per iteration is too
+        expensive: accumulate locally and record once).
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+        seconds : float
+            The runtime in seconds.
+        calls : int
+            The number of executions that are covered by seconds.
+        """
+        if not Instrumentation.enabled:
+            return
+        peak_rss_bytes = Instrumentation._current_peak_rss_bytes()
+        with Instrumentation._lock:
+            statistics = Instrumentation._stages.setdefault(name, [0, 0.0])
+            statistics[0] += calls
+            statistics[1] += seconds
+            Instrumentation._peak_rss_bytes = max(
+                Instrumentation._peak_rss_bytes, peak_rss_bytes
+            )
+
+    @staticmethod
+    def count(name: str, value: int = 1) -> None:
+        """Increments a counter.
+
+        Parameters
+        ----------
+        name : str
+            The name of the counter (convention: <stage>.<counter>).
+        value : int
+            The increment.
+        """
+        if not Instrumentation.enabled:
+            return
+        with Instrumentation._lock:
+            Instrumentation._counters[name] = (
+                Instrumentation._counters.get(name, 0) + value
+            )
+
+    @staticmethod
+    def snapshot() -> Dict:
+        """Get the current measurements.
+
+        Returns
+        -------
+        Dict
+            "stages": per stage the number of calls, the total seconds, and - if the stage has a "<stage>.records"
+            or "<stage>.bytes_read" counter - the throughput per second;
+            "counters": all counters;
+            "peak_rss_bytes": peak resident set size of the process observed at the end of a stage (None if not
+            available on this platform).
+        """
+        with Instrumentation._lock:
+            stages = {}
+            for name, (calls, seconds) in Instrumentation._stages.items():
+                stage = {"calls": calls, "seconds": seconds}
+                for counter in ("records", "bytes_read"):
+                    value = Instrumentation._counters.get(f"{name}.{counter}")
+                    if value is not None and seconds > 0:
+                        stage[f"{counter}_per_second"] = value / seconds
+                stages[name] = stage
+            return {
+                "stages": stages,
+                "counters": dict(Instrumentation._counters),
+                "peak_rss_bytes": Instrumentation._peak_rss_bytes or None,
+            }
+
+    @staticmethod
+    def export_json(file_to_write: str) -> None:
+        """Writes the current measurements as JSON.
+
+        Parameters
+        ----------
+        file_to_write : str
+            The file that shall be written.
+        """
+        Instrumentation._write_atomically(
+            file_to_write, json.dumps(Instrumentation.snapshot(), indent=2)
+        )
+
+    @staticmethod
+    def export_prometheus(file_to_write: str) -> None:
+        """Writes the current measurements in the Prometheus text exposition format (e.g. for the node exporter
+        textfile collector). The file is replaced atomically.
+
+        Parameters
+        ----------
+        file_to_write : str
+            The file that shall be written (should end with .prom for the textfile collector).
+        """
+        snapshot = Instrumentation.snapshot()
+        lines = [
+            "# HELP kbc_evaluation_stage_seconds_total Total runtime of an evaluation stage.",
+            "# TYPE kbc_evaluation_stage_seconds_total counter",
+        ]
+        for name, stage in snapshot["stages"].items():
+            lines.append(
+                f'kbc_evaluation_stage_seconds_total{{stage="{name}"}} {stage["seconds"]}'
+            )
+        lines += [
+            "# HELP kbc_evaluation_stage_calls_total Number of executions of an evaluation stage.",
+            "# TYPE kbc_evaluation_stage_calls_total counter",
+        ]
+        for name, stage in snapshot["stages"].items():
+            lines.append(
+                f'kbc_evaluation_stage_calls_total{{stage="{name}"}} {stage["calls"]}'
+            )
+        lines += [
+            "# HELP kbc_evaluation_count_total Counters of the evaluation stages.",
+            "# TYPE kbc_evaluation_count_total counter",
+        ]
+        for name, value in snapshot["counters"].items():
+            stage, _, counter = name.rpartition(".")
+            lines.append(
+                f'kbc_evaluation_count_total{{stage="{stage}",counter="{counter}"}} {value}'
+            )
+        if snapshot["peak_rss_bytes"] is not None:
+            lines += [
+                "# HELP kbc_evaluation_peak_rss_bytes Peak resident set size of the process.",
+                "# TYPE kbc_evaluation_peak_rss_bytes gauge",
+                f"kbc_evaluation_peak_rss_bytes {snapshot['peak_rss_bytes']}",
+            ]
+        Instrumentation._write_atomically(file_to_write, "\n".join(lines) + "\n")
+
+    @staticmethod
+    def profile(file_to_write: str = None):
+        """Get a context manager that profiles the enclosed block with cProfile. This is independent of enable().
+
+        Parameters
+        ----------
+        file_to_write : str
+            If given, the profile is written to this file (pstats format, readable with pstats or snakeviz).
+            Else the 30 most expensive functions (cumulative) are logged.
+
+        Returns
+        -------
+            Context manager.
+        """
+        return _Profile(file_to_write)
+
+    @staticmethod
+    def _current_peak_rss_bytes() -> int:
+        try:
+            import resource
+        except ImportError:
+            # not available on Windows
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS reports bytes, Linux reports kilobytes
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    @staticmethod
+    def _write_atomically(file_to_write: str, content: str) -> None:
+        temporary_file = file_to_write + ".tmp"
+        with open(temporary_file, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(temporary_file, file_to_write)
+
+
+class _Profile:
+    """Context manager wrapping cProfile."""
+
+    def __init__(self, file_to_write: Union[str, None]):
+        self._file_to_write = file_to_write
+        self.profiler = None
+
+    def __enter__(self):
+        import cProfile
+
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profiler.disable()
+        if self._file_to_write is not None:
+            self.profiler.dump_stats(self._file_to_write)
+        else:
+            import io
+            import pstats
+
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats(
+                "cumulative"
+            ).print_stats(30)
+            logger.info(stream.getvalue())
@@ -0,0 +1,208 @@
+import logging
+from typing import Dict, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# IDs (entities and relations) are smaller than 2 ** 31 (int32), so that two IDs can be packed into one int64 key
+_SHIFT = 31
+
+
+class FilterKernel:
+    """Vectorized filtered ranking of batches of prediction tasks with integer candidate IDs (e.g. the arg-sorted
+    score matrix of a model, see PredictionWriter).
+
+    The true statements are held as two sorted int64 arrays per direction: the keys of the tasks ((head, relation)
+    for tail prediction, (relation, tail) for head prediction) and the keys (task index, correct entity) of their
+    correct entities. Whether a candidate is a known true entity is, hence, a vectorized binary search
+    (numpy.searchsorted) for a whole batch. The raw rank is the position of the gold entity, the filtered rank
+    subtracts the true entities ranked before it (this is the same result as removing the correct entities but the
+    gold entity from the candidate lists, as ParsedSet does, and looking up the gold entity afterwards).
+    """
+
+    def __init__(self, triples=None):
+        """Constructor.
+
+        Parameters
+        ----------
+        triples
+            Array of shape (n, 3) with the IDs (head, relation, tail) of the true statements.
+        """
+        import numpy as np
+
+        self._triples = np.zeros((0, 3), dtype=np.int64)
+        # key: direction, value: (sorted task keys, sorted member keys)
+        self._keys = {}
+        if triples is not None:
+            self.add(triples)
+
+    @staticmethod
+    def from_data_set(data_set) -> "FilterKernel":
+        """Builds the kernel from the training, validation, and test split of the given dataset. The IDs are the
+        ones of the TripleStore of the dataset.
+
+        Parameters
+        ----------
+        data_set
+            DataSet or CustomDataSet.
+
+        Returns
+        -------
+        FilterKernel
+            The kernel.
+        """
+        import numpy as np
+
+        store = data_set.triple_store()
+        return FilterKernel(
+            np.concatenate([store.split(split) for split in ("train", "valid", "test")])
+        )
+
+    def add(self, triples) -> None:
+        """Adds true statements (e.g. the truths of a prediction file that are not part of the dataset).
+
+        Parameters
+        ----------
+        triples
+            Array of shape (n, 3) with the IDs (head, relation, tail) of the true statements.
+        """
+        import numpy as np
+
+        triples = np.asarray(triples, dtype=np.int64).reshape(-1, 3)
+        self._triples = np.concatenate([self._triples, triples])
+        self._keys = {}
+        for direction, anchor, member in (("heads", 2, 0), ("tails", 0, 2)):
+            task_keys = (self._triples[:, anchor] << _SHIFT) | self._triples[:, 1]
+            unique_task_keys, task_indices = np.unique(task_keys, return_inverse=True)
+            member_keys = np.unique(
+                (task_indices.astype(np.int64) << _SHIFT) | self._triples[:, member]
+            )
+            self._keys[direction] = (unique_task_keys, member_keys)
+
+    def rank_batch(
+        self, direction: str, anchors, relations, gold, candidates
+    ) -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+        """Calculates the raw and the filtered ranks of a batch of prediction tasks of one direction.
+
+        Parameters
+        ----------
+        direction : str
+            "heads" (anchors are the tails) or "tails" (anchors are the heads).
+        anchors
+            Array of shape (b,): the given entity of every task.
+        relations
+            Array of shape (b,): the relation of every task.
+        gold
+            Array of shape (b,): the correct entity of every task.
+        candidates
+            Array of shape (b, k): the ranked candidate IDs of every task; negative IDs are padding.
+
+        Returns
+        -------
+        Tuple[numpy.ndarray, numpy.ndarray]
+            Raw and filtered ranks (first position is 1; 0 if the gold entity is not a candidate).
+        """
+        import numpy as np
+
+        candidates = np.asarray(candidates, dtype=np.int64)
+        gold = np.asarray(gold, dtype=np.int64)
+        task_keys, member_keys = self._keys.get(direction, (None, None))
+        if task_keys is None:
+            if direction not in ("heads", "tails"):
+                raise ValueError(f"Invalid direction: {direction}")
+            task_keys = member_keys = np.zeros(0, dtype=np.int64)
+
+        if candidates.shape[1] == 0:
+            not_found = np.zeros(len(gold), dtype=np.int64)
+            return not_found, not_found.copy()
+        is_gold = candidates == gold[:, None]
+        is_found = is_gold.any(axis=1)
+        position = np.argmax(is_gold, axis=1)
+        raw = np.where(is_found, position + 1, 0)
+        if len(task_keys) == 0:
+            return raw, raw.copy()
+
+        keys = (np.asarray(anchors, dtype=np.int64) << _SHIFT) | np.asarray(
+            relations, dtype=np.int64
+        )
+        task_index = np.searchsorted(task_keys, keys)
+        is_task_known = task_keys[np.minimum(task_index, len(task_keys) - 1)] == keys
+        candidate_keys = (task_index[:, None] << _SHIFT) | np.maximum(candidates, 0)
+        member_index = np.searchsorted(member_keys, candidate_keys)
+        is_true = (
+            member_keys[np.minimum(member_index, len(member_keys) - 1)]
+            == candidate_keys
+        )
+        # only true entities before the (first occurrence of the) gold entity change the rank
+        is_true &= is_task_known[:, None] & (candidates >= 0)
+        is_true &= np.arange(candidates.shape[1])[None, :] < position[:, None]
+        filtered = np.where(is_found, raw - is_true.sum(axis=1), 0)
+        return raw, filtered
+
+    def ranks(
+        self,
+        triples,
+        head_candidates: Union["numpy.ndarray", Sequence],
+        tail_candidates: Union["numpy.ndarray", Sequence],
+        batch_size: int = 4096,
+    ) -> Dict[str, "numpy.ndarray"]:
+        """Calculates the raw and the filtered ranks of the head and the tail prediction of every triple.
+
+        Parameters
+        ----------
+        triples
+            Array of shape (n, 3) with the IDs of the truths.
+        head_candidates : Union[numpy.ndarray, Sequence]
+            Array of shape (n, k) (negative IDs are padding) or sequence of n one-dimensional arrays of any length.
+        tail_candidates : Union[numpy.ndarray, Sequence]
+            Like head_candidates.
+        batch_size : int
+            Number of tasks per vectorized batch. The temporary memory is about 40 bytes per candidate of a batch.
+
+        Returns
+        -------
+        Dict[str, numpy.ndarray]
+            raw_head_rank, raw_tail_rank, filtered_head_rank, filtered_tail_rank (int32; 0 if the gold entity is not
+            a candidate); the columns of a RankDump.
+        """
+        import numpy as np
+
+        triples = np.asarray(triples, dtype=np.int64).reshape(-1, 3)
+        result = {
+            name: np.zeros(len(triples), dtype=np.int32)
+            for name in (
+                "raw_head_rank",
+                "raw_tail_rank",
+                "filtered_head_rank",
+                "filtered_tail_rank",
+            )
+        }
+        for direction, candidates, anchor, gold in (
+            ("head", head_candidates, 2, 0),
+            ("tail", tail_candidates, 0, 2),
+        ):
+            for start in range(0, len(triples), batch_size):
+                end = min(start + batch_size, len(triples))
+                batch = triples[start:end]
+                raw, filtered = self.rank_batch(
+                    direction + "s",
+                    batch[:, anchor],
+                    batch[:, 1],
+                    batch[:, gold],
+                    FilterKernel._pad(candidates[start:end]),
+                )
+                result[f"raw_{direction}_rank"][start:end] = raw
+                result[f"filtered_{direction}_rank"][start:end] = filtered
+        return result
+
+    @staticmethod
+    def _pad(candidates) -> "numpy.ndarray":
+        """Get the candidate lists of a batch as two-dimensional array (shorter lists are padded with -1)."""
+        import numpy as np
+
+        if isinstance(candidates, np.ndarray) and candidates.ndim == 2:
+            return candidates
+        width = max((len(c) for c in candidates), default=0)
+        padded = np.full((len(candidates), width), -1, dtype=np.int64)
+        for i, c in enumerate(candidates):
+            padded[i, : len(c)] = c
+        return padded
@@ -0,0 +1,199 @@
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LeakageAnalysis:
+    """Test leakage through the training set (Toutanova and Chen, "Observed versus latent features for knowledge
+    base and text inference"; Dettmers et al., "Convolutional 2D Knowledge Graph Embeddings").
+
+    A test triple (h, r, t) is
+    - a duplicate if the entity pair is connected in the same direction in the training set: (h, r', t) for any
+      relation r' (including r itself);
+    - an inverse if the entity pair is connected in reverse direction in the training set: (t, r', h) for any r'.
+    Such triples can be predicted by memorizing the training set instead of generalizing.
+
+    The training split is indexed once as sorted int64 keys of its entity pairs; the test triples are looked up
+    with vectorized binary searches (numpy.searchsorted) on the integer representation of the dataset (see
+    TripleStore), so an analysis of FB15k takes well below a second.
+    """
+
+    def __init__(self, data_set, split: str = "train"):
+        """Constructor.
+
+        Parameters
+        ----------
+        data_set
+            DataSet or CustomDataSet.
+        split : str
+            The split in which leaking patterns are searched.
+        """
+        import numpy as np
+
+        self._store = data_set.triple_store()
+        self._entity_count = max(len(self._store.entities()), 1)
+        self._triples = np.asarray(self._store.split(split), dtype=np.int64)
+        # sorted keys of the entity pairs (head, tail)
+        self._pairs = np.unique(
+            self._pair_keys(self._triples[:, 0], self._triples[:, 2])
+        )
+
+    def flags(self, triples) -> Dict[str, "numpy.ndarray"]:
+        """Get the leakage flags of triples.
+
+        Parameters
+        ----------
+        triples
+            Array of shape (n, 3) with the IDs of the triples (negative IDs: unknown concepts, never leaky).
+
+        Returns
+        -------
+        Dict[str, numpy.ndarray]
+            Boolean arrays (one value per triple): "duplicate", "inverse", and "leaky" (duplicate or inverse).
+        """
+        import numpy as np
+
+        triples = np.asarray(triples, dtype=np.int64).reshape(-1, 3)
+        is_known = (triples[:, 0] >= 0) & (triples[:, 2] >= 0)
+        duplicate = self._contains(self._pair_keys(triples[:, 0], triples[:, 2]))
+        inverse = self._contains(self._pair_keys(triples[:, 2], triples[:, 0]))
+        duplicate &= is_known
+        inverse &= is_known
+        return {
+            "duplicate": duplicate,
+            "inverse": inverse,
+            "leaky": duplicate | inverse,
+        }
+
+    def split_flags(self, split: str = "test") -> Dict[str, "numpy.ndarray"]:
+        """Get the leakage flags of the triples of a split (see flags).
+
+        Parameters
+        ----------
+        split : str
+            "valid" or "test".
+
+        Returns
+        -------
+        Dict[str, numpy.ndarray]
+            One value per triple of the split (in the order of the split).
+        """
+        return self.flags(self._store.split(split))
+
+    def dump_flags(self, dump) -> Dict[str, "numpy.ndarray"]:
+        """Get the leakage flags of the truths of a rank dump. Only the label vocabularies of the dump are mapped to
+        the IDs of the dataset; the triples are translated with array indexing.
+
+        Parameters
+        ----------
+        dump : RankDump
+            The rank dump.
+
+        Returns
+        -------
+        Dict[str, numpy.ndarray]
+            One value per triple of the dump (see flags).
+        """
+        import numpy as np
+
+        entity_ids = LeakageAnalysis._vocabulary_ids(
+            dump.entities, self._store.entity_ids()
+        )
+        relation_ids = LeakageAnalysis._vocabulary_ids(
+            dump.relations, self._store.relation_ids()
+        )
+        triples = np.stack(
+            [
+                entity_ids[dump.columns["head"]],
+                relation_ids[dump.columns["relation"]],
+                entity_ids[dump.columns["tail"]],
+            ],
+            axis=1,
+        )
+        return self.flags(triples)
+
+    def relation_patterns(
+        self, threshold: float = 0.8
+    ) -> Dict[str, List[Tuple[str, str, float]]]:
+        """Finds relation pairs of the split that (almost) always connect the same entity pairs.
+
+        Parameters
+        ----------
+        threshold : float
+            Minimal share of the entity pairs of relation r that are also connected by relation r'.
+
+        Returns
+        -------
+        Dict[str, List[Tuple[str, str, float]]]
+            "duplicate": (r, r', share) with (h, r, t) => (h, r', t), r != r';
+            "inverse": (r, r', share) with (h, r, t) => (t, r', h) (r == r' for symmetric relations).
+            Sorted by descending share.
+        """
+        import numpy as np
+
+        relations = self._store.relations()
+        # distinct (pair, relation) rows, sorted by pair
+        rows = np.unique(
+            np.stack(
+                [
+                    self._pair_keys(self._triples[:, 0], self._triples[:, 2]),
+                    self._triples[:, 1],
+                ],
+                axis=1,
+            ),
+            axis=0,
+        )
+        pair_counts = np.bincount(rows[:, 1], minlength=len(relations))
+        result = {}
+        for name, keys in (
+            ("duplicate", rows[:, 0]),
+            ("inverse", self._reverse(rows[:, 0])),
+        ):
+            # join every row with the rows of the same (duplicate) or reversed (inverse) pair
+            start = np.searchsorted(rows[:, 0], keys, side="left")
+            end = np.searchsorted(rows[:, 0], keys, side="right")
+            lengths = end - start
+            left = np.repeat(rows[:, 1], lengths)
+            offsets = np.repeat(start - np.cumsum(lengths) + lengths, lengths)
+            right = rows[offsets + np.arange(lengths.sum()), 1]
+            if name == "duplicate":
+                left, right = left[left != right], right[left != right]
+            pairs, counts = np.unique(left * len(relations) + right, return_counts=True)
+            shares = counts / pair_counts[pairs // len(relations)]
+            selected = np.flatnonzero(shares >= threshold)
+            result[name] = sorted(
+                (
+                    (
+                        relations[pairs[i] // len(relations)],
+                        relations[pairs[i] % len(relations)],
+                        float(shares[i]),
+                    )
+                    for i in selected
+                ),
+                key=lambda pattern: -pattern[2],
+            )
+        return result
+
+    def _pair_keys(self, heads, tails) -> "numpy.ndarray":
+        return heads * self._entity_count + tails
+
+    def _reverse(self, keys) -> "numpy.ndarray":
+        return (keys % self._entity_count) * self._entity_count + (
+            keys // self._entity_count
+        )
+
+    def _contains(self, keys) -> "numpy.ndarray":
+        import numpy as np
+
+        if len(self._pairs) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(self._pairs, keys), len(self._pairs) - 1)
+        return self._pairs[positions] == keys
+
+    @staticmethod
+    def _vocabulary_ids(labels, ids: Dict[str, int]) -> "numpy.ndarray":
+        """Get the IDs of the given labels (-1 for labels that are not in the dataset)."""
+        import numpy as np
+
+        return np.array([ids.get(str(label), -1) for label in labels], dtype=np.int64)
@@ -0,0 +1,354 @@
+import logging
+import mmap
+import os
+from typing import Iterable, Iterator, List, Tuple, Union
+
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.instrumentation import Instrumentation
+from kbc_evaluation.streaming import RankAccumulator
+
+logger = logging.getLogger(__name__)
+
+_HEADS_PREFIX = b"\tHeads: "
+_TAILS_PREFIX = b"\tTails: "
+
+_SPACE = 32
+_UNDERSCORE = 95
+_OPENING_BRACE = 123
+
+
+def find_concept(
+    line, line_start: int, line_end: int, concept: bytes, search_from: int = None
+) -> int:
+    """Get the position of the first occurrence of the concept as a whole candidate of a predictions line. A
+    candidate ends at a space, at a confidence suffix ("_{"), or at the end of the line.
+
+    Parameters
+    ----------
+    line
+        Bytes-like object (bytes, bytearray) holding the line.
+    line_start : int
+        Offset of the first candidate (behind the prefix).
+    line_end : int
+        Offset of the end of the line (without line break).
+    concept : bytes
+        The concept.
+    search_from : int
+        Offset from which the search starts (default: line_start).
+
+    Returns
+    -------
+    int
+        The offset of the concept. -1 if the concept is not a candidate.
+    """
+    position = line.find(
+        concept, line_start if search_from is None else search_from, line_end
+    )
+    while position >= 0:
+        end = position + len(concept)
+        if (position == line_start or line[position - 1] == _SPACE) and (
+            end == line_end
+            or line[end] == _SPACE
+            or (
+                line[end] == _UNDERSCORE
+                and end + 1 < line_end
+                and line[end + 1] == _OPENING_BRACE
+            )
+        ):
+            return position
+        position = line.find(concept, position + 1, line_end)
+    return -1
+
+
+def count_concepts(
+    line, line_start: int, line_end: int, concepts: Iterable[bytes], limit: int
+) -> int:
+    """Counts the candidates before the offset limit that are one of the given concepts (duplicates are counted
+    multiple times). Every concept costs one scan of the line up to the limit; no candidate is materialized.
+
+    Parameters
+    ----------
+    line
+        Bytes-like object (bytes, bytearray) holding the line.
+    line_start : int
+        Offset of the first candidate (behind the prefix).
+    line_end : int
+        Offset of the end of the line (without line break).
+    concepts : Iterable[bytes]
+        The concepts to be counted.
+    limit : int
+        Only candidates that end before this offset are counted.
+
+    Returns
+    -------
+    int
+        The number of candidates.
+    """
+    count = 0
+    for concept in concepts:
+        position = line.find(concept, line_start, limit)
+        if position < 0:
+            # fast path: most concepts of a filter set are not ranked before the gold concept
+            continue
+        position = find_concept(line, line_start, line_end, concept, position)
+        while 0 <= position and position + len(concept) <= limit:
+            count += 1
+            position = find_concept(
+                line, line_start, line_end, concept, position + len(concept)
+            )
+    return count
+
+
+class MappedEvaluationRunner:
+    """Evaluates a prediction file by scanning its bytes (an alternative engine to StreamingEvaluationRunner with
+    the same results).
+
+    The file is memory-mapped; record and line boundaries are located with a byte search on the mapping. Every
+    predictions line is copied into a reusable scratch buffer in which the gold concept is searched as a whole
+    candidate; the raw rank is the number of separators before it. The filtered rank subtracts the members of the
+    filter set (held as UTF-8 bytes, see FilterIndex.from_data_set) that occur before the gold concept. Candidates
+    are, hence, neither decoded nor split into objects: the memory allocated per record does not grow with the
+    number of candidates. Concepts are decoded to str only for log messages and for self.ranks.
+
+    If a filter set has more members than there are candidates before the gold concept, these candidates are split
+    instead (this bounds the work of a task by the smaller of both numbers).
+    """
+
+    def __init__(
+        self,
+        file_to_be_evaluated: str,
+        data_set: DataSet,
+        hits_at: Iterable[int] = (1, 3, 10),
+        filter_index: FilterIndex = None,
+        is_keep_ranks: bool = False,
+    ):
+        """Constructor.
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+            Path to the text file with the predicted links that shall be evaluated.
+        data_set : DataSet
+            The dataset for which predictions have been made.
+        hits_at : Iterable[int]
+            The n values for which hits@n is calculated.
+        filter_index : FilterIndex
+            Index of the true statements of the dataset with bytes concepts (FilterIndex.from_data_set with
+            is_bytes=True). If None, it is built from data_set. The index is not modified.
+        is_keep_ranks : bool
+            True if the ranks of every record shall be kept in self.ranks.
+        """
+        if file_to_be_evaluated is None or not os.path.isfile(file_to_be_evaluated):
+            raise Exception(
+                f"The specified file ({file_to_be_evaluated}) does not exist."
+            )
+        self.file_to_be_evaluated = file_to_be_evaluated
+        self.data_set = data_set
+        self.hits_at = sorted(set(hits_at))
+        self._filter_index = filter_index
+        self.is_keep_ranks = is_keep_ranks
+
+        # per record: see StreamingEvaluationRunner.ranks
+        self.ranks = []
+
+        self._scratch = bytearray(1 << 16)
+
+    def run(self) -> RankAccumulator:
+        """Runs the evaluation.
+
+        Returns
+        -------
+        RankAccumulator
+            The accumulated ranks.
+        """
+        accumulator = RankAccumulator(self.hits_at)
+        if os.path.getsize(self.file_to_be_evaluated) == 0:
+            return accumulator
+        if self._filter_index is None:
+            with Instrumentation.stage("filtering.index"):
+                self._filter_index = FilterIndex.from_data_set(
+                    self.data_set, is_bytes=True
+                )
+        with open(self.file_to_be_evaluated, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapping:
+            view = memoryview(mapping)
+            try:
+                self._evaluate(mapping, view, accumulator)
+            finally:
+                # the mapping cannot be closed while it is exported
+                view.release()
+        Instrumentation.count("mapped.records", accumulator.records)
+        return accumulator
+
+    def _evaluate(
+        self, mapping: mmap.mmap, view: memoryview, accumulator: RankAccumulator
+    ) -> None:
+        """Evaluates all records of the mapped file.
+
+        Parameters
+        ----------
+        mapping : mmap.mmap
+            The mapped file.
+        view : memoryview
+            View on the mapping (lines are copied from the view without intermediate bytes objects).
+        accumulator : RankAccumulator
+            The accumulator to which the ranks are added.
+        """
+        # truths of later records filter earlier records (like in ParsedSet)
+        filter_index = FilterIndex(parent=self._filter_index)
+        truths = []
+        for truth_start, truth_end, _, _, _, _ in self._records(mapping):
+            truth = mapping[truth_start:truth_end].split(b" ")
+            if len(truth) == 3:
+                filter_index.add(truth)
+            truths.append(truth)
+
+        with Instrumentation.stage("mapped"):
+            for truth, boundaries in zip(truths, self._records(mapping)):
+                ranks = self._evaluate_record(view, filter_index, truth, boundaries)
+                if ranks is None:
+                    continue
+                accumulator.add_record(*ranks)
+                if self.is_keep_ranks:
+                    self.ranks.append(MappedEvaluationRunner._decode(truth) + ranks)
+
+    def _evaluate_record(
+        self,
+        view: memoryview,
+        filter_index: FilterIndex,
+        truth: List[bytes],
+        boundaries: Tuple[int, int, int, int, int, int],
+    ) -> Union[list, None]:
+        """Calculates the ranks of a record.
+
+        Parameters
+        ----------
+        view : memoryview
+            View on the mapped file.
+        filter_index : FilterIndex
+            The filter index of the file (bytes concepts).
+        truth : List[bytes]
+            The split truth line.
+        boundaries : Tuple[int, int, int, int, int, int]
+            The line offsets of the record (see _records).
+
+        Returns
+        -------
+        Union[list, None]
+            [raw head rank, raw tail rank, filtered head rank, filtered tail rank]. None if the truth is invalid.
+        """
+        if len(truth) != 3:
+            logger.error(
+                f"Problem evaluating the following triple: {MappedEvaluationRunner._decode(truth)}"
+            )
+            return None
+        h, r, t = truth
+        raw_head, filtered_head = self._ranks(
+            view,
+            boundaries[2],
+            boundaries[3],
+            _HEADS_PREFIX,
+            h,
+            filter_index.correct_heads(r, t),
+        )
+        raw_tail, filtered_tail = self._ranks(
+            view,
+            boundaries[4],
+            boundaries[5],
+            _TAILS_PREFIX,
+            t,
+            filter_index.correct_tails(h, r),
+        )
+        return [raw_head, raw_tail, filtered_head, filtered_tail]
+
+    @staticmethod
+    def _records(mapping: mmap.mmap) -> Iterator[Tuple[int, int, int, int, int, int]]:
+        """Locates the records of the mapped file. Like BackgroundRecordReader, an incomplete last record is
+        skipped.
+
+        Returns
+        -------
+        Iterator[Tuple[int, int, int, int, int, int]]
+            Per record: start and end offsets (without line break, "\n" or "\r\n") of the truth, heads, and tails line.
+        """
+        size = len(mapping)
+        position = 0
+        boundaries = []
+        while position < size:
+            end = mapping.find(b"\n", position)
+            if end < 0:
+                end = size
+            boundaries.append(position)
+            # the end excludes the line break ("\n" or "\r\n")
+            if end > position and mapping[end - 1] == 13:
+                boundaries.append(end - 1)
+            else:
+                boundaries.append(end)
+            position = end + 1
+            if len(boundaries) == 6:
+                yield tuple(boundaries)
+                boundaries = []
+
+    def _ranks(
+        self,
+        view: memoryview,
+        start: int,
+        end: int,
+        prefix: bytes,
+        gold: bytes,
+        correct,
+    ) -> Tuple[Union[int, None], Union[int, None]]:
+        """Calculates the raw and the filtered rank of a predictions line (see streaming.calculate_ranks).
+
+        Parameters
+        ----------
+        view : memoryview
+            View on the mapped file.
+        start : int
+            Offset of the line.
+        end : int
+            Offset of the end of the line (without line break).
+        prefix : bytes
+            The expected prefix of the line including the leading tab.
+        gold : bytes
+            The correct concept.
+        correct
+            All correct concepts for the task (filter set of bytes).
+
+        Returns
+        -------
+        Tuple[Union[int, None], Union[int, None]]
+            The raw and the filtered rank. None if the gold concept is not contained.
+        """
+        length = end - start
+        if length > len(self._scratch):
+            self._scratch = bytearray(2 * length)
+        line = self._scratch
+        line[:length] = view[start:end]
+        if not line.startswith(prefix, 0, length):
+            logger.error(
+                f"Invalid {prefix.decode('utf-8').strip()[:-1].lower()} line: "
+                f"{bytes(line[:length]).decode('utf-8', 'replace')}"
+            )
+            return None, None
+        position = find_concept(line, len(prefix), length, gold)
+        if position < 0:
+            return None, None
+        before = line.count(b" ", len(prefix), position)
+        if len(correct) <= before:
+            filtered_out = count_concepts(line, len(prefix), length, correct, position)
+        else:
+            filtered_out = 0
+            for candidate in bytes(line[len(prefix) : position]).split(b" ")[:-1]:
+                suffix = candidate.find(b"_{")
+                if suffix >= 0:
+                    candidate = candidate[:suffix]
+                if candidate in correct:
+                    filtered_out += 1
+        return before + 1, before + 1 - filtered_out
+
+    @staticmethod
+    def _decode(truth: List[bytes]) -> List[str]:
+        return [part.decode("utf-8") for part in truth]
@@ -0,0 +1,335 @@
+import abc
+import logging
+import sys
+import threading
+import time
+from typing import List, Union
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressEvent:
+    """Progress of a stage (e.g. "parse" in bytes or "filtering" in records) at one point in time."""
+
+    __slots__ = ("stage", "unit", "done", "total", "records", "seconds", "is_finished")
+
+    def __init__(
+        self,
+        stage: str,
+        unit: str,
+        done: int,
+        total: Union[int, None],
+        records: int,
+        seconds: float,
+        is_finished: bool = False,
+    ):
+        """Constructor.
+
+        Parameters
+        ----------
+        stage : str
+            The name of the stage (the stage names of Instrumentation).
+        unit : str
+            Unit of done and total: "bytes" or "records".
+        done : int
+            Processed units.
+        total : Union[int, None]
+            Total units (None if unknown).
+        records : int
+            Processed records.
+        seconds : float
+            Seconds since the start of the stage.
+        is_finished : bool
+            True for the last event of the stage.
+        """
+        self.stage = stage
+        self.unit = unit
+        self.done = done
+        self.total = total
+        self.records = records
+        self.seconds = seconds
+        self.is_finished = is_finished
+
+    @property
+    def rate(self) -> float:
+        """Processed units per second."""
+        return self.done / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        """Processed records per second."""
+        return self.records / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Union[float, None]:
+        """Estimated seconds until the stage is finished (None if the total or the rate is unknown)."""
+        if self.total is None or self.done <= 0 or self.seconds <= 0:
+            return None
+        return max(self.total - self.done, 0) / self.rate
+
+    def __repr__(self) -> str:
+        return (
+            f"ProgressEvent({self.stage}: {self.done}/{self.total} {self.unit}, {self.records} records, "
+            f"{self.seconds:.2f} s)"
+        )
+
+
+class ProgressCallback(abc.ABC):
+    """Receiver of progress events. Subclass this (or pass any callable taking a ProgressEvent) to forward the
+    progress to a training framework, e.g. to its logger or dashboard.
+    """
+
+    @abc.abstractmethod
+    def __call__(self, event: ProgressEvent) -> None:
+        """Receives an event. Called at most 1 / Progress.interval times per second and stage, and once with
+        event.is_finished when the stage ends.
+
+        Parameters
+        ----------
+        event : ProgressEvent
+            The event.
+        """
+
+
+class LoggingProgress(ProgressCallback):
+    """Logs the progress (level INFO), e.g. for batch jobs whose output is not a terminal."""
+
+    def __init__(self, interval: float = 10.0):
+        """Constructor.
+
+        Parameters
+        ----------
+        interval : float
+            Minimal number of seconds between two log messages of a stage (the end of a stage is always logged).
+        """
+        self.interval = interval
+        # key: stage name, value: seconds of the last logged event
+        self._logged = {}
+
+    def __call__(self, event: ProgressEvent) -> None:
+        last = self._logged.get(event.stage)
+        if (
+            not event.is_finished
+            and last is not None
+            and last <= event.seconds < last + self.interval
+        ):
+            return
+        self._logged[event.stage] = event.seconds
+        percent = (
+            f"{100.0 * event.done / event.total:.1f}% "
+            if event.total
+            else f"{event.done} {event.unit} "
+        )
+        eta = event.eta_seconds
+        logger.info(
+            f"{event.stage}: {percent}({event.records} records, {event.records_per_second:.0f} records/s"
+            + ("" if eta is None or event.is_finished else f", ETA {eta:.0f} s")
+            + ")"
+        )
+
+
+class TqdmProgress(ProgressCallback):
+    """Shows one tqdm progress bar per stage on stderr (requires tqdm)."""
+
+    def __init__(self):
+        # key: stage name, value: tqdm bar
+        self._bars = {}
+
+    def __call__(self, event: ProgressEvent) -> None:
+        from tqdm import tqdm
+
+        bar = self._bars.get(event.stage)
+        if bar is None:
+            bar = tqdm(
+                desc=event.stage,
+                total=event.total,
+                unit="B" if event.unit == "bytes" else " records",
+                unit_scale=event.unit == "bytes",
+                file=sys.stderr,
+                leave=False,
+            )
+            self._bars[event.stage] = bar
+        bar.update(event.done - bar.n)
+        bar.set_postfix(records_per_second=f"{event.records_per_second:.0f}")
+        if event.is_finished:
+            bar.close()
+            del self._bars[event.stage]
+
+
+class _Reporter:
+    """Reports the progress of one execution of a stage to the callbacks, throttled to Progress.interval."""
+
+    __slots__ = (
+        "_stage",
+        "_unit",
+        "_total",
+        "_callbacks",
+        "_start",
+        "_next",
+        "_done",
+        "_records",
+    )
+
+    is_active = True
+
+    def __init__(self, stage: str, total: Union[int, None], unit: str, callbacks: List):
+        self._stage = stage
+        self._unit = unit
+        self._total = total
+        self._callbacks = callbacks
+        self._start = 0.0
+        self._next = 0.0
+        self._done = 0
+        self._records = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self._next = self._start + Progress.interval
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._emit(time.perf_counter(), is_finished=True)
+
+    def update(self, done: int, records: int = None) -> None:
+        """Sets the progress. Cheap unless an event is due (one clock read).
+
+        Parameters
+        ----------
+        done : int
+            Processed units (absolute).
+        records : int
+            Processed records (absolute). If None, done is used (stages in records).
+        """
+        self._done = done
+        self._records = done if records is None else records
+        now = time.perf_counter()
+        if now >= self._next:
+            self._next = now + Progress.interval
+            self._emit(now)
+
+    def _emit(self, now: float, is_finished: bool = False) -> None:
+        event = ProgressEvent(
+            stage=self._stage,
+            unit=self._unit,
+            done=self._done,
+            total=self._total,
+            records=self._records,
+            seconds=now - self._start,
+            is_finished=is_finished,
+        )
+        for callback in self._callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                # progress reporting must never break an evaluation
+                logger.warning(f"Progress callback {callback} failed: {e}")
+
+
+class _NullReporter:
+    """Reporter that does nothing (used if there is no receiver)."""
+
+    __slots__ = ()
+
+    is_active = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def update(self, done: int, records: int = None) -> None:
+        pass
+
+
+_NULL_REPORTER = _NullReporter()
+
+
+class Progress:
+    """Process-wide progress reporting of the evaluation stages (parse, filtering, mean_rank, hits_at, streaming).
+
+    Registered callbacks receive ProgressEvents (processed bytes or records, total, records per second, ETA). The
+    events are throttled to one per interval seconds and stage, so the reporting does not slow down the hot loops.
+    Without registered callbacks, a tqdm bar is shown on stderr if stderr is a terminal (and tqdm is installed);
+    otherwise (e.g. batch jobs, CI logs) the evaluation is silent. Use LoggingProgress to log the progress instead.
+    """
+
+    # minimal number of seconds between two events of a stage
+    interval = 0.1
+
+    _lock = threading.Lock()
+    _callbacks: List = []
+    _default_callback = None
+
+    @staticmethod
+    def add_callback(callback) -> None:
+        """Registers a receiver of the progress events. This disables the default terminal output.
+
+        Parameters
+        ----------
+        callback
+            ProgressCallback or any callable that takes a ProgressEvent.
+        """
+        with Progress._lock:
+            Progress._callbacks = Progress._callbacks + [callback]
+
+    @staticmethod
+    def remove_callback(callback) -> None:
+        """Removes a registered receiver.
+
+        Parameters
+        ----------
+        callback
+            The receiver.
+        """
+        with Progress._lock:
+            Progress._callbacks = [c for c in Progress._callbacks if c is not callback]
+
+    @staticmethod
+    def clear_callbacks() -> None:
+        """Removes all registered receivers (the default terminal output is used again)."""
+        with Progress._lock:
+            Progress._callbacks = []
+
+    @staticmethod
+    def stage(name: str, total: int = None, unit: str = "records"):
+        """Get a context manager that reports the progress of a stage. Call update(done, records) on it.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+        total : int
+            Total units of the stage (None if unknown).
+        unit : str
+            "bytes" or "records".
+
+        Returns
+        -------
+            Context manager (with is_active False if nobody receives the progress).
+        """
+        callbacks = Progress._callbacks
+        if not callbacks:
+            callback = Progress._default()
+            if callback is None:
+                return _NULL_REPORTER
+            callbacks = [callback]
+        return _Reporter(name, total, unit, callbacks)
+
+    @staticmethod
+    def _default() -> Union[ProgressCallback, None]:
+        """Get the default receiver: a TqdmProgress if stderr is a terminal and tqdm is installed, else None."""
+        try:
+            is_terminal = sys.stderr.isatty()
+        except (AttributeError, ValueError):
+            # replaced or closed stream
+            is_terminal = False
+        if not is_terminal:
+            return None
+        if Progress._default_callback is None:
+            import importlib.util
+
+            if importlib.util.find_spec("tqdm") is None:
+                return None
+            Progress._default_callback = TqdmProgress()
+        return Progress._default_callback
@@ -0,0 +1,393 @@
+import logging
+from typing import Dict, Iterable, List, Union
+
+from kbc_evaluation.evaluator import EvaluationRunner, EvaluatorResult
+
+logger = logging.getLogger(__name__)
+
+_VERSION = 1
+
+# the rank columns (rank 0: the correct concept was not predicted)
+_RANK_COLUMNS = (
+    "raw_head_rank",
+    "raw_tail_rank",
+    "filtered_head_rank",
+    "filtered_tail_rank",
+)
+
+
+class RankDump:
+    """Columnar representation of the per-task ranks of an evaluation. Once the ranks are dumped, any metric (other
+    n for hits@n, single directions, subsets such as single relations) can be recomputed without parsing the
+    prediction file again.
+
+    Columns (one row per evaluated triple, NumPy arrays):
+    head, relation, tail: IDs of the truth triple (indices into entities/relations)
+    raw_head_rank, raw_tail_rank, filtered_head_rank, filtered_tail_rank: ranks; 0 if the concept was not predicted
+
+    The dump is stored as uncompressed .npz file (loaded in milliseconds) or optionally compressed.
+    """
+
+    def __init__(
+        self,
+        entities,
+        relations,
+        columns: Dict,
+        evaluated_file: str,
+        test_set_size: int,
+    ):
+        """Constructor. Use from_rows or load to create a dump.
+
+        Parameters
+        ----------
+        entities
+            Array of the entity labels.
+        relations
+            Array of the relation labels.
+        columns : Dict
+            Key: column name, value: array of the column.
+        evaluated_file : str
+            The evaluated file.
+        test_set_size : int
+            Test set size that is used for relative hits@n.
+        """
+        self.entities = entities
+        self.relations = relations
+        self.columns = columns
+        self.evaluated_file = evaluated_file
+        self.test_set_size = test_set_size
+
+    def __len__(self) -> int:
+        """Number of triples (two prediction tasks per triple)."""
+        return len(self.columns["head"])
+
+    @staticmethod
+    def from_rows(
+        rows: Iterable[list], evaluated_file: str, test_set_size: int
+    ) -> "RankDump":
+        """Creates a dump from rank rows as produced by StreamingEvaluationRunner (is_keep_ranks=True) or
+        ShardedEvaluation.merge_ranks.
+
+        Parameters
+        ----------
+        rows : Iterable[list]
+            Per triple: [head, relation, tail, raw head rank, raw tail rank, filtered head rank, filtered tail rank]
+            where ranks are None if the correct concept was not predicted.
+        evaluated_file : str
+            The evaluated file.
+        test_set_size : int
+            The size of the test set.
+
+        Returns
+        -------
+        RankDump
+            The dump.
+        """
+        import numpy
+
+        entity_ids = {}
+        relation_ids = {}
+        heads, relations, tails = [], [], []
+        ranks = [[] for _ in _RANK_COLUMNS]
+        for row in rows:
+            heads.append(entity_ids.setdefault(row[0], len(entity_ids)))
+            relations.append(relation_ids.setdefault(row[1], len(relation_ids)))
+            tails.append(entity_ids.setdefault(row[2], len(entity_ids)))
+            for column, rank in zip(ranks, row[3:7]):
+                column.append(0 if rank is None else rank)
+        columns = {
+            "head": numpy.array(heads, dtype=numpy.int32),
+            "relation": numpy.array(relations, dtype=numpy.int32),
+            "tail": numpy.array(tails, dtype=numpy.int32),
+        }
+        for name, column in zip(_RANK_COLUMNS, ranks):
+            columns[name] = numpy.array(column, dtype=numpy.int32)
+        return RankDump(
+            entities=numpy.array(list(entity_ids), dtype=str),
+            relations=numpy.array(list(relation_ids), dtype=str),
+            columns=columns,
+            evaluated_file=evaluated_file,
+            test_set_size=test_set_size,
+        )
+
+    def write(self, file_to_write: str, is_compressed: bool = False) -> None:
+        """Writes the dump as .npz file.
+
+        Parameters
+        ----------
+        file_to_write : str
+            The file that shall be written. NumPy appends ".npz" if the file name has another suffix.
+        is_compressed : bool
+            True for a compressed file (smaller, slower to load).
+        """
+        import numpy
+
+        save = numpy.savez_compressed if is_compressed else numpy.savez
+        save(
+            file_to_write,
+            version=numpy.array(_VERSION),
+            evaluated_file=numpy.array(self.evaluated_file),
+            test_set_size=numpy.array(self.test_set_size),
+            entities=self.entities,
+            relations=self.relations,
+            **self.columns,
+        )
+
+    @staticmethod
+    def load(file_to_read: str) -> "RankDump":
+        """Loads a dump.
+
+        Parameters
+        ----------
+        file_to_read : str
+            The .npz file.
+
+        Returns
+        -------
+        RankDump
+            The dump.
+        """
+        import numpy
+
+        with numpy.load(file_to_read, allow_pickle=False) as data:
+            if int(data["version"]) != _VERSION:
+                raise ValueError(
+                    f"Unsupported rank dump version: {int(data['version'])}"
+                )
+            columns = {
+                name: data[name]
+                for name in ("head", "relation", "tail") + _RANK_COLUMNS
+            }
+            return RankDump(
+                entities=data["entities"],
+                relations=data["relations"],
+                columns=columns,
+                evaluated_file=str(data["evaluated_file"]),
+                test_set_size=int(data["test_set_size"]),
+            )
+
+    def ranks(self, is_filtered: bool, direction: str = "heads"):
+        """Get a rank column.
+
+        Parameters
+        ----------
+        is_filtered : bool
+            True for filtered ranks, False for raw ranks.
+        direction : str
+            "heads" or "tails".
+
+        Returns
+        -------
+        numpy.ndarray
+            The ranks (0 if the correct concept was not predicted).
+        """
+        if direction not in ("heads", "tails"):
+            raise ValueError(f"Unknown direction: {direction}")
+        return self.columns[
+            f"{'filtered' if is_filtered else 'raw'}_{direction[:-1]}_rank"
+        ]
+
+    def select(self, mask=None, relations: Iterable[str] = None) -> "RankDump":
+        """Get the subset of the triples that fulfill the given conditions. The test set size of the subset is its
+        number of triples.
+
+        Parameters
+        ----------
+        mask
+            Boolean array (one value per triple).
+        relations : Iterable[str]
+            Relation labels; only triples with one of the relations are selected.
+
+        Returns
+        -------
+        RankDump
+            The subset (may be empty).
+        """
+        import numpy
+
+        selected = numpy.ones(len(self), dtype=bool)
+        if mask is not None:
+            selected &= numpy.asarray(mask, dtype=bool)
+        if relations is not None:
+            relation_ids = numpy.flatnonzero(
+                numpy.isin(self.relations, list(relations))
+            )
+            selected &= numpy.isin(self.columns["relation"], relation_ids)
+        return RankDump(
+            entities=self.entities,
+            relations=self.relations,
+            columns={name: column[selected] for name, column in self.columns.items()},
+            evaluated_file=self.evaluated_file,
+            test_set_size=int(selected.sum()),
+        )
+
+    def by_relation(self, n: int = 10) -> Dict[str, EvaluatorResult]:
+        """Calculates the results for every relation.
+
+        Parameters
+        ----------
+        n : int
+            Hits@n.
+
+        Returns
+        -------
+        Dict[str, EvaluatorResult]
+            Key: relation label, value: the result of the triples of the relation.
+        """
+        import numpy
+
+        return {
+            str(self.relations[relation_id]): self.select(
+                mask=self.columns["relation"] == relation_id
+            ).to_result(n)
+            for relation_id in numpy.unique(self.columns["relation"])
+        }
+
+    def by_degree(
+        self,
+        data_set,
+        quantiles: Iterable[float] = (0.25, 0.5, 0.75),
+        n: int = 10,
+        is_filtered: bool = True,
+    ) -> List[Dict]:
+        """Calculates the metrics per training degree bucket of the gold entities (see DegreeBuckets).
+
+        Parameters
+        ----------
+        data_set
+            The dataset (DataSet or CustomDataSet) of the evaluation.
+        quantiles : Iterable[float]
+            Quantiles of the gold degrees at which buckets are split.
+        n : int
+            Hits@n.
+        is_filtered : bool
+            True for filtered ranks, False for raw ranks.
+
+        Returns
+        -------
+        List[Dict]
+            See DegreeBuckets.evaluate.
+        """
+        from kbc_evaluation.degrees import DegreeBuckets
+
+        return DegreeBuckets(data_set, quantiles).evaluate(self, n, is_filtered)
+
+    def by_leakage(self, data_set, n: int = 10) -> Dict[str, EvaluatorResult]:
+        """Calculates the results of the triples that leak through the training set (duplicate or inverse entity
+        pair, see LeakageAnalysis) and of the remaining triples.
+
+        Parameters
+        ----------
+        data_set
+            The dataset (DataSet or CustomDataSet) of the evaluation.
+        n : int
+            Hits@n.
+
+        Returns
+        -------
+        Dict[str, EvaluatorResult]
+            "leaky" and "non_leaky". A subset without triples (e.g. "leaky" on a cleaned dataset such as FB15k-237)
+            has test_set_size 0 and all metrics 0.
+        """
+        is_leaky = data_set.leakage_analysis().dump_flags(self)["leaky"]
+        return {
+            "leaky": self.select(mask=is_leaky).to_result(n),
+            "non_leaky": self.select(mask=~is_leaky).to_result(n),
+        }
+
+    def hits_at(self, n: int, is_filtered: bool) -> List[int]:
+        """Calculates hits@n.
+
+        Parameters
+        ----------
+        n : int
+            Hits@n.
+        is_filtered : bool
+            True for filtered ranks, False for raw ranks.
+
+        Returns
+        -------
+        List[int]
+            Hits at n for heads, tails, and both.
+        """
+        result = []
+        for direction in ("heads", "tails"):
+            ranks = self.ranks(is_filtered, direction)
+            result.append(int(((ranks > 0) & (ranks <= n)).sum()))
+        result.append(result[0] + result[1])
+        return result
+
+    def mean_rank(self, is_filtered: bool) -> tuple:
+        """Calculates MR and MRR (see EvaluationRunner.mean_rank).
+
+        Parameters
+        ----------
+        is_filtered : bool
+            True for filtered ranks, False for raw ranks.
+
+        Returns
+        -------
+        tuple
+            See EvaluationRunner.mean_rank.
+        """
+        sums = {}
+        for direction in ("heads", "tails"):
+            ranks = self.ranks(is_filtered, direction)
+            found = ranks[ranks > 0]
+            sums[direction] = (
+                len(ranks) - len(found),
+                int(found.sum()),
+                # summation in Python for the same floating point results as the other engines
+                sum((1.0 / rank for rank in found.tolist()), 0.0),
+            )
+        return EvaluationRunner.aggregate_mean_rank(
+            total_tasks=2 * len(self),
+            ignored_heads=sums["heads"][0],
+            ignored_tails=sums["tails"][0],
+            head_rank=sums["heads"][1],
+            tail_rank=sums["tails"][1],
+            reciprocal_head_rank=sums["heads"][2],
+            reciprocal_tail_rank=sums["tails"][2],
+        )
+
+    def to_result(self, n: int = 10) -> EvaluatorResult:
+        """Calculates the result data structure.
+
+        Parameters
+        ----------
+        n : int
+            Hits@n.
+
+        Returns
+        -------
+        EvaluatorResult
+            The result data structure (identical to the result of Evaluator.calculate_results). For an empty dump
+            (e.g. a selection that matches no triple), all metrics are 0.
+        """
+        filtered_hits = self.hits_at(n, is_filtered=True)
+        filtered_mr = self.mean_rank(is_filtered=True)
+        raw_hits = self.hits_at(n, is_filtered=False)
+        raw_mr = self.mean_rank(is_filtered=False)
+        return EvaluatorResult(
+            evaluated_file=self.evaluated_file,
+            test_set_size=self.test_set_size,
+            n=n,
+            filtered_hits_at_n_heads=filtered_hits[0],
+            filtered_hits_at_n_tails=filtered_hits[1],
+            filtered_hits_at_n_all=filtered_hits[2],
+            filtered_mean_rank_heads=filtered_mr[0],
+            filtered_mean_rank_tails=filtered_mr[1],
+            filtered_mean_rank_all=filtered_mr[2],
+            filtered_reciprocal_mean_rank_heads=filtered_mr[3],
+            filtered_reciprocal_mean_rank_tails=filtered_mr[4],
+            filtered_reciprocal_mean_rank_all=filtered_mr[5],
+            non_filtered_hits_at_n_heads=raw_hits[0],
+            non_filtered_hits_at_n_tails=raw_hits[1],
+            non_filtered_hits_at_n_all=raw_hits[2],
+            non_filtered_mean_rank_heads=raw_mr[0],
+            non_filtered_mean_rank_tails=raw_mr[1],
+            non_filtered_mean_rank_all=raw_mr[2],
+            non_filtered_reciprocal_mean_rank_heads=raw_mr[3],
+            non_filtered_reciprocal_mean_rank_tails=raw_mr[4],
+            non_filtered_reciprocal_mean_rank_all=raw_mr[5],
+        )
@@ -0,0 +1,154 @@
+import logging
+import queue
+import threading
+from typing import Iterator, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# default size of the chunks that are read by the background thread (bytes, rounded up to complete lines)
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# default number of chunks that may wait in the queue
+DEFAULT_QUEUE_SIZE = 8
+
+# put into the queue by the background thread after the last chunk
+_END = object()
+
+
+class BackgroundRecordReader:
+    """Reads the records (truth line, heads line, tails line) of a prediction file with a background thread.
+
+    The thread reads large chunks of complete lines (readlines with a size hint; reading the file releases the GIL)
+    and hands them over through a bounded queue. The consuming thread only groups the lines into records, so that
+    reading overlaps with the parsing and the rank calculation. This hides I/O latency on slow or network mounted
+    storage. The queue bounds the memory to roughly (queue_size + 2) * chunk_size.
+
+    The lines are returned exactly like readline() would return them (including line breaks). Like the readline
+    loops, a trailing incomplete record is ignored.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        start_offset: int = 0,
+        encoding: str = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        """Constructor. The background thread is started immediately.
+
+        Parameters
+        ----------
+        file_path : str
+            The prediction file.
+        start_offset : int
+            Byte offset at which reading starts. Must be the offset of a truth line.
+        encoding : str
+            If None, lines are returned as bytes. Else, the file is read in text mode with the given encoding.
+        chunk_size : int
+            Approximate number of bytes (characters in text mode) that are read at once.
+        queue_size : int
+            Maximal number of chunks waiting in the queue.
+        """
+        self.file_path = file_path
+        self.start_offset = start_offset
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._read, name=f"BackgroundRecordReader({file_path})", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self) -> Iterator[Tuple[Union[str, bytes], ...]]:
+        """Iterates over the records.
+
+        Returns
+        -------
+        Iterator[Tuple[Union[str, bytes], ...]]
+            Per record: truth line, heads line, tails line.
+        """
+        for batch in self.batches():
+            yield from batch
+
+    def batches(self) -> Iterator[List[Tuple[Union[str, bytes], ...]]]:
+        """Iterates over the records in batches (the complete records of one chunk per batch). Consuming whole
+        batches is cheaper than consuming single records.
+
+        Returns
+        -------
+        Iterator[List[Tuple[Union[str, bytes], ...]]]
+            Batches of records.
+        """
+        lines = []
+        while True:
+            chunk = self._queue.get()
+            if chunk is _END:
+                return
+            if isinstance(chunk, BaseException):
+                raise chunk
+            if lines:
+                # lines of a record that started in the previous chunk
+                lines.extend(chunk)
+            else:
+                lines = chunk
+            end = len(lines) - len(lines) % 3
+            yield list(zip(lines[0:end:3], lines[1:end:3], lines[2:end:3]))
+            lines = lines[end:]
+
+    def close(self) -> None:
+        """Stops the background thread (if it is still running) and waits for it."""
+        self._stop.set()
+        while self._thread.is_alive():
+            # unblock the thread if it waits for space in the queue
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._thread.join(timeout=0.01)
+
+    def _put(self, item) -> bool:
+        """Puts an item into the queue, waiting for space unless the reader is closed.
+
+        Parameters
+        ----------
+        item
+            The item.
+
+        Returns
+        -------
+        bool
+            False if the reader was closed.
+        """
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _read(self) -> None:
+        """Body of the background thread."""
+        try:
+            if self.encoding is None:
+                f = open(self.file_path, "rb")
+            else:
+                f = open(self.file_path, "r", encoding=self.encoding)
+            with f:
+                if self.start_offset > 0:
+                    f.seek(self.start_offset)
+                while True:
+                    lines = f.readlines(self.chunk_size)
+                    if not lines or not self._put(lines):
+                        break
+        except BaseException as e:
+            self._put(e)
+        self._put(_END)
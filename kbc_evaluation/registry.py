@@ -0,0 +1,294 @@
+import hashlib
+import logging
+import os
+from typing import Dict, List, Tuple, Union
+
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.triples import TripleSequence, TripleStore, default_cache_directory
+
+logger = logging.getLogger(__name__)
+
+
+# File names of well-known benchmarks as they are distributed.
+# key: lower case benchmark name, value: (test file, train file, validation file)
+KNOWN_LAYOUTS = {
+    "fb15k-237": ("test.txt", "train.txt", "valid.txt"),
+    "wn18rr": ("test.txt", "train.txt", "valid.txt"),
+    "yago3-10": ("test.txt", "train.txt", "valid.txt"),
+    "wikidata5m": (
+        "wikidata5m_transductive_test.txt",
+        "wikidata5m_transductive_train.txt",
+        "wikidata5m_transductive_valid.txt",
+    ),
+}
+
+
+class CustomDataSet:
+    """A user-defined dataset that lives in a directory outside of the package.
+
+    The class provides the same interface as DataSet and can, hence, be used with ParsedSet, EvaluationRunner,
+    Evaluator, and Util. In contrast to DataSet, the splits are not parsed into lists: They are encoded once into
+    memory-mapped integer arrays (see TripleStore) and test_set(), train_set(), and valid_set() return lazy sequences
+    over those arrays. This allows to work with multi-million triple graphs such as Wikidata5M.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        test_set_path: str,
+        train_set_path: str,
+        valid_set_path: str,
+        definitions_path: str = None,
+        cache_directory: str = None,
+    ):
+        """Constructor. Use DataSetRegistry.register to create and register a dataset.
+
+        Parameters
+        ----------
+        name : str
+            The name of the dataset.
+        test_set_path : str
+            Path to the tab separated test file.
+        train_set_path : str
+            Path to the tab separated training file.
+        valid_set_path : str
+            Path to the tab separated validation file.
+        definitions_path : str
+            Optional path to a definitions file (.txt or .json, see DataSet.definitions_map).
+        cache_directory : str
+            Directory for the encoded splits. If None, a directory in the user cache is used.
+        """
+        self.name = name
+        self._test_set_path = test_set_path
+        self._train_set_path = train_set_path
+        self._valid_set_path = valid_set_path
+        self._definitions_path = definitions_path
+        if cache_directory is None:
+            # the hash separates datasets with equal names in different directories
+            directory_hash = hashlib.sha1(
+                os.path.abspath(test_set_path).encode("utf-8")
+            ).hexdigest()[:10]
+            cache_directory = default_cache_directory(f"{name}-{directory_hash}")
+        self._store = TripleStore(
+            split_paths={
+                "train": train_set_path,
+                "valid": valid_set_path,
+                "test": test_set_path,
+            },
+            cache_directory=cache_directory,
+        )
+
+    def __repr__(self) -> str:
+        return f"CustomDataSet.{self.name}"
+
+    def __str__(self) -> str:
+        return repr(self)
+
+    def test_set(self) -> TripleSequence:
+        """Get the test dataset.
+
+        Returns
+        -------
+        TripleSequence
+            A lazy sequence of triples (List[str]).
+        """
+        return self._store.sequence("test")
+
+    def train_set(self) -> TripleSequence:
+        """Get the training dataset.
+
+        Returns
+        -------
+        TripleSequence
+            A lazy sequence of triples (List[str]).
+        """
+        return self._store.sequence("train")
+
+    def valid_set(self) -> TripleSequence:
+        """Get the validation dataset.
+
+        Returns
+        -------
+        TripleSequence
+            A lazy sequence of triples (List[str]).
+        """
+        return self._store.sequence("valid")
+
+    def test_set_path(self) -> str:
+        return self._test_set_path
+
+    def train_set_path(self) -> str:
+        return self._train_set_path
+
+    def valid_set_path(self) -> str:
+        return self._valid_set_path
+
+    def triple_store(self) -> TripleStore:
+        """Get the integer encoded, memory-mapped representation of the splits of this dataset.
+
+        Returns
+        -------
+        TripleStore
+            The triple store.
+        """
+        return self._store
+
+    def leakage_analysis(self, split: str = "train") -> "LeakageAnalysis":
+        """Get the test leakage analysis of this dataset (duplicate and inverse entity pairs in the given split).
+
+        Parameters
+        ----------
+        split : str
+            The split in which leaking patterns are searched.
+
+        Returns
+        -------
+        LeakageAnalysis
+            The analysis.
+        """
+        from kbc_evaluation.leakage import LeakageAnalysis
+
+        return LeakageAnalysis(self, split)
+
+    def definitions_map(self) -> Union[Dict[str, Tuple[str, str]], None]:
+        """Returns the map of definitions (see DataSet.definitions_map).
+
+        Returns
+        -------
+        Union[Dict[str, Tuple[str, str]], None]
+            None if no definitions map exists.
+        """
+        if self._definitions_path is None or self._definitions_path == "":
+            logger.error(
+                "No definitions map implemented for this dataset. Returning None."
+            )
+            return None
+        return DataSet._parse_definitions_file(self._definitions_path)
+
+
+class DataSetRegistry:
+    """Registry of the datasets that can be used for evaluation: the built-in DataSet members and user-defined
+    CustomDataSets.
+    """
+
+    # key: lower case name, value: CustomDataSet
+    _custom_data_sets: Dict[str, CustomDataSet] = {}
+
+    @staticmethod
+    def register(
+        name: str,
+        directory: str,
+        test_file: str = None,
+        train_file: str = None,
+        valid_file: str = None,
+        definitions_file: str = None,
+        cache_directory: str = None,
+        is_overwrite: bool = False,
+    ) -> CustomDataSet:
+        """Registers a dataset directory.
+
+        Parameters
+        ----------
+        name : str
+            The name of the dataset. If the name is one of the KNOWN_LAYOUTS (e.g. "WN18RR" or "Wikidata5M"), the
+            file names of the official distribution are used by default.
+        directory : str
+            The directory that contains the split files.
+        test_file : str
+            File name of the test split (relative to directory). Default: test.txt
+        train_file : str
+            File name of the training split (relative to directory). Default: train.txt
+        valid_file : str
+            File name of the validation split (relative to directory). Default: valid.txt
+        definitions_file : str
+            Optional file name of a definitions file (relative to directory).
+        cache_directory : str
+            Directory for the encoded splits. If None, a directory in the user cache is used.
+        is_overwrite : bool
+            True if an existing registration with the same name shall be replaced.
+
+        Returns
+        -------
+        CustomDataSet
+            The registered dataset.
+        """
+        key = name.lower()
+        if any(member.name.lower() == key for member in DataSet):
+            raise ValueError(f"The name {name} is reserved for a built-in dataset.")
+        if key in DataSetRegistry._custom_data_sets and not is_overwrite:
+            raise ValueError(f"A dataset with the name {name} is already registered.")
+
+        default_test, default_train, default_valid = KNOWN_LAYOUTS.get(
+            key, ("test.txt", "train.txt", "valid.txt")
+        )
+        paths = []
+        for file_name in (
+            test_file or default_test,
+            train_file or default_train,
+            valid_file or default_valid,
+        ):
+            path = os.path.join(directory, file_name)
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"The split file {path} does not exist.")
+            paths.append(path)
+
+        data_set = CustomDataSet(
+            name=name,
+            test_set_path=paths[0],
+            train_set_path=paths[1],
+            valid_set_path=paths[2],
+            definitions_path=(
+                None
+                if definitions_file is None
+                else os.path.join(directory, definitions_file)
+            ),
+            cache_directory=cache_directory,
+        )
+        DataSetRegistry._custom_data_sets[key] = data_set
+        logger.info(f"Registered dataset {name} ({directory})")
+        return data_set
+
+    @staticmethod
+    def unregister(name: str) -> None:
+        """Removes a user-defined dataset from the registry.
+
+        Parameters
+        ----------
+        name : str
+            The name of the dataset.
+        """
+        DataSetRegistry._custom_data_sets.pop(name.lower(), None)
+
+    @staticmethod
+    def get(name: str) -> Union[DataSet, CustomDataSet]:
+        """Get a built-in or registered dataset by name (case insensitive).
+
+        Parameters
+        ----------
+        name : str
+            The name of the dataset.
+
+        Returns
+        -------
+        Union[DataSet, CustomDataSet]
+            The dataset.
+        """
+        for member in DataSet:
+            if member.name.lower() == name.lower():
+                return member
+        if name.lower() in DataSetRegistry._custom_data_sets:
+            return DataSetRegistry._custom_data_sets[name.lower()]
+        raise KeyError(f"Unknown dataset: {name}")
+
+    @staticmethod
+    def names() -> List[str]:
+        """Get the names of all available datasets.
+
+        Returns
+        -------
+        List[str]
+            Built-in datasets first, then registered datasets in order of registration.
+        """
+        return [member.name for member in DataSet] + [
+            data_set.name for data_set in DataSetRegistry._custom_data_sets.values()
+        ]
@@ -0,0 +1,318 @@
+import logging
+import math
+import random
+from typing import Dict, Iterable, List, Tuple, Union
+
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.index import PredictionIndex
+from kbc_evaluation.streaming import calculate_ranks
+
+logger = logging.getLogger(__name__)
+
+
+def normal_quantile(probability: float) -> float:
+    """Quantile function of the standard normal distribution (bisection on math.erf; statistics.NormalDist
+    requires Python 3.8).
+
+    Parameters
+    ----------
+    probability : float
+        Probability in (0, 1).
+
+    Returns
+    -------
+    float
+        The quantile.
+    """
+    if not 0 < probability < 1:
+        raise ValueError(f"The probability must be in (0, 1) but is {probability}.")
+    lower, upper = -10.0, 10.0
+    for _ in range(100):
+        middle = (lower + upper) / 2
+        if 0.5 * (1 + math.erf(middle / math.sqrt(2))) < probability:
+            lower = middle
+        else:
+            upper = middle
+    return (lower + upper) / 2
+
+
+class SampledResult:
+    """Object holding the results of a sampled evaluation.
+
+    For every mode ("raw" and "filtered"), metrics[mode] contains the estimates of relative hits@n (key: n) and of
+    the MRR (key: "mrr"), each as dictionary with the keys "estimate", "lower", and "upper" (bounds of the
+    confidence interval). Relative hits@n and MRR are defined like in EvaluatorResult (the MRR is calculated over
+    the tasks where the correct concept was predicted).
+    """
+
+    def __init__(
+        self,
+        evaluated_file: str,
+        test_set_size: int,
+        records: int,
+        sampled_records: int,
+        fraction: float,
+        confidence: float,
+        seed: int,
+    ):
+        self.evaluated_file = evaluated_file
+        self.test_set_size = test_set_size
+
+        # number of (valid) records in the file and number of evaluated records
+        self.records = records
+        self.sampled_records = sampled_records
+        self.fraction = fraction
+        self.confidence = confidence
+        self.seed = seed
+
+        # key: "raw" or "filtered", value: key: n or "mrr", value: estimate, lower and upper bound
+        self.metrics = {"raw": {}, "filtered": {}}
+
+    def to_dict(self) -> Dict:
+        """Get the result as JSON serializable dictionary.
+
+        Returns
+        -------
+        Dict
+            The result.
+        """
+        values = dict(vars(self))
+        values["metrics"] = {
+            mode: {str(key): value for key, value in metrics.items()}
+            for mode, metrics in self.metrics.items()
+        }
+        return values
+
+
+class SampledEvaluation:
+    """Approximate evaluation on a sample of the records of a prediction file, e.g. to monitor a model during
+    training.
+
+    The sample is stratified by relation: every relation contributes a share of its records that is proportional
+    to the sample fraction (at least min_per_relation records). Only the sampled records are read, via the sidecar
+    index of the prediction file (see PredictionIndex; the index is built in memory if necessary). The estimates use the
+    stratified (ratio) estimators and the confidence intervals the normal approximation with finite population
+    correction. With fraction 1.0, the estimates are the exact values and the intervals collapse.
+    """
+
+    def __init__(
+        self,
+        file_to_be_evaluated: str,
+        data_set: DataSet,
+        fraction: float = 0.1,
+        hits_at: Iterable[int] = (1, 3, 10),
+        confidence: float = 0.95,
+        seed: int = 42,
+        min_per_relation: int = 2,
+        filter_index: FilterIndex = None,
+        is_write_index: bool = False,
+    ):
+        """Constructor.
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+            Path to the text file with the predicted links that shall be evaluated.
+        data_set : DataSet
+            The dataset for which predictions have been made.
+        fraction : float
+            Fraction of the records that is evaluated, in (0, 1].
+        hits_at : Iterable[int]
+            The n values for which hits@n is estimated.
+        confidence : float
+            Confidence level of the intervals.
+        seed : int
+            Seed of the sample. The same seed yields the same sample (e.g. in every epoch).
+        min_per_relation : int
+            Minimal number of sampled records per relation (at least 2 are required to estimate the variance
+            within a relation).
+        filter_index : FilterIndex
+            Index of the true statements of the dataset. If None, it is built from data_set.
+        is_write_index : bool
+            True if a built index of the prediction file shall be persisted next to the file (so that later runs,
+            e.g. in every epoch, do not scan the file again).
+        """
+        if not 0 < fraction <= 1:
+            raise ValueError(f"The fraction must be in (0, 1] but is {fraction}.")
+        self.file_to_be_evaluated = file_to_be_evaluated
+        self.data_set = data_set
+        self.fraction = fraction
+        self.hits_at = sorted(set(hits_at))
+        self.confidence = confidence
+        self.seed = seed
+        self.min_per_relation = min_per_relation
+        self._filter_index = filter_index
+        self.is_write_index = is_write_index
+
+    def sample(self, index: PredictionIndex) -> Dict[str, Tuple[int, List[int]]]:
+        """Draws the stratified sample.
+
+        Parameters
+        ----------
+        index : PredictionIndex
+            Index of the prediction file.
+
+        Returns
+        -------
+        Dict[str, Tuple[int, List[int]]]
+            Key: relation, value: number of records of the relation and the sampled record numbers (in file order).
+        """
+        generator = random.Random(self.seed)
+        strata = {}
+        for relation in sorted(index.relations()):
+            records = index.records_for_relation(relation)
+            size = min(
+                len(records),
+                max(self.min_per_relation, math.ceil(self.fraction * len(records))),
+            )
+            strata[relation] = (len(records), sorted(generator.sample(records, size)))
+        return strata
+
+    def run(self) -> SampledResult:
+        """Runs the sampled evaluation.
+
+        Returns
+        -------
+        SampledResult
+            The estimates.
+        """
+        if self._filter_index is None:
+            self._filter_index = FilterIndex.from_data_set(self.data_set)
+        with PredictionIndex.get(
+            self.file_to_be_evaluated, is_write_index=self.is_write_index
+        ) as index:
+            file_index = FilterIndex(parent=self._filter_index)
+            file_index.add_all(index.truths())
+            strata = self.sample(index)
+
+            # key: relation, value: per sampled record: [raw head, raw tail, filtered head, filtered tail] ranks
+            stratum_ranks = {relation: [] for relation in strata}
+            relations = {}
+            for relation, (_, record_numbers) in strata.items():
+                for record_number in record_numbers:
+                    relations[record_number] = relation
+            # reading in file order keeps the seeks short
+            for record_number in sorted(relations):
+                (h, r, t), (heads, tails) = index.read_record(record_number)
+                raw_head, filtered_head = calculate_ranks(
+                    heads, h, file_index.correct_heads(r, t)
+                )
+                raw_tail, filtered_tail = calculate_ranks(
+                    tails, t, file_index.correct_tails(h, r)
+                )
+                stratum_ranks[relations[record_number]].append(
+                    (raw_head, raw_tail, filtered_head, filtered_tail)
+                )
+
+        result = SampledResult(
+            evaluated_file=self.file_to_be_evaluated,
+            test_set_size=len(self.data_set.test_set()),
+            records=len(index),
+            sampled_records=len(relations),
+            fraction=self.fraction,
+            confidence=self.confidence,
+            seed=self.seed,
+        )
+        z = normal_quantile(0.5 + self.confidence / 2)
+        for mode, columns in (("raw", (0, 1)), ("filtered", (2, 3))):
+            # per stratum: (number of records, per sampled record: ranks of the head and the tail task)
+            samples = [
+                (size, [[ranks[c] for c in columns] for ranks in stratum_ranks[r]])
+                for r, (size, _) in strata.items()
+            ]
+            for n in self.hits_at:
+                total, variance = SampledEvaluation._estimate_total(
+                    samples,
+                    lambda ranks: sum(
+                        1 for rank in ranks if rank is not None and rank <= n
+                    ),
+                )
+                # relative to the test set like EvaluatorResult
+                result.metrics[mode][n] = SampledEvaluation._interval(
+                    total / (2 * result.test_set_size),
+                    z * math.sqrt(variance) / (2 * result.test_set_size),
+                )
+            result.metrics[mode]["mrr"] = SampledEvaluation._estimate_mrr(samples, z)
+        return result
+
+    @staticmethod
+    def _estimate_total(samples: List[tuple], value) -> Tuple[float, float]:
+        """Stratified estimate of the total of a per record value.
+
+        Parameters
+        ----------
+        samples : List[tuple]
+            Per stratum: number of records and the ranks of the sampled records.
+        value
+            Function that maps the ranks of a record to its value.
+
+        Returns
+        -------
+        Tuple[float, float]
+            The estimated total and its variance.
+        """
+        total = 0.0
+        variance = 0.0
+        for size, records in samples:
+            values = [value(ranks) for ranks in records]
+            total += size * sum(values) / len(values)
+            variance += SampledEvaluation._stratum_variance(size, values)
+        return total, variance
+
+    @staticmethod
+    def _estimate_mrr(samples: List[tuple], z: float) -> Dict[str, float]:
+        """Ratio estimate of the MRR (sum of the reciprocal ranks divided by the number of found concepts). The
+        variance is approximated by linearization.
+
+        Parameters
+        ----------
+        samples : List[tuple]
+            Per stratum: number of records and the ranks of the sampled records.
+        z : float
+            Quantile of the standard normal distribution for the confidence level.
+
+        Returns
+        -------
+        Dict[str, float]
+            Estimate, lower and upper bound.
+        """
+
+        def reciprocal_sum(ranks: List[Union[int, None]]) -> float:
+            return sum(1.0 / rank for rank in ranks if rank is not None)
+
+        def found(ranks: List[Union[int, None]]) -> int:
+            return sum(1 for rank in ranks if rank is not None)
+
+        reciprocals, _ = SampledEvaluation._estimate_total(samples, reciprocal_sum)
+        found_tasks, _ = SampledEvaluation._estimate_total(samples, found)
+        if found_tasks == 0:
+            return SampledEvaluation._interval(0.0, 0.0)
+        mrr = reciprocals / found_tasks
+        variance = sum(
+            SampledEvaluation._stratum_variance(
+                size, [reciprocal_sum(ranks) - mrr * found(ranks) for ranks in records]
+            )
+            for size, records in samples
+        )
+        return SampledEvaluation._interval(mrr, z * math.sqrt(variance) / found_tasks)
+
+    @staticmethod
+    def _stratum_variance(size: int, values: List[float]) -> float:
+        """Variance contribution of a stratum to an estimated total (with finite population correction). A stratum
+        with a single sampled record contributes nothing.
+        """
+        sampled = len(values)
+        if sampled < 2:
+            return 0.0
+        mean = sum(values) / sampled
+        sample_variance = sum((v - mean) ** 2 for v in values) / (sampled - 1)
+        return size * size * (1 - sampled / size) * sample_variance / sampled
+
+    @staticmethod
+    def _interval(estimate: float, half_width: float) -> Dict[str, float]:
+        return {
+            "estimate": estimate,
+            "lower": max(0.0, estimate - half_width),
+            "upper": min(1.0, estimate + half_width),
+        }
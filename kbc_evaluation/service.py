@@ -0,0 +1,496 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple, Union
+
+from kbc_evaluation.evaluator import EvaluatorResult
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.registry import DataSetRegistry
+from kbc_evaluation.streaming import StreamingEvaluationRunner
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# maximal size of a single request line (requests with records can be large)
+_STREAM_LIMIT = 2**28
+
+
+class ResidentDataSet:
+    """The parts of a dataset that the service keeps in memory between requests."""
+
+    def __init__(self, name: str, is_load_definitions: bool = True):
+        """Constructor. Loads the dataset (this is the expensive part that the service saves per request).
+
+        Parameters
+        ----------
+        name : str
+            Name of the dataset (see DataSetRegistry.get).
+        is_load_definitions : bool
+            True if the definitions map shall be loaded as well.
+        """
+        self.name = name
+        self.data_set = DataSetRegistry.get(name)
+        self.filter_index = FilterIndex.from_data_set(self.data_set)
+        self.test_set_size = len(self.data_set.test_set())
+        self.definitions = (
+            self.data_set.definitions_map() if is_load_definitions else None
+        )
+
+
+class EvaluationService:
+    """Long-running local evaluation service. Filter indexes and definition maps of the configured datasets are
+    loaded once and stay resident, so that an evaluation request only pays for reading the predictions.
+
+    The service speaks a line based JSON protocol over TCP or a Unix socket: every request is one JSON object on a
+    single line, every response is one JSON object on a single line. Supported requests:
+
+    - {"command": "ping"}
+    - {"command": "data_sets"}: names of the resident datasets
+    - {"command": "evaluate", "data_set": "wn18", "file": "predictions.txt", "n": 10}
+    - {"command": "evaluate", "data_set": "wn18", "records": [[truth line, heads line, tails line], ...], "n": 10}
+    - {"command": "definitions", "data_set": "wn18", "ids": ["03964744", ...]}
+    - {"command": "shutdown"}
+
+    Responses are {"status": "ok", ...} or {"status": "error", "message": ...}. Evaluations return the result as
+    {"result": EvaluatorResult.to_dict()}. Requests are processed concurrently on a pool of worker threads that
+    share the resident indexes (the indexes are never modified by an evaluation).
+    """
+
+    def __init__(
+        self,
+        data_sets: Iterable[str] = (),
+        workers: int = None,
+        is_load_definitions: bool = True,
+    ):
+        """Constructor.
+
+        Parameters
+        ----------
+        data_sets : Iterable[str]
+            Names of the datasets that are loaded when the service starts. Other datasets are loaded on first use.
+        workers : int
+            Number of worker threads. Default: number of CPUs.
+        is_load_definitions : bool
+            True if the definition maps shall be kept resident as well.
+        """
+        self.is_load_definitions = is_load_definitions
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self._data_set_names = [name.lower() for name in data_sets]
+        # key: dataset name (lower case), value: ResidentDataSet
+        self._resident = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._server = None
+        self._shutdown = None
+        # writers of the open connections
+        self._connections = set()
+
+        # (host, port) or path of the Unix socket once the service accepts connections
+        self.address = None
+        self.started = threading.Event()
+
+    def resident_data_set(self, name: str) -> ResidentDataSet:
+        """Get the resident dataset, loading it if necessary.
+
+        Parameters
+        ----------
+        name : str
+            Name of the dataset.
+
+        Returns
+        -------
+        ResidentDataSet
+            The resident dataset.
+        """
+        key = name.lower()
+        with self._lock:
+            resident = self._resident.get(key)
+            if resident is None:
+                logger.info(f"Loading dataset {key}")
+                resident = ResidentDataSet(key, self.is_load_definitions)
+                self._resident[key] = resident
+            return resident
+
+    def handle_request(self, request: Dict) -> Dict:
+        """Processes a single request (see the class documentation for the protocol).
+
+        Parameters
+        ----------
+        request : Dict
+            The request.
+
+        Returns
+        -------
+        Dict
+            The response.
+        """
+        try:
+            command = request.get("command")
+            if command == "ping":
+                return {"status": "ok"}
+            if command == "data_sets":
+                with self._lock:
+                    names = sorted(self._resident)
+                return {"status": "ok", "data_sets": names}
+            if command == "evaluate":
+                return {"status": "ok", "result": self._evaluate(request).to_dict()}
+            if command == "definitions":
+                resident = self.resident_data_set(request["data_set"])
+                if resident.definitions is None:
+                    raise ValueError(f"No definitions for dataset {resident.name}.")
+                return {
+                    "status": "ok",
+                    "definitions": {
+                        concept_id: resident.definitions.get(concept_id)
+                        for concept_id in request["ids"]
+                    },
+                }
+            raise ValueError(f"Unknown command: {command}")
+        except Exception as e:
+            logger.exception(f"Request failed: {request.get('command')}")
+            return {"status": "error", "message": f"{type(e).__name__}: {e}"}
+
+    def _evaluate(self, request: Dict) -> EvaluatorResult:
+        """Evaluates the predictions of an evaluate request.
+
+        Parameters
+        ----------
+        request : Dict
+            The request with "data_set", "n" (optional, default 10) and either "file" or "records".
+
+        Returns
+        -------
+        EvaluatorResult
+            The result data structure.
+        """
+        resident = self.resident_data_set(request["data_set"])
+        n = request.get("n", 10)
+        if "file" in request:
+            accumulator = StreamingEvaluationRunner(
+                file_to_be_evaluated=request["file"],
+                data_set=resident.data_set,
+                hits_at=[n],
+                filter_index=resident.filter_index,
+            ).run()
+            evaluated_file = request["file"]
+        elif "records" in request:
+            accumulator = StreamingEvaluationRunner.evaluate_records(
+                records=request["records"],
+                filter_index=resident.filter_index,
+                hits_at=[n],
+            )
+            evaluated_file = request.get("name", "<records>")
+        else:
+            raise ValueError("An evaluate request requires 'file' or 'records'.")
+        return accumulator.to_result(
+            evaluated_file=evaluated_file,
+            test_set_size=resident.test_set_size,
+            n=n,
+        )
+
+    async def start(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        unix_socket: str = None,
+    ) -> None:
+        """Loads the configured datasets and starts accepting connections.
+
+        Parameters
+        ----------
+        host : str
+            Host to bind to (ignored if unix_socket is given).
+        port : int
+            Port to bind to. 0 for an arbitrary free port (see self.address).
+        unix_socket : str
+            Path of a Unix socket. If given, the service listens on the socket instead of TCP.
+        """
+        loop = asyncio.get_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._shutdown = asyncio.Event()
+        await asyncio.gather(
+            *[
+                loop.run_in_executor(self._executor, self.resident_data_set, name)
+                for name in self._data_set_names
+            ]
+        )
+        if unix_socket is not None:
+            self._server = await asyncio.start_unix_server(
+                self._handle_connection, path=unix_socket, limit=_STREAM_LIMIT
+            )
+            self.address = unix_socket
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection, host=host, port=port, limit=_STREAM_LIMIT
+            )
+            self.address = self._server.sockets[0].getsockname()[:2]
+        logger.info(f"Evaluation service listening on {self.address}")
+        self.started.set()
+
+    async def wait_closed(self) -> None:
+        """Waits until a shutdown request was received, then stops the service."""
+        await self._shutdown.wait()
+        self._server.close()
+        # closing the connections ends their handlers (the next read returns EOF)
+        for writer in list(self._connections):
+            writer.close()
+        while self._connections:
+            await asyncio.sleep(0.01)
+        await self._server.wait_closed()
+        self._executor.shutdown(wait=True)
+        self.started.clear()
+        logger.info("Evaluation service stopped")
+
+    def serve(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        unix_socket: str = None,
+    ) -> None:
+        """Runs the service until a shutdown request is received (blocking). The service uses its own event loop, so
+        it can also be run in a background thread.
+
+        Parameters
+        ----------
+        host : str
+            Host to bind to (ignored if unix_socket is given).
+        port : int
+            Port to bind to. 0 for an arbitrary free port (see self.address).
+        unix_socket : str
+            Path of a Unix socket. If given, the service listens on the socket instead of TCP.
+        """
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.start(host, port, unix_socket))
+            loop.run_until_complete(self.wait_closed())
+        finally:
+            loop.close()
+            if unix_socket is not None and os.path.exists(unix_socket):
+                os.remove(unix_socket)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serves the requests of one connection (one request after the other; use multiple connections for
+        concurrent requests).
+        """
+        loop = asyncio.get_event_loop()
+        self._connections.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line.decode("utf-8"))
+                except ValueError as e:
+                    response = {"status": "error", "message": f"Invalid request: {e}"}
+                else:
+                    if request.get("command") == "shutdown":
+                        response = {"status": "ok"}
+                        self._shutdown.set()
+                    else:
+                        response = await loop.run_in_executor(
+                            self._executor, self.handle_request, request
+                        )
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            logger.warning("Connection closed by client")
+        finally:
+            writer.close()
+            self._connections.discard(writer)
+
+
+class EvaluationClient:
+    """Client of the EvaluationService (blocking)."""
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        unix_socket: str = None,
+    ):
+        """Constructor. Connects to the service.
+
+        Parameters
+        ----------
+        host : str
+            Host of the service.
+        port : int
+            Port of the service.
+        unix_socket : str
+            Path of the Unix socket of the service. If given, host and port are ignored.
+        """
+        if unix_socket is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(unix_socket)
+        else:
+            self._socket = socket.create_connection((host, port))
+        self._file = self._socket.makefile("rwb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        """Closes the connection."""
+        self._file.close()
+        self._socket.close()
+
+    def request(self, request: Dict) -> Dict:
+        """Sends a request and waits for the response.
+
+        Parameters
+        ----------
+        request : Dict
+            The request.
+
+        Returns
+        -------
+        Dict
+            The response. An exception is raised if the service responded with an error.
+        """
+        self._file.write(json.dumps(request).encode("utf-8") + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("The service closed the connection.")
+        response = json.loads(line.decode("utf-8"))
+        if response.get("status") != "ok":
+            raise Exception(response.get("message"))
+        return response
+
+    def evaluate_file(
+        self, file_to_be_evaluated: str, data_set: str, n: int = 10
+    ) -> EvaluatorResult:
+        """Evaluates a prediction file. The file must be readable by the service.
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+            Path to the prediction file (an absolute path is sent).
+        data_set : str
+            Name of the dataset.
+        n : int
+            Hits@n.
+
+        Returns
+        -------
+        EvaluatorResult
+            The result data structure.
+        """
+        response = self.request(
+            {
+                "command": "evaluate",
+                "data_set": data_set,
+                "file": os.path.abspath(file_to_be_evaluated),
+                "n": n,
+            }
+        )
+        return EvaluatorResult.from_dict(response["result"])
+
+    def evaluate_records(
+        self,
+        records: List[Tuple[str, str, str]],
+        data_set: str,
+        n: int = 10,
+        name: str = "<records>",
+    ) -> EvaluatorResult:
+        """Evaluates records that are sent to the service (no shared file system required).
+
+        Parameters
+        ----------
+        records : List[Tuple[str, str, str]]
+            The records in file format: (truth line, heads line, tails line).
+        data_set : str
+            Name of the dataset.
+        n : int
+            Hits@n.
+        name : str
+            Name that is used as evaluated_file in the result.
+
+        Returns
+        -------
+        EvaluatorResult
+            The result data structure.
+        """
+        response = self.request(
+            {
+                "command": "evaluate",
+                "data_set": data_set,
+                "records": [list(record) for record in records],
+                "n": n,
+                "name": name,
+            }
+        )
+        return EvaluatorResult.from_dict(response["result"])
+
+    def definitions(
+        self, data_set: str, ids: Iterable[str]
+    ) -> Dict[str, Union[Tuple[str, str], None]]:
+        """Looks up definitions in the resident definitions map of a dataset.
+
+        Parameters
+        ----------
+        data_set : str
+            Name of the dataset.
+        ids : Iterable[str]
+            The keys to be looked up.
+
+        Returns
+        -------
+        Dict[str, Union[Tuple[str, str], None]]
+            Key to (concept id, description); None for unknown keys.
+        """
+        definitions = self.request(
+            {"command": "definitions", "data_set": data_set, "ids": list(ids)}
+        )["definitions"]
+        return {
+            key: None if value is None else tuple(value)
+            for key, value in definitions.items()
+        }
+
+    def shutdown(self) -> None:
+        """Stops the service."""
+        self.request({"command": "shutdown"})
+
+
+def main(args: List[str] = None) -> None:
+    """Starts the service from the command line: python -m kbc_evaluation.service --data-sets wn18 fb15k"""
+    from kbc_evaluation import configure_logging
+
+    parser = argparse.ArgumentParser(description="Local KBC evaluation service.")
+    parser.add_argument(
+        "--data-sets", nargs="*", default=[], help="Datasets to preload."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix-socket", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--no-definitions",
+        action="store_true",
+        help="Do not keep the definition maps resident.",
+    )
+    arguments = parser.parse_args(args)
+    configure_logging()
+    EvaluationService(
+        data_sets=arguments.data_sets,
+        workers=arguments.workers,
+        is_load_definitions=not arguments.no_definitions,
+    ).serve(host=arguments.host, port=arguments.port, unix_socket=arguments.unix_socket)
+
+
+if __name__ == "__main__":
+    main()
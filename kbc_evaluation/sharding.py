@@ -0,0 +1,334 @@
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.evaluator import EvaluatorResult
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.index import PredictionIndex
+from kbc_evaluation.registry import CustomDataSet
+from kbc_evaluation.streaming import RankAccumulator, StreamingEvaluationRunner
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedEvaluation:
+    """Evaluation of a prediction file in independent shards (e.g. on multiple nodes with a shared file system).
+
+    Every shard evaluates a byte range or a record range of the prediction file and writes a small partial result
+    file (JSON) with the rank sums, the hit counts, and optionally the ranks of every task. Any number of partial
+    results can then be merged into an EvaluatorResult. No coordination between the shards is required; a shard
+    can be re-run (or resumed from a checkpoint) independently.
+
+    Every shard needs the truths of the whole prediction file for filtering. If a sidecar index
+    (see PredictionIndex) exists, it is used; else each shard scans the truth lines of the file. For many shards,
+    build the index once before starting them.
+    """
+
+    _FORMAT = "kbc_partial_result"
+    _VERSION = 1
+
+    @staticmethod
+    def shard_range(
+        file_to_be_evaluated: str, shard: int, shards: int
+    ) -> Tuple[int, int]:
+        """Get the byte range of a shard if the file shall be split into equally sized shards.
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+            The prediction file.
+        shard : int
+            The number of the shard (0 <= shard < shards).
+        shards : int
+            The total number of shards.
+
+        Returns
+        -------
+        Tuple[int, int]
+            Start byte (inclusive) and end byte (exclusive).
+        """
+        if not 0 <= shard < shards:
+            raise ValueError(f"Invalid shard {shard} of {shards}.")
+        size = os.path.getsize(file_to_be_evaluated)
+        return size * shard // shards, size * (shard + 1) // shards
+
+    @staticmethod
+    def record_range(
+        file_to_be_evaluated: str, start_record: int, end_record: int = None
+    ) -> Tuple[int, int]:
+        """Get the byte range of a range of records (uses and, if necessary, builds the sidecar index).
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+            The prediction file.
+        start_record : int
+            The first record (inclusive, starting at 0).
+        end_record : int
+            The last record (exclusive). None for all remaining records.
+
+        Returns
+        -------
+        Tuple[int, int]
+            Start byte (inclusive) and end byte (exclusive).
+        """
+        index = PredictionIndex.get(file_to_be_evaluated)
+        size = os.path.getsize(file_to_be_evaluated)
+        start = index.offset(start_record) if start_record < len(index) else size
+        if end_record is None or end_record >= len(index):
+            return start, size
+        return start, index.offset(end_record)
+
+    @staticmethod
+    def evaluate_shard(
+        file_to_be_evaluated: str,
+        data_set: DataSet,
+        partial_result_file: str,
+        start_byte: int = 0,
+        end_byte: int = None,
+        hits_at: Iterable[int] = (1, 3, 10),
+        is_keep_ranks: bool = False,
+        filter_index: FilterIndex = None,
+        checkpoint_file: str = None,
+    ) -> RankAccumulator:
+        """Evaluates the records of the given byte range and writes the partial result file.
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+            The prediction file.
+        data_set : DataSet
+            The dataset for which predictions have been made.
+        partial_result_file : str
+            The partial result file that shall be written.
+        start_byte : int
+            Start of the byte range (inclusive, does not need to be aligned to a record).
+        end_byte : int
+            End of the byte range (exclusive). None for the end of the file.
+        hits_at : Iterable[int]
+            The n values for which hits@n is counted.
+        is_keep_ranks : bool
+            True if the ranks of every task shall be written to the partial result file.
+        filter_index : FilterIndex
+            Optional pre-built filter index of the dataset.
+        checkpoint_file : str
+            Optional checkpoint file for the shard (see StreamingEvaluationRunner).
+
+        Returns
+        -------
+        RankAccumulator
+            The accumulated ranks of the shard.
+        """
+        runner = StreamingEvaluationRunner(
+            file_to_be_evaluated=file_to_be_evaluated,
+            data_set=data_set,
+            hits_at=hits_at,
+            filter_index=filter_index,
+            checkpoint_file=checkpoint_file,
+            start_byte=start_byte,
+            end_byte=end_byte,
+            is_keep_ranks=is_keep_ranks,
+        )
+        accumulator = runner.run()
+        partial_result = {
+            "format": ShardedEvaluation._FORMAT,
+            "version": ShardedEvaluation._VERSION,
+            "evaluated_file": file_to_be_evaluated,
+            "file_size": os.path.getsize(file_to_be_evaluated),
+            "data_set": str(data_set),
+            "test_set_size": len(data_set.test_set()),
+            "start_byte": start_byte,
+            "end_byte": end_byte,
+            "accumulator": accumulator.to_state(),
+        }
+        if is_keep_ranks:
+            partial_result["ranks"] = runner.ranks
+        temporary_file = partial_result_file + ".tmp"
+        with open(temporary_file, "w", encoding="utf-8") as f:
+            json.dump(partial_result, f, separators=(",", ":"))
+        os.replace(temporary_file, partial_result_file)
+        logger.info(
+            f"Wrote partial result of {file_to_be_evaluated} [{start_byte}, {end_byte}) to {partial_result_file}"
+        )
+        return accumulator
+
+    @staticmethod
+    def evaluate_parallel(
+        file_to_be_evaluated: str,
+        data_set: DataSet,
+        workers: int,
+        hits_at: Iterable[int] = (1, 3, 10),
+    ) -> RankAccumulator:
+        """Evaluates a prediction file on this machine with one process per shard and merges the shards.
+
+        Every process builds its own filter index. Build the sidecar index of the file beforehand (see
+        PredictionIndex) so that the processes do not scan the truth lines of the whole file. The splits of a
+        CustomDataSet are encoded in this process before the shards are started.
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+            The prediction file.
+        data_set : DataSet
+            The dataset for which predictions have been made.
+        workers : int
+            Number of processes (and shards).
+        hits_at : Iterable[int]
+            The n values for which hits@n is counted.
+
+        Returns
+        -------
+        RankAccumulator
+            The accumulated ranks of the whole file.
+        """
+        if isinstance(data_set, CustomDataSet):
+            # the processes read the splits from the shared TripleStore cache: encode it once
+            data_set.triple_store().ensure_encoded()
+        accumulator = RankAccumulator(hits_at)
+        with tempfile.TemporaryDirectory() as directory, ProcessPoolExecutor(
+            max_workers=workers
+        ) as executor:
+            futures = []
+            for shard in range(workers):
+                start_byte, end_byte = ShardedEvaluation.shard_range(
+                    file_to_be_evaluated, shard, workers
+                )
+                futures.append(
+                    executor.submit(
+                        ShardedEvaluation.evaluate_shard,
+                        file_to_be_evaluated,
+                        data_set,
+                        os.path.join(directory, f"shard_{shard}.json"),
+                        start_byte,
+                        end_byte,
+                        hits_at,
+                    )
+                )
+            for future in futures:
+                accumulator.merge(future.result())
+        return accumulator
+
+    @staticmethod
+    def load_partial_results(partial_result_files: Iterable[str]) -> List[Dict]:
+        """Loads and validates partial result files.
+
+        Parameters
+        ----------
+        partial_result_files : Iterable[str]
+            The partial result files.
+
+        Returns
+        -------
+        List[Dict]
+            The partial results.
+        """
+        partial_results = []
+        for partial_result_file in partial_result_files:
+            with open(partial_result_file, "r", encoding="utf-8") as f:
+                partial_result = json.load(f)
+            if (
+                partial_result.get("format") != ShardedEvaluation._FORMAT
+                or partial_result.get("version") != ShardedEvaluation._VERSION
+            ):
+                raise ValueError(f"Invalid partial result file: {partial_result_file}")
+            partial_results.append(partial_result)
+        if len(partial_results) == 0:
+            raise ValueError("No partial results given.")
+        for key in ("evaluated_file", "file_size", "data_set", "test_set_size"):
+            values = {partial_result[key] for partial_result in partial_results}
+            if len(values) > 1:
+                raise ValueError(
+                    f"The partial results belong to different evaluations ({key}: {values})."
+                )
+        ShardedEvaluation._check_coverage(partial_results)
+        return partial_results
+
+    @staticmethod
+    def merge(partial_result_files: Iterable[str], n: int = 10) -> EvaluatorResult:
+        """Merges partial result files into a result.
+
+        Parameters
+        ----------
+        partial_result_files : Iterable[str]
+            The partial result files (in any order).
+        n : int
+            Hits@n. Must be one of the hits_at values of the shards.
+
+        Returns
+        -------
+        EvaluatorResult
+            The result data structure.
+        """
+        partial_results = ShardedEvaluation.load_partial_results(partial_result_files)
+        accumulator = RankAccumulator.from_state(partial_results[0]["accumulator"])
+        for partial_result in partial_results[1:]:
+            accumulator.merge(RankAccumulator.from_state(partial_result["accumulator"]))
+        return accumulator.to_result(
+            evaluated_file=partial_results[0]["evaluated_file"],
+            test_set_size=partial_results[0]["test_set_size"],
+            n=n,
+        )
+
+    @staticmethod
+    def merge_ranks(partial_result_files: Iterable[str]) -> List[list]:
+        """Merges the per-task ranks of partial result files (in file order).
+
+        Parameters
+        ----------
+        partial_result_files : Iterable[str]
+            The partial result files. All shards must have been evaluated with is_keep_ranks=True.
+
+        Returns
+        -------
+        List[list]
+            Per record: [head, relation, tail, raw head rank, raw tail rank, filtered head rank, filtered tail rank]
+        """
+        partial_results = ShardedEvaluation.load_partial_results(partial_result_files)
+        partial_results.sort(key=lambda partial_result: partial_result["start_byte"])
+        result = []
+        for partial_result in partial_results:
+            if "ranks" not in partial_result:
+                raise ValueError("A partial result was written without ranks.")
+            result.extend(partial_result["ranks"])
+        return result
+
+    @staticmethod
+    def _check_coverage(partial_results: List[Dict]) -> None:
+        """Logs a warning if the byte ranges of the partial results overlap or do not cover the whole file.
+
+        Parameters
+        ----------
+        partial_results : List[Dict]
+            The partial results.
+        """
+        file_size = partial_results[0]["file_size"]
+        ranges = sorted(
+            (
+                partial_result["start_byte"],
+                (
+                    file_size
+                    if partial_result["end_byte"] is None
+                    else min(partial_result["end_byte"], file_size)
+                ),
+            )
+            for partial_result in partial_results
+        )
+        covered = 0
+        for start, end in ranges:
+            if start < covered:
+                logger.warning(
+                    f"Partial results overlap at byte {start}: records may be counted twice."
+                )
+            elif start > covered:
+                logger.warning(
+                    f"Bytes [{covered}, {start}) are not covered by any partial result."
+                )
+            covered = max(covered, end)
+        if covered < file_size:
+            logger.warning(
+                f"Bytes [{covered}, {file_size}) are not covered by any partial result."
+            )
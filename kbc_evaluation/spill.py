@@ -0,0 +1,152 @@
+import array
+import logging
+import sys
+import tempfile
+from collections.abc import MutableMapping
+from typing import Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# approximate size of a candidate held in a list: list slot plus a short str object
+_BYTES_PER_CANDIDATE = 8 + 56
+
+
+class _Spilled:
+    """Location of a spilled entry in the spill file."""
+
+    __slots__ = ("offset", "heads", "tails")
+
+    def __init__(self, offset: int, heads: int, tails: int):
+        self.offset = offset
+        self.heads = heads
+        self.tails = tails
+
+
+class SpillingPredictions(MutableMapping):
+    """Dictionary of triple -> (head predictions, tail predictions) (like ParsedSet.triple_predictions) that holds
+    candidate lists in memory only up to a memory budget.
+
+    Entries that would exceed the budget are written to a temporary spill file in a columnar layout: one int32
+    column of candidate IDs (into a vocabulary that is shared by all entries); only the offset and the list lengths
+    of a spilled entry stay in memory. Spilled entries are read back lazily whenever they are accessed (they are not
+    cached), so iterating over all entries keeps the memory within the budget. The order of insertion is kept; the
+    spill file is removed when the mapping is closed or garbage collected.
+
+    The budget applies to the estimated size of the candidate lists held in memory (the dominating part of the
+    memory consumption of a ParsedSet), not to the process as a whole.
+    """
+
+    _file = None
+
+    def __init__(self, memory_budget: int):
+        """Constructor.
+
+        Parameters
+        ----------
+        memory_budget : int
+            Maximal estimated number of bytes of the candidate lists held in memory.
+        """
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self.spilled = 0
+
+        # key: triple, value: (heads, tails) or _Spilled
+        self._entries = {}
+        # vocabulary of the spilled candidates
+        self._ids = {}
+        self._labels: List[str] = []
+        self._file = None
+        self._file_size = 0
+
+    def __getitem__(self, key) -> Tuple[List[str], List[str]]:
+        entry = self._entries[key]
+        if not isinstance(entry, _Spilled):
+            return entry
+        self._file.seek(entry.offset)
+        ids = array.array("i")
+        ids.frombytes(self._file.read((entry.heads + entry.tails) * ids.itemsize))
+        labels = self._labels
+        candidates = [labels[i] for i in ids]
+        return candidates[: entry.heads], candidates[entry.heads :]
+
+    def __setitem__(self, key, value: Tuple[List[str], List[str]]) -> None:
+        self._release(key)
+        heads, tails = value
+        size = SpillingPredictions._estimate_size(heads, tails)
+        if self.memory_used + size <= self.memory_budget:
+            self._entries[key] = (heads, tails)
+            self.memory_used += size
+        else:
+            self._entries[key] = self._spill(heads, tails)
+
+    def __delitem__(self, key) -> None:
+        self._release(key)
+        del self._entries[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __del__(self):
+        self.close()
+
+    def close(self) -> None:
+        """Removes the spill file. Spilled entries cannot be accessed afterwards."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def is_spilled(self, key) -> bool:
+        """True if the entry of the key is held in the spill file."""
+        return isinstance(self._entries[key], _Spilled)
+
+    def _release(self, key) -> None:
+        """Accounts for the removal of the current entry of the key (if any). Space in the spill file is not
+        reclaimed.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        if isinstance(entry, _Spilled):
+            self.spilled -= 1
+        else:
+            self.memory_used -= SpillingPredictions._estimate_size(*entry)
+
+    def _spill(self, heads: List[str], tails: List[str]) -> _Spilled:
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix="kbc_spill_")
+            logger.info(
+                f"Memory budget of {self.memory_budget} bytes reached; spilling candidates to disk"
+            )
+        ids = array.array("i")
+        for label in heads:
+            ids.append(self._id(label))
+        for label in tails:
+            ids.append(self._id(label))
+        entry = _Spilled(self._file_size, len(heads), len(tails))
+        self._file.seek(self._file_size)
+        self._file.write(ids.tobytes())
+        self._file_size += len(ids) * ids.itemsize
+        self.spilled += 1
+        return entry
+
+    def _id(self, label: str) -> int:
+        label_id = self._ids.get(label)
+        if label_id is None:
+            label_id = len(self._labels)
+            self._ids[label] = label_id
+            self._labels.append(label)
+        return label_id
+
+    @staticmethod
+    def _estimate_size(heads: List[str], tails: List[str]) -> int:
+        return (
+            sys.getsizeof(heads)
+            + sys.getsizeof(tails)
+            + (len(heads) + len(tails)) * _BYTES_PER_CANDIDATE
+        )
@@ -0,0 +1,362 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, List, Union
+
+from kbc_evaluation.evaluator import EvaluatorResult
+from kbc_evaluation.triples import default_cache_directory
+
+logger = logging.getLogger(__name__)
+
+# size of the blocks in which files are hashed
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def default_store_file() -> str:
+    """Get the default location of the result store (in the cache root, see default_cache_directory).
+
+    Returns
+    -------
+    str
+        Path to the SQLite file.
+    """
+    return os.path.join(default_cache_directory("results"), "results.sqlite")
+
+
+class ResultStore:
+    """Local SQLite store of evaluation results, addressed by content.
+
+    A result is stored under a key that is derived from the SHA-256 hash of the prediction file, the version of the
+    dataset (hash of its split files), n, and the evaluation options. Re-evaluating an unchanged file, even under
+    another path, returns the stored result without parsing the file. File hashes are memoized by path, size, and
+    modification time, so an unchanged file is hashed only once.
+
+    Every result is stored with its metadata, so that past runs can be listed and compared. If max_size is given,
+    the least recently used results are evicted once the stored results exceed max_size bytes.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY,
+            file_hash TEXT NOT NULL,
+            data_set TEXT NOT NULL,
+            data_set_version TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            options TEXT NOT NULL,
+            evaluated_file TEXT NOT NULL,
+            created REAL NOT NULL,
+            last_access REAL NOT NULL,
+            size INTEGER NOT NULL,
+            result TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS file_hashes (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            hash TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, store_file: str = None, max_size: int = None):
+        """Constructor. The store is created if it does not exist.
+
+        Parameters
+        ----------
+        store_file : str
+            Path to the SQLite file. If None, default_store_file() is used.
+        max_size : int
+            Maximal number of bytes of the stored results (None: unlimited).
+        """
+        if store_file is None:
+            store_file = default_store_file()
+        directory = os.path.dirname(os.path.abspath(store_file))
+        os.makedirs(directory, exist_ok=True)
+        self.store_file = store_file
+        self.max_size = max_size
+        self._connection = sqlite3.connect(store_file)
+        self._connection.executescript(ResultStore._SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self) -> None:
+        """Closes the store."""
+        self._connection.close()
+
+    def file_hash(self, file: str) -> str:
+        """Get the SHA-256 hash of the content of a file (memoized by path, size, and modification time).
+
+        Parameters
+        ----------
+        file : str
+            The file.
+
+        Returns
+        -------
+        str
+            Hex digest.
+        """
+        path = os.path.abspath(file)
+        stat = os.stat(path)
+        row = self._connection.execute(
+            "SELECT hash FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        file_hash = digest.hexdigest()
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, file_hash),
+            )
+        return file_hash
+
+    def data_set_version(self, data_set) -> str:
+        """Get the version of a dataset: a hash over the contents of its test, training, and validation files.
+
+        Parameters
+        ----------
+        data_set
+            DataSet or CustomDataSet.
+
+        Returns
+        -------
+        str
+            Hex digest.
+        """
+        digest = hashlib.sha256()
+        for path in (
+            data_set.test_set_path(),
+            data_set.train_set_path(),
+            data_set.valid_set_path(),
+        ):
+            digest.update(self.file_hash(path).encode("utf-8"))
+        return digest.hexdigest()
+
+    def key(
+        self, file_to_be_evaluated: str, data_set, n: int, options: Dict = None
+    ) -> str:
+        """Get the key of an evaluation.
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+            The prediction file.
+        data_set
+            DataSet or CustomDataSet.
+        n : int
+            Hits@n.
+        options : Dict
+            Further (JSON serializable) settings that influence the result, e.g. the filtering options.
+
+        Returns
+        -------
+        str
+            The key.
+        """
+        description = {
+            "file_hash": self.file_hash(file_to_be_evaluated),
+            "data_set": str(data_set),
+            "data_set_version": self.data_set_version(data_set),
+            "n": n,
+            "options": options or {},
+        }
+        return hashlib.sha256(
+            json.dumps(description, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str) -> Union[EvaluatorResult, None]:
+        """Get a stored result.
+
+        Parameters
+        ----------
+        key : str
+            The key of the evaluation (see key).
+
+        Returns
+        -------
+        Union[EvaluatorResult, None]
+            The result. None if there is no result for the key.
+        """
+        row = self._connection.execute(
+            "SELECT result FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._connection:
+            self._connection.execute(
+                "UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+        return EvaluatorResult.from_dict(json.loads(row[0]))
+
+    def put(
+        self,
+        key: str,
+        result: EvaluatorResult,
+        data_set,
+        options: Dict = None,
+    ) -> None:
+        """Stores a result (replacing a result with the same key) and evicts old results if necessary.
+
+        Parameters
+        ----------
+        key : str
+            The key of the evaluation (see key).
+        result : EvaluatorResult
+            The result.
+        data_set
+            The dataset of the evaluation.
+        options : Dict
+            The options that were used to calculate the key.
+        """
+        serialized = json.dumps(result.to_dict())
+        now = time.time()
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    self.file_hash(result.evaluated_file),
+                    str(data_set),
+                    self.data_set_version(data_set),
+                    result.n,
+                    json.dumps(options or {}, sort_keys=True),
+                    os.path.abspath(result.evaluated_file),
+                    now,
+                    now,
+                    len(serialized),
+                    serialized,
+                ),
+            )
+        if self.max_size is not None:
+            self.evict(self.max_size, keep=key)
+
+    def evict(self, max_size: int, keep: str = None) -> int:
+        """Removes the least recently used results until the stored results are not larger than max_size bytes.
+
+        Parameters
+        ----------
+        max_size : int
+            Maximal number of bytes of the stored results.
+        keep : str
+            Key of a result that is never removed (put keeps the result it has just stored, even if the result
+            alone is larger than max_size).
+
+        Returns
+        -------
+        int
+            Number of removed results.
+        """
+        rows = self._connection.execute(
+            "SELECT key, size FROM results ORDER BY last_access DESC, created DESC"
+        ).fetchall()
+        total = 0
+        evicted = []
+        for key, size in sorted(rows, key=lambda row: row[0] != keep):
+            total += size
+            if total > max_size and key != keep:
+                evicted.append((key,))
+        if evicted:
+            with self._connection:
+                self._connection.executemany(
+                    "DELETE FROM results WHERE key = ?", evicted
+                )
+            logger.info(f"Evicted {len(evicted)} results from {self.store_file}")
+        return len(evicted)
+
+    def runs(self, evaluated_file: str = None, data_set=None) -> List[Dict]:
+        """Lists the stored runs, newest first.
+
+        Parameters
+        ----------
+        evaluated_file : str
+            If given, only runs of this file (path) are listed.
+        data_set
+            If given, only runs on this dataset are listed.
+
+        Returns
+        -------
+        List[Dict]
+            Per run: key, file_hash, data_set, data_set_version, n, options, evaluated_file, created, size (bytes),
+            and result (the values of the EvaluatorResult as dictionary).
+        """
+        query = (
+            "SELECT key, file_hash, data_set, data_set_version, n, options, evaluated_file, created, size, result "
+            "FROM results"
+        )
+        conditions = []
+        parameters = []
+        if evaluated_file is not None:
+            conditions.append("evaluated_file = ?")
+            parameters.append(os.path.abspath(evaluated_file))
+        if data_set is not None:
+            conditions.append("data_set = ?")
+            parameters.append(str(data_set))
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created DESC"
+        runs = []
+        for row in self._connection.execute(query, parameters):
+            runs.append(
+                {
+                    "key": row[0],
+                    "file_hash": row[1],
+                    "data_set": row[2],
+                    "data_set_version": row[3],
+                    "n": row[4],
+                    "options": json.loads(row[5]),
+                    "evaluated_file": row[6],
+                    "created": row[7],
+                    "size": row[8],
+                    "result": json.loads(row[9]),
+                }
+            )
+        return runs
+
+    def compare(self, key_a: str, key_b: str) -> Dict[str, float]:
+        """Compares the numeric result values of two stored runs.
+
+        Parameters
+        ----------
+        key_a : str
+            Key of the baseline run.
+        key_b : str
+            Key of the other run.
+
+        Returns
+        -------
+        Dict[str, float]
+            Key: name of the result value, value: difference (B - A). Values that are not numeric in both runs (e.g.
+            adjusted metrics that were only calculated in one run) are skipped.
+        """
+        results = []
+        for key in (key_a, key_b):
+            result = self.get(key)
+            if result is None:
+                raise KeyError(f"There is no stored result for key {key}.")
+            results.append(result.to_dict())
+        return {
+            name: results[1][name] - value
+            for name, value in results[0].items()
+            if name not in ("n", "test_set_size")
+            and ResultStore._is_number(value)
+            and ResultStore._is_number(results[1].get(name))
+        }
+
+    @staticmethod
+    def _is_number(value) -> bool:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
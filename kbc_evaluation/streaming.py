@@ -0,0 +1,752 @@
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from kbc_evaluation.dataset import DataSet, ParsedSet
+from kbc_evaluation.evaluator import EvaluationRunner, EvaluatorResult
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.index import PredictionIndex
+from kbc_evaluation.instrumentation import Instrumentation
+from kbc_evaluation.progress import Progress
+from kbc_evaluation.reader import BackgroundRecordReader
+
+logger = logging.getLogger(__name__)
+
+
+def calculate_ranks(
+    predictions: List[str], gold: str, correct: Set[str] = None
+) -> Tuple[Union[int, None], Union[int, None]]:
+    """Calculates the raw and the filtered rank of the gold concept in a single scan.
+
+    Parameters
+    ----------
+    predictions : List[str]
+        The (unfiltered) predictions.
+    gold : str
+        The correct concept.
+    correct : Set[str]
+        All correct concepts for the task (filter set). If None, only the raw rank is calculated.
+
+    Returns
+    -------
+    Tuple[Union[int, None], Union[int, None]]
+        [0] Raw rank (first position is 1). None if the gold concept is not contained.
+        [1] Filtered rank: the raw rank minus the number of correct concepts ranked before the gold concept.
+        None if the gold concept is not contained or if no filter set is given.
+    """
+    try:
+        index = predictions.index(gold)
+    except ValueError:
+        return None, None
+    if correct is None:
+        return index + 1, None
+    filtered_out = 0
+    for prediction in predictions[:index]:
+        if prediction in correct:
+            filtered_out += 1
+    return index + 1, index + 1 - filtered_out
+
+
+class RankAccumulator:
+    """Mergeable sums over the ranks of prediction tasks. The accumulator is all that is needed to calculate the
+    metrics of an EvaluatorResult, its state can be persisted (checkpoints, partial results) and merged.
+    """
+
+    MODES = ("raw", "filtered")
+    DIRECTIONS = ("heads", "tails")
+
+    def __init__(self, hits_at: Iterable[int] = (1, 3, 10)):
+        """Constructor.
+
+        Parameters
+        ----------
+        hits_at : Iterable[int]
+            The n values for which hits@n is counted.
+        """
+        self.hits_at = sorted(set(hits_at))
+        self.records = 0
+        # key: mode, value: key: direction, value: statistics
+        self._statistics = {
+            mode: {
+                direction: {
+                    "found": 0,
+                    "ignored": 0,
+                    "rank_sum": 0,
+                    "reciprocal_sum": 0.0,
+                    "hits": [0] * len(self.hits_at),
+                }
+                for direction in RankAccumulator.DIRECTIONS
+            }
+            for mode in RankAccumulator.MODES
+        }
+
+    def add(self, mode: str, direction: str, rank: Union[int, None]) -> None:
+        """Adds the rank of a single prediction task.
+
+        Parameters
+        ----------
+        mode : str
+            "raw" or "filtered".
+        direction : str
+            "heads" or "tails".
+        rank : Union[int, None]
+            The rank (first position is 1). None if the correct concept was not predicted.
+        """
+        statistics = self._statistics[mode][direction]
+        if rank is None:
+            statistics["ignored"] += 1
+            return
+        statistics["found"] += 1
+        statistics["rank_sum"] += rank
+        statistics["reciprocal_sum"] += 1.0 / rank
+        hits = statistics["hits"]
+        for i, n in enumerate(self.hits_at):
+            if rank <= n:
+                hits[i] += 1
+
+    def add_record(
+        self,
+        raw_head_rank: Union[int, None],
+        raw_tail_rank: Union[int, None],
+        filtered_head_rank: Union[int, None] = None,
+        filtered_tail_rank: Union[int, None] = None,
+    ) -> None:
+        """Adds the ranks of one record (one truth triple with head and tail predictions).
+
+        Parameters
+        ----------
+        raw_head_rank : Union[int, None]
+        raw_tail_rank : Union[int, None]
+        filtered_head_rank : Union[int, None]
+        filtered_tail_rank : Union[int, None]
+        """
+        self.records += 1
+        self.add("raw", "heads", raw_head_rank)
+        self.add("raw", "tails", raw_tail_rank)
+        self.add("filtered", "heads", filtered_head_rank)
+        self.add("filtered", "tails", filtered_tail_rank)
+
+    def merge(self, other: "RankAccumulator") -> None:
+        """Adds the sums of the other accumulator to this accumulator.
+
+        Parameters
+        ----------
+        other : RankAccumulator
+            Accumulator with the same hits_at values.
+        """
+        if other.hits_at != self.hits_at:
+            raise ValueError(
+                f"Cannot merge accumulators with different hits@n values: {self.hits_at} vs. {other.hits_at}"
+            )
+        self.records += other.records
+        for mode in RankAccumulator.MODES:
+            for direction in RankAccumulator.DIRECTIONS:
+                mine = self._statistics[mode][direction]
+                theirs = other._statistics[mode][direction]
+                for key in ("found", "ignored", "rank_sum", "reciprocal_sum"):
+                    mine[key] += theirs[key]
+                mine["hits"] = [a + b for a, b in zip(mine["hits"], theirs["hits"])]
+
+    def mean_rank(self, is_filtered: bool) -> Tuple[int, int, int, float, float, float]:
+        """Calculates MR and MRR (see EvaluationRunner.mean_rank).
+
+        Parameters
+        ----------
+        is_filtered : bool
+            True for filtered ranks, False for raw ranks.
+
+        Returns
+        -------
+        Tuple[int, int, int, float, float, float]
+            See EvaluationRunner.mean_rank.
+        """
+        statistics = self._statistics["filtered" if is_filtered else "raw"]
+        return EvaluationRunner.aggregate_mean_rank(
+            total_tasks=2 * self.records,
+            ignored_heads=statistics["heads"]["ignored"],
+            ignored_tails=statistics["tails"]["ignored"],
+            head_rank=statistics["heads"]["rank_sum"],
+            tail_rank=statistics["tails"]["rank_sum"],
+            reciprocal_head_rank=statistics["heads"]["reciprocal_sum"],
+            reciprocal_tail_rank=statistics["tails"]["reciprocal_sum"],
+        )
+
+    def hits(self, n: int, is_filtered: bool) -> Tuple[int, int, int]:
+        """Get hits@n (see EvaluationRunner.calculate_hits_at).
+
+        Parameters
+        ----------
+        n : int
+            One of the hits_at values of this accumulator.
+        is_filtered : bool
+            True for filtered ranks, False for raw ranks.
+
+        Returns
+        -------
+        Tuple[int, int, int]
+            Hits at n for heads, tails, and both.
+        """
+        if n not in self.hits_at:
+            raise ValueError(
+                f"Hits@{n} was not accumulated (available: {self.hits_at})"
+            )
+        i = self.hits_at.index(n)
+        statistics = self._statistics["filtered" if is_filtered else "raw"]
+        heads = statistics["heads"]["hits"][i]
+        tails = statistics["tails"]["hits"][i]
+        return heads, tails, heads + tails
+
+    def to_result(
+        self, evaluated_file: str, test_set_size: int, n: int = 10
+    ) -> EvaluatorResult:
+        """Creates the result data structure.
+
+        Parameters
+        ----------
+        evaluated_file : str
+            The evaluated file.
+        test_set_size : int
+            The size of the test set.
+        n : int
+            Hits@n. Must be one of the hits_at values of this accumulator.
+
+        Returns
+        -------
+        EvaluatorResult
+            The result data structure.
+        """
+        filtered_hits = self.hits(n, is_filtered=True)
+        filtered_mr = self.mean_rank(is_filtered=True)
+        raw_hits = self.hits(n, is_filtered=False)
+        raw_mr = self.mean_rank(is_filtered=False)
+        return EvaluatorResult(
+            evaluated_file=evaluated_file,
+            test_set_size=test_set_size,
+            n=n,
+            filtered_hits_at_n_heads=filtered_hits[0],
+            filtered_hits_at_n_tails=filtered_hits[1],
+            filtered_hits_at_n_all=filtered_hits[2],
+            filtered_mean_rank_heads=filtered_mr[0],
+            filtered_mean_rank_tails=filtered_mr[1],
+            filtered_mean_rank_all=filtered_mr[2],
+            filtered_reciprocal_mean_rank_heads=filtered_mr[3],
+            filtered_reciprocal_mean_rank_tails=filtered_mr[4],
+            filtered_reciprocal_mean_rank_all=filtered_mr[5],
+            non_filtered_hits_at_n_heads=raw_hits[0],
+            non_filtered_hits_at_n_tails=raw_hits[1],
+            non_filtered_hits_at_n_all=raw_hits[2],
+            non_filtered_mean_rank_heads=raw_mr[0],
+            non_filtered_mean_rank_tails=raw_mr[1],
+            non_filtered_mean_rank_all=raw_mr[2],
+            non_filtered_reciprocal_mean_rank_heads=raw_mr[3],
+            non_filtered_reciprocal_mean_rank_tails=raw_mr[4],
+            non_filtered_reciprocal_mean_rank_all=raw_mr[5],
+        )
+
+    def to_state(self) -> Dict:
+        """Get the state as JSON serializable dictionary.
+
+        Returns
+        -------
+        Dict
+            The state.
+        """
+        return {
+            "hits_at": self.hits_at,
+            "records": self.records,
+            "statistics": self._statistics,
+        }
+
+    @staticmethod
+    def from_state(state: Dict) -> "RankAccumulator":
+        """Restores an accumulator from its state.
+
+        Parameters
+        ----------
+        state : Dict
+            State as returned by to_state.
+
+        Returns
+        -------
+        RankAccumulator
+            The accumulator.
+        """
+        accumulator = RankAccumulator(hits_at=state["hits_at"])
+        accumulator.records = state["records"]
+        for mode in RankAccumulator.MODES:
+            for direction in RankAccumulator.DIRECTIONS:
+                accumulator._statistics[mode][direction].update(
+                    state["statistics"][mode][direction]
+                )
+        return accumulator
+
+
+class StreamingEvaluationRunner:
+    """Evaluates a prediction file in a single streaming pass. Raw and filtered ranks are calculated together and
+    only the rank sums are kept in memory (in contrast to EvaluationRunner, which parses the whole file into
+    ParsedSet.triple_predictions, once per filtering setting).
+
+    The accumulated state can be persisted periodically to a checkpoint file. If the evaluation is started again on
+    the same (unchanged) file with the same checkpoint file, it continues at the byte offset of the checkpoint and
+    yields the same result as an uninterrupted run. If the ranks are kept, they are appended to a side file
+    (checkpoint file + ".ranks", one JSON list per line), so that a checkpoint only writes the new ranks.
+    """
+
+    _CHECKPOINT_VERSION = 2
+
+    def __init__(
+        self,
+        file_to_be_evaluated: str,
+        data_set: DataSet,
+        hits_at: Iterable[int] = (1, 3, 10),
+        filter_index: FilterIndex = None,
+        checkpoint_file: str = None,
+        checkpoint_interval: int = 100000,
+        start_byte: int = 0,
+        end_byte: int = None,
+        is_keep_ranks: bool = False,
+    ):
+        """Constructor.
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+            Path to the text file with the predicted links that shall be evaluated.
+        data_set : DataSet
+            The dataset for which predictions have been made.
+        hits_at : Iterable[int]
+            The n values for which hits@n is calculated.
+        filter_index : FilterIndex
+            Index of the true statements of the dataset. If None, it is built from data_set. The index is not
+            modified (the truths of the prediction file are added to a child index).
+        checkpoint_file : str
+            Path to the checkpoint file. If None, no checkpoints are written.
+        checkpoint_interval : int
+            Number of records after which a checkpoint is written.
+        start_byte : int
+            Only records whose truth line starts at or after this byte offset are evaluated. The offset does not
+            need to be aligned to a record.
+        end_byte : int
+            Only records whose truth line starts before this byte offset are evaluated (None: end of file).
+            Consecutive byte ranges, hence, partition the records of a file.
+        is_keep_ranks : bool
+            True if the ranks of every record shall be kept in self.ranks.
+        """
+        if file_to_be_evaluated is None or not os.path.isfile(file_to_be_evaluated):
+            raise Exception(
+                f"The specified file ({file_to_be_evaluated}) does not exist."
+            )
+        self.file_to_be_evaluated = file_to_be_evaluated
+        self.data_set = data_set
+        self.hits_at = sorted(set(hits_at))
+        self._filter_index = filter_index
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_interval = checkpoint_interval
+        self.start_byte = start_byte
+        self.end_byte = end_byte
+        self.is_keep_ranks = is_keep_ranks
+
+        # per record: [head, relation, tail, raw head rank, raw tail rank, filtered head rank, filtered tail rank]
+        # (only filled if is_keep_ranks is True; ranks are None if the correct concept was not predicted)
+        self.ranks = []
+        # number of ranks and bytes in the ranks file of the checkpoint
+        self._checkpointed_ranks = 0
+        self._checkpointed_ranks_size = 0
+
+    def run(self, max_records: int = None) -> RankAccumulator:
+        """Runs (or continues) the evaluation.
+
+        Parameters
+        ----------
+        max_records : int
+            If given, at most this number of records is evaluated in this call. Together with a checkpoint file,
+            this allows to split an evaluation into multiple time slices.
+
+        Returns
+        -------
+        RankAccumulator
+            The accumulated ranks (of all records evaluated so far, including the ones of earlier runs).
+        """
+        accumulator, offset = self._load_checkpoint()
+        file_size = os.path.getsize(self.file_to_be_evaluated)
+        end = file_size if self.end_byte is None else min(self.end_byte, file_size)
+        if offset is not None and offset >= end:
+            return accumulator
+
+        filter_index = self._file_filter_index()
+        if offset is None:
+            with open(self.file_to_be_evaluated, "rb") as f:
+                offset = StreamingEvaluationRunner.align_to_record(f, self.start_byte)
+        records_since_checkpoint = 0
+        records_in_run = 0
+        start_offset = offset
+        with Instrumentation.stage("streaming"), Progress.stage(
+            "streaming", total=max(end - offset, 0), unit="bytes"
+        ) as progress, BackgroundRecordReader(
+            self.file_to_be_evaluated, start_offset=offset
+        ) as records:
+            # the offset of the end of the file is reached if the records are exhausted
+            is_exhausted = True
+            for truth_line, heads_line, tails_line in records:
+                if offset >= end or (
+                    max_records is not None and records_in_run >= max_records
+                ):
+                    is_exhausted = False
+                    break
+                offset += len(truth_line) + len(heads_line) + len(tails_line)
+                ranks = self._evaluate_record(
+                    filter_index, truth_line, heads_line, tails_line
+                )
+                if ranks is not None:
+                    accumulator.add_record(*ranks[3:])
+                    if self.is_keep_ranks:
+                        self.ranks.append(ranks)
+                records_in_run += 1
+                records_since_checkpoint += 1
+                progress.update(offset - start_offset, records_in_run)
+                if records_since_checkpoint >= self.checkpoint_interval:
+                    self._write_checkpoint(accumulator, offset)
+                    records_since_checkpoint = 0
+            if is_exhausted:
+                offset = max(offset, end)
+        Instrumentation.count("streaming.records", records_in_run)
+        self._write_checkpoint(accumulator, offset)
+        return accumulator
+
+    @staticmethod
+    def evaluate_records(
+        records: List[Tuple[str, str, str]],
+        filter_index: FilterIndex,
+        hits_at: Iterable[int] = (1, 3, 10),
+    ) -> RankAccumulator:
+        """Evaluates records that are held in memory (e.g. received over a socket) instead of a file.
+
+        Parameters
+        ----------
+        records : List[Tuple[str, str, str]]
+            The records in file format: (truth line, heads line, tails line).
+        filter_index : FilterIndex
+            Index of the true statements of the dataset. It is not modified (the truths of the records are added to
+            a child index, exactly like the truths of a prediction file).
+        hits_at : Iterable[int]
+            The n values for which hits@n is calculated.
+
+        Returns
+        -------
+        RankAccumulator
+            The accumulated ranks.
+        """
+        record_index = FilterIndex(parent=filter_index)
+        for truth_line, _, _ in records:
+            truth = truth_line.rstrip("\r\n").split(" ")
+            if len(truth) == 3:
+                record_index.add(truth)
+        accumulator = RankAccumulator(hits_at)
+        for truth_line, heads_line, tails_line in records:
+            ranks = StreamingEvaluationRunner._evaluate_record(
+                record_index,
+                truth_line.encode("utf-8"),
+                heads_line.encode("utf-8"),
+                tails_line.encode("utf-8"),
+            )
+            if ranks is not None:
+                accumulator.add_record(*ranks[3:])
+        return accumulator
+
+    @staticmethod
+    def align_to_record(f, offset: int) -> int:
+        """Get the offset of the first record that starts at or after the given byte offset.
+
+        Parameters
+        ----------
+        f
+            The prediction file opened in binary mode.
+        offset : int
+            Any byte offset.
+
+        Returns
+        -------
+        int
+            Offset of the truth line of the next record (the file size if there is none).
+        """
+        if offset <= 0:
+            return 0
+        f.seek(offset - 1)
+        if f.read(1) != b"\n":
+            # skip the remainder of the line in which the offset lies
+            offset += len(f.readline())
+        while True:
+            line = f.readline()
+            if not line or not line.startswith(b"\t"):
+                # truth lines are the only lines that do not start with a tab
+                return offset
+            offset += len(line)
+
+    @staticmethod
+    def _evaluate_record(
+        filter_index: FilterIndex,
+        truth_line: bytes,
+        heads_line: bytes,
+        tails_line: bytes,
+    ) -> Union[list, None]:
+        """Parses a record and calculates its ranks.
+
+        Parameters
+        ----------
+        filter_index : FilterIndex
+            The filter index of the file.
+        truth_line : bytes
+            True line containing the correct triple.
+        heads_line : bytes
+            Line containing the heads.
+        tails_line : bytes
+            Line containing the tails.
+
+        Returns
+        -------
+        Union[list, None]
+            [head, relation, tail, raw head rank, raw tail rank, filtered head rank, filtered tail rank].
+            None if the truth is invalid.
+        """
+        # the lines are read in binary mode: line breaks may be "\r\n" (no universal newlines)
+        truth, heads, tails = ParsedSet.parse_record(
+            truth_line.rstrip(b"\r\n").decode("utf-8"),
+            heads_line.rstrip(b"\r\n").decode("utf-8"),
+            tails_line.rstrip(b"\r\n").decode("utf-8"),
+        )
+        if len(truth) != 3:
+            # the problem is logged by the parser
+            return None
+        raw_head, filtered_head = calculate_ranks(
+            heads, truth[0], filter_index.correct_heads(truth[1], truth[2])
+        )
+        raw_tail, filtered_tail = calculate_ranks(
+            tails, truth[2], filter_index.correct_tails(truth[0], truth[1])
+        )
+        return [
+            truth[0],
+            truth[1],
+            truth[2],
+            raw_head,
+            raw_tail,
+            filtered_head,
+            filtered_tail,
+        ]
+
+    def _file_filter_index(self) -> FilterIndex:
+        """Get the filter index for this file: the dataset index plus all truths of the prediction file (truths of
+        later records filter earlier records, exactly like in ParsedSet).
+
+        Returns
+        -------
+        FilterIndex
+            The index.
+        """
+        if self._filter_index is None:
+            with Instrumentation.stage("filtering.index"):
+                self._filter_index = FilterIndex.from_data_set(self.data_set)
+        return StreamingEvaluationRunner.file_filter_index(
+            self.file_to_be_evaluated, self._filter_index
+        )
+
+    @staticmethod
+    def file_filter_index(
+        file_to_be_evaluated: str, filter_index: FilterIndex
+    ) -> FilterIndex:
+        """Get a child of the given dataset index that additionally contains the truths of the prediction file.
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+            The prediction file.
+        filter_index : FilterIndex
+            Index of the true statements of the dataset (not modified).
+
+        Returns
+        -------
+        FilterIndex
+            The index for the file.
+        """
+        file_index = FilterIndex(parent=filter_index)
+        file_index.add_all(StreamingEvaluationRunner._truths(file_to_be_evaluated))
+        return file_index
+
+    @staticmethod
+    def _truths(file_to_be_evaluated: str) -> List[Tuple[str, str, str]]:
+        """Get the truths of the prediction file. An up-to-date sidecar index is used if it exists, else the truth
+        lines are scanned (without parsing candidates).
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+            The prediction file.
+
+        Returns
+        -------
+        List[Tuple[str, str, str]]
+            The truths.
+        """
+        try:
+            return PredictionIndex.load(file_to_be_evaluated).truths()
+        except (OSError, ValueError):
+            return PredictionIndex.build(
+                file_to_be_evaluated, is_write_index=False
+            ).truths()
+
+    def _signature(self) -> Dict:
+        stat = os.stat(self.file_to_be_evaluated)
+        return {
+            "file": os.path.abspath(self.file_to_be_evaluated),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hits_at": self.hits_at,
+            "start_byte": self.start_byte,
+            "end_byte": self.end_byte,
+            "is_keep_ranks": self.is_keep_ranks,
+        }
+
+    def _load_checkpoint(self) -> Tuple[RankAccumulator, Union[int, None]]:
+        """Loads the checkpoint if there is a valid one.
+
+        Returns
+        -------
+        Tuple[RankAccumulator, Union[int, None]]
+            The accumulator and the byte offset at which the evaluation continues (None if there is no checkpoint).
+        """
+        if self.checkpoint_file is None or not os.path.isfile(self.checkpoint_file):
+            return RankAccumulator(self.hits_at), None
+        with open(self.checkpoint_file, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if (
+            checkpoint.get("version") != StreamingEvaluationRunner._CHECKPOINT_VERSION
+            or checkpoint.get("signature") != self._signature()
+        ):
+            logger.warning(
+                f"Ignoring checkpoint {self.checkpoint_file}: it belongs to another file or configuration."
+            )
+            return RankAccumulator(self.hits_at), None
+        if self.is_keep_ranks and not os.path.isfile(self.checkpoint_file + ".ranks"):
+            logger.warning(
+                f"Ignoring checkpoint {self.checkpoint_file}: its ranks file is missing."
+            )
+            return RankAccumulator(self.hits_at), None
+        if self.is_keep_ranks:
+            self._load_ranks(checkpoint["ranks_size"])
+        logger.info(
+            f"Resuming evaluation of {self.file_to_be_evaluated} at byte {checkpoint['offset']}"
+        )
+        return (
+            RankAccumulator.from_state(checkpoint["accumulator"]),
+            checkpoint["offset"],
+        )
+
+    def _write_checkpoint(self, accumulator: RankAccumulator, offset: int) -> None:
+        """Writes the checkpoint atomically (a crash while writing never corrupts the previous checkpoint).
+
+        Parameters
+        ----------
+        accumulator : RankAccumulator
+            The accumulated ranks.
+        offset : int
+            Byte offset of the first record that is not contained in the accumulator.
+        """
+        if self.checkpoint_file is None:
+            return
+        checkpoint = {
+            "version": StreamingEvaluationRunner._CHECKPOINT_VERSION,
+            "signature": self._signature(),
+            "offset": offset,
+            "accumulator": accumulator.to_state(),
+        }
+        if self.is_keep_ranks:
+            # the ranks file is committed by the checkpoint that references its size
+            self._append_ranks()
+            checkpoint["ranks_size"] = self._checkpointed_ranks_size
+        temporary_file = self.checkpoint_file + ".tmp"
+        with open(temporary_file, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(temporary_file, self.checkpoint_file)
+
+    def _load_ranks(self, ranks_size: int) -> None:
+        """Restores the ranks of the checkpoint. Ranks that were appended after the last checkpoint (i.e. by an
+        interrupted run) are removed from the ranks file.
+
+        Parameters
+        ----------
+        ranks_size : int
+            Number of bytes of the ranks file that belong to the checkpoint.
+        """
+        with open(self.checkpoint_file + ".ranks", "r+b") as f:
+            f.truncate(ranks_size)
+            self.ranks = [json.loads(line) for line in f]
+        self._checkpointed_ranks = len(self.ranks)
+        self._checkpointed_ranks_size = ranks_size
+
+    def _append_ranks(self) -> None:
+        """Appends the ranks since the last checkpoint to the ranks file."""
+        ranks_file = self.checkpoint_file + ".ranks"
+        # a new evaluation replaces the ranks file of an earlier one
+        with open(ranks_file, "ab" if self._checkpointed_ranks_size else "wb") as f:
+            f.writelines(
+                (json.dumps(ranks) + "\n").encode("utf-8")
+                for ranks in self.ranks[self._checkpointed_ranks :]
+            )
+            f.flush()
+            os.fsync(f.fileno())
+            self._checkpointed_ranks_size = f.tell()
+        self._checkpointed_ranks = len(self.ranks)
+
+
+class StreamingEvaluator:
+    """Counterpart of Evaluator that uses the StreamingEvaluationRunner (one pass for filtered and non-filtered
+    results, constant memory, optional checkpointing).
+    """
+
+    @staticmethod
+    def calculate_results(
+        file_to_be_evaluated: str,
+        data_set: DataSet,
+        n: int = 10,
+        checkpoint_file: str = None,
+        checkpoint_interval: int = 100000,
+        is_calculate_adjusted_metrics: bool = False,
+    ) -> EvaluatorResult:
+        """Given the file_to_be_evaluated and a data_set, this method calculates the filtered and non-filtered
+        results.
+
+        Parameters
+        ----------
+        file_to_be_evaluated : str
+        data_set : DataSet
+        n : int
+            Hits@n. This parameter specifies the n. Default value 10.
+        checkpoint_file : str
+            If given, the evaluation is checkpointed to this file and resumed from it.
+        checkpoint_interval : int
+            Number of records after which a checkpoint is written.
+        is_calculate_adjusted_metrics : bool
+            If True, the chance-adjusted metrics are calculated in addition (see AdjustedMetrics).
+
+        Returns
+        -------
+        EvaluatorResult
+            The result data structure.
+        """
+        accumulator = StreamingEvaluationRunner(
+            file_to_be_evaluated=file_to_be_evaluated,
+            data_set=data_set,
+            hits_at=[n],
+            checkpoint_file=checkpoint_file,
+            checkpoint_interval=checkpoint_interval,
+        ).run()
+        result = accumulator.to_result(
+            evaluated_file=file_to_be_evaluated,
+            test_set_size=len(data_set.test_set()),
+            n=n,
+        )
+        if is_calculate_adjusted_metrics:
+            from kbc_evaluation.adjusted import AdjustedMetrics
+
+            AdjustedMetrics.add_to_result(result, data_set)
+        return result
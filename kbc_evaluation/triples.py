@@ -0,0 +1,431 @@
+import array
+import json
+import logging
+import os
+from collections.abc import Sequence
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# the splits of a dataset
+SPLITS = ("train", "valid", "test")
+
+
+def default_cache_directory(name: str) -> str:
+    """Get the default cache directory for the integer encoded splits of a dataset.
+
+    The cache root can be configured via the environment variable KBC_EVALUATION_CACHE
+    (default: ~/.cache/kbc_evaluation).
+
+    Parameters
+    ----------
+    name : str
+        Name of the dataset (used as sub directory).
+
+    Returns
+    -------
+    str
+        The cache directory.
+    """
+    root = os.environ.get(
+        "KBC_EVALUATION_CACHE",
+        os.path.join(os.path.expanduser("~"), ".cache", "kbc_evaluation"),
+    )
+    return os.path.join(root, name)
+
+
+class TripleStore:
+    """Integer encoded, memory-mapped representation of the splits of a dataset.
+
+    On first access, the tab separated split files are streamed once and encoded into int32 arrays of shape (n, 3)
+    (head id, relation id, tail id) which are cached as .npy files together with the entity and relation
+    vocabularies. Subsequent accesses memory-map the cached arrays, i.e., splits are only paged in when they are used.
+    The cache is rebuilt automatically if one of the split files changes.
+    """
+
+    _META_FILE = "meta.json"
+    _ENTITIES_FILE = "entities.txt"
+    _RELATIONS_FILE = "relations.txt"
+
+    def __init__(self, split_paths: Dict[str, str], cache_directory: str):
+        """Constructor. Nothing is read or encoded before the first access.
+
+        Parameters
+        ----------
+        split_paths : Dict[str, str]
+            Maps each split ("train", "valid", "test") to the path of its tab separated file.
+        cache_directory : str
+            Directory in which the encoded splits are cached.
+        """
+        self.split_paths = split_paths
+        self.cache_directory = cache_directory
+        self._arrays = {}
+        self._entities = None
+        self._relations = None
+        self._entity_ids = None
+        self._relation_ids = None
+
+    def split(self, split: str) -> "numpy.ndarray":
+        """Get the encoded split as memory-mapped array.
+
+        Parameters
+        ----------
+        split : str
+            "train", "valid", or "test".
+
+        Returns
+        -------
+        numpy.ndarray
+            Read-only int32 array of shape (n, 3).
+        """
+        if split not in self._arrays:
+            import numpy as np
+
+            self._ensure_encoded()
+            self._arrays[split] = np.load(
+                os.path.join(self.cache_directory, split + ".npy"), mmap_mode="r"
+            )
+        return self._arrays[split]
+
+    def entities(self) -> List[str]:
+        """Get the entity vocabulary.
+
+        Returns
+        -------
+        List[str]
+            The entity labels; the position of a label is its ID.
+        """
+        if self._entities is None:
+            self._ensure_encoded()
+            self._entities = self._read_vocabulary(TripleStore._ENTITIES_FILE)
+        return self._entities
+
+    def relations(self) -> List[str]:
+        """Get the relation vocabulary.
+
+        Returns
+        -------
+        List[str]
+            The relation labels; the position of a label is its ID.
+        """
+        if self._relations is None:
+            self._ensure_encoded()
+            self._relations = self._read_vocabulary(TripleStore._RELATIONS_FILE)
+        return self._relations
+
+    def entity_ids(self) -> Dict[str, int]:
+        """Get the mapping from entity label to ID.
+
+        Returns
+        -------
+        Dict[str, int]
+            The mapping.
+        """
+        if self._entity_ids is None:
+            self._entity_ids = {e: i for i, e in enumerate(self.entities())}
+        return self._entity_ids
+
+    def relation_ids(self) -> Dict[str, int]:
+        """Get the mapping from relation label to ID.
+
+        Returns
+        -------
+        Dict[str, int]
+            The mapping.
+        """
+        if self._relation_ids is None:
+            self._relation_ids = {r: i for i, r in enumerate(self.relations())}
+        return self._relation_ids
+
+    def degrees(self, split: str = "train") -> "numpy.ndarray":
+        """Get the degree of every entity in the given split (number of triples in which the entity is head or
+        tail). The degrees are calculated once and cached next to the encoded splits.
+
+        Parameters
+        ----------
+        split : str
+            "train", "valid", or "test".
+
+        Returns
+        -------
+        numpy.ndarray
+            Read-only int32 array; position: entity ID.
+        """
+        key = "degrees_" + split
+        if key not in self._arrays:
+            import numpy as np
+
+            self._ensure_encoded()
+            degrees_file = os.path.join(self.cache_directory, key + ".npy")
+            if not os.path.isfile(degrees_file):
+                triples = self.split(split)
+                degrees = np.bincount(
+                    triples[:, 0], minlength=len(self.entities())
+                ) + np.bincount(triples[:, 2], minlength=len(self.entities()))
+                self._write_atomically(
+                    degrees_file, lambda f: np.save(f, degrees.astype(np.int32))
+                )
+            self._arrays[key] = np.load(degrees_file, mmap_mode="r")
+        return self._arrays[key]
+
+    def domains_and_ranges(self, split: str = "train") -> Dict[str, "numpy.ndarray"]:
+        """Get the observed domain (head entities) and range (tail entities) of every relation in the given split as
+        sorted ID arrays in compressed sparse row layout: the domain of relation r is
+        domain_ids[domain_offsets[r]:domain_offsets[r + 1]] (likewise for the range). The arrays are calculated once
+        and cached next to the encoded splits.
+
+        Parameters
+        ----------
+        split : str
+            "train", "valid", or "test".
+
+        Returns
+        -------
+        Dict[str, numpy.ndarray]
+            Keys: domain_offsets, domain_ids, range_offsets, range_ids.
+        """
+        key = "constraints_" + split
+        if key not in self._arrays:
+            import numpy as np
+
+            self._ensure_encoded()
+            constraints_file = os.path.join(self.cache_directory, key + ".npz")
+            if not os.path.isfile(constraints_file):
+                triples = np.asarray(self.split(split), dtype=np.int64)
+                entities = max(len(self.entities()), 1)
+                arrays = {}
+                for name, column in (("domain", 0), ("range", 2)):
+                    # unique (relation, entity) pairs, sorted by relation and entity
+                    pairs = np.unique(triples[:, 1] * entities + triples[:, column])
+                    arrays[name + "_offsets"] = np.searchsorted(
+                        pairs // entities, np.arange(len(self.relations()) + 1)
+                    ).astype(np.int64)
+                    arrays[name + "_ids"] = (pairs % entities).astype(np.int32)
+                self._write_atomically(
+                    constraints_file, lambda f: np.savez(f, **arrays)
+                )
+            with np.load(constraints_file) as data:
+                self._arrays[key] = {name: data[name] for name in data.files}
+        return self._arrays[key]
+
+    def candidate_set_sizes(self, split: str = "test") -> "numpy.ndarray":
+        """Get the sizes of the filtered candidate sets of the prediction tasks of the given split: the number of
+        entities minus the true entities (in any split) of the task, the gold entity excluded. The sizes are
+        calculated once and cached next to the encoded splits.
+
+        Parameters
+        ----------
+        split : str
+            "train", "valid", or "test".
+
+        Returns
+        -------
+        numpy.ndarray
+            Read-only int64 array of shape (n, 2): per triple of the split, the size for the head prediction and
+            the size for the tail prediction.
+        """
+        key = "candidates_" + split
+        if key not in self._arrays:
+            import numpy as np
+
+            self._ensure_encoded()
+            sizes_file = os.path.join(self.cache_directory, key + ".npy")
+            if not os.path.isfile(sizes_file):
+                entities = len(self.entities())
+                true_triples = np.unique(
+                    np.concatenate(
+                        [
+                            np.asarray(self.split(name), dtype=np.int64)
+                            for name in ("train", "valid", "test")
+                        ]
+                    ),
+                    axis=0,
+                )
+                triples = np.asarray(self.split(split), dtype=np.int64)
+                sizes = np.zeros((len(triples), 2), dtype=np.int64)
+                for column, anchor in ((0, 2), (1, 0)):
+                    # number of true entities per task, task key: (relation, anchor)
+                    task_keys, counts = np.unique(
+                        true_triples[:, 1] * entities + true_triples[:, anchor],
+                        return_counts=True,
+                    )
+                    positions = np.searchsorted(
+                        task_keys, triples[:, 1] * entities + triples[:, anchor]
+                    )
+                    sizes[:, column] = entities - counts[positions] + 1
+                self._write_atomically(sizes_file, lambda f: np.save(f, sizes))
+            self._arrays[key] = np.load(sizes_file, mmap_mode="r")
+        return self._arrays[key]
+
+    def sequence(self, split: str) -> "TripleSequence":
+        """Get the split as lazy sequence of string triples.
+
+        Parameters
+        ----------
+        split : str
+            "train", "valid", or "test".
+
+        Returns
+        -------
+        TripleSequence
+            The sequence.
+        """
+        return TripleSequence(self, split)
+
+    def ensure_encoded(self) -> None:
+        """Encodes the splits now if there is no (up-to-date) cache, e.g. before starting processes that share
+        the cache (otherwise, each of them would encode the splits itself).
+        """
+        self._ensure_encoded()
+
+    def _ensure_encoded(self) -> None:
+        """Encodes the splits if there is no (up-to-date) cache."""
+        signature = self._signature()
+        meta_file = os.path.join(self.cache_directory, TripleStore._META_FILE)
+        if os.path.isfile(meta_file):
+            with open(meta_file, "r", encoding="utf-8") as f:
+                if json.load(f) == signature:
+                    return
+        self._encode(signature)
+
+    def _encode(self, signature: Dict) -> None:
+        """Streams the split files once and writes the encoded cache.
+
+        Parameters
+        ----------
+        signature : Dict
+            The signature of the split files that is persisted to detect stale caches.
+        """
+        import numpy as np
+
+        logger.info(f"Encoding triples into {self.cache_directory}")
+        os.makedirs(self.cache_directory, exist_ok=True)
+        for split in SPLITS:
+            # derived arrays of an outdated encoding
+            for derived_file in (
+                f"degrees_{split}.npy",
+                f"constraints_{split}.npz",
+                f"candidates_{split}.npy",
+            ):
+                derived_file = os.path.join(self.cache_directory, derived_file)
+                if os.path.isfile(derived_file):
+                    os.remove(derived_file)
+        entity_ids = {}
+        relation_ids = {}
+        for split in SPLITS:
+            encoded = array.array("i")
+            with open(self.split_paths[split], "r", encoding="utf-8") as f:
+                for line in f:
+                    tokens = line.rstrip("\n").split("\t")
+                    if len(tokens) != 3:
+                        logger.error(f"Skipping invalid triple in {split}: {tokens}")
+                        continue
+                    encoded.append(entity_ids.setdefault(tokens[0], len(entity_ids)))
+                    encoded.append(
+                        relation_ids.setdefault(tokens[1], len(relation_ids))
+                    )
+                    encoded.append(entity_ids.setdefault(tokens[2], len(entity_ids)))
+            triples = np.frombuffer(encoded, dtype=np.int32).reshape(-1, 3)
+            self._write_atomically(
+                os.path.join(self.cache_directory, split + ".npy"),
+                lambda f: np.save(f, triples),
+            )
+        for file_name, ids in (
+            (TripleStore._ENTITIES_FILE, entity_ids),
+            (TripleStore._RELATIONS_FILE, relation_ids),
+        ):
+            self._write_atomically(
+                os.path.join(self.cache_directory, file_name),
+                lambda f: f.writelines((token + "\n").encode("utf-8") for token in ids),
+            )
+
+        # the meta file is written last so that an interrupted encoding is never considered valid
+        self._write_atomically(
+            os.path.join(self.cache_directory, TripleStore._META_FILE),
+            lambda f: f.write(json.dumps(signature).encode("utf-8")),
+        )
+        self._arrays = {}
+        self._entities = None
+        self._relations = None
+        self._entity_ids = None
+        self._relation_ids = None
+
+    def _signature(self) -> Dict:
+        """Get the signature of the split files (path, size, modification time).
+
+        Returns
+        -------
+        Dict
+            The signature.
+        """
+        result = {}
+        for split in SPLITS:
+            stat = os.stat(self.split_paths[split])
+            result[split] = [
+                os.path.abspath(self.split_paths[split]),
+                stat.st_size,
+                stat.st_mtime_ns,
+            ]
+        return result
+
+    @staticmethod
+    def _write_atomically(file_to_write: str, write) -> None:
+        """Writes a cache file via a temporary file that replaces it. Processes that encode the same dataset
+        concurrently (e.g. the shards of ShardedEvaluation) therefore never read a partially written file.
+
+        Parameters
+        ----------
+        file_to_write : str
+            The cache file.
+        write
+            Function that writes the content to the given binary file object.
+        """
+        # one temporary file per process
+        temporary_file = f"{file_to_write}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_file, "wb") as f:
+                write(f)
+            os.replace(temporary_file, file_to_write)
+        finally:
+            if os.path.isfile(temporary_file):
+                os.remove(temporary_file)
+
+    def _read_vocabulary(self, file_name: str) -> List[str]:
+        with open(
+            os.path.join(self.cache_directory, file_name), "r", encoding="utf-8"
+        ) as f:
+            return [line.rstrip("\n") for line in f]
+
+
+class TripleSequence(Sequence):
+    """Read-only sequence view of an encoded split that yields triples as List[str] (like DataSet.test_set()).
+    Labels are only materialized for the triples that are accessed.
+    """
+
+    # number of rows that are converted at once while iterating
+    _CHUNK_SIZE = 65536
+
+    def __init__(self, store: TripleStore, split: str):
+        self._store = store
+        self._split = split
+
+    def __len__(self) -> int:
+        return len(self._store.split(self._split))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        h, r, t = self._store.split(self._split)[index].tolist()
+        return [
+            self._store.entities()[h],
+            self._store.relations()[r],
+            self._store.entities()[t],
+        ]
+
+    def __iter__(self) -> Iterator[List[str]]:
+        triples = self._store.split(self._split)
+        entities = self._store.entities()
+        relations = self._store.relations()
+        for start in range(0, len(triples), TripleSequence._CHUNK_SIZE):
+            for h, r, t in triples[start : start + TripleSequence._CHUNK_SIZE].tolist():
+                yield [entities[h], relations[r], entities[t]]
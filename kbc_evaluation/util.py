@@ -3,9 +3,6 @@ import os
 
 from kbc_evaluation.dataset import DataSet, ParsedSet
 
-
-logconf_file = os.path.join(os.path.dirname(__file__), "log.conf")
-logging.config.fileConfig(fname=logconf_file, disable_existing_loggers=False)
 logger = logging.getLogger(__name__)
 
 # making sure that the relative path works
@@ -21,6 +18,7 @@ class Util:
         is_apply_filtering: bool = True,
         top_predictions: int = 10,
         number_of_triples: int = 100,
+        memory_budget: int = None,
     ) -> None:
         """Method to write human-understandable predictions.
 
@@ -38,6 +36,9 @@ class Util:
             Out of the predictions, the top N of the predictions.
         number_of_triples : int
             The number of triples to be evaluated (in most cases 100 or 1000 may be sufficient).
+        memory_budget : int
+            If given, candidate lists beyond this (estimated) number of bytes are spilled to disk while parsing
+            (see SpillingPredictions).
 
         Returns
         -------
@@ -48,6 +49,7 @@ class Util:
             is_apply_filtering=is_apply_filtering,
             is_stop_early=False,
             data_set=data_set,
+            memory_budget=memory_budget,
         )
 
         definitions_map = data_set.definitions_map()
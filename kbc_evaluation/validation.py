@@ -0,0 +1,314 @@
+import logging
+from typing import Dict, List, Set, Tuple
+
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.reader import BackgroundRecordReader
+
+logger = logging.getLogger(__name__)
+
+_HEADS_PREFIX = b"\tHeads: "
+_TAILS_PREFIX = b"\tTails: "
+
+# bytes that may follow a concept in a predictions line (separator, confidence suffix, line break)
+_CONCEPT_ENDS = (b" ", b"_{", b"\n", b"\r")
+
+
+def contains_concept(line: bytes, start: int, concept: bytes) -> bool:
+    """Checks whether the concept is one of the predictions of the line without splitting the line.
+
+    Parameters
+    ----------
+    line : bytes
+        A heads or tails line.
+    start : int
+        Offset of the first prediction (length of the prefix).
+    concept : bytes
+        The concept.
+
+    Returns
+    -------
+    bool
+        True if the concept is predicted (with or without confidence).
+    """
+    position = line.find(concept, start)
+    while position >= 0:
+        end = position + len(concept)
+        if (position == start or line[position - 1] == 32) and (
+            end == len(line) or line.startswith(_CONCEPT_ENDS, end)
+        ):
+            return True
+        position = line.find(concept, position + 1)
+    return False
+
+
+class ValidationReport:
+    """Object holding the problems that were found in a prediction file. Counts are complete, examples are limited
+    to max_examples per problem type. Record numbers start at 0 (the truth line of record i is line 3 * i + 1).
+    """
+
+    def __init__(self, file_to_be_validated: str, max_examples: int):
+        self.file_to_be_validated = file_to_be_validated
+        self.max_examples = max_examples
+        self.records = 0
+
+        # key: problem type, value: number of occurrences
+        self.counts = {
+            "malformed_records": 0,
+            "duplicate_truths": 0,
+            "missing_test_triples": 0,
+            "extra_triples": 0,
+            "unknown_entities": 0,
+            "gold_heads_not_predicted": 0,
+            "gold_tails_not_predicted": 0,
+        }
+
+        # key: problem type, value: examples (up to max_examples)
+        self.examples = {problem: [] for problem in self.counts}
+
+    @property
+    def is_valid(self) -> bool:
+        """True if the file can be evaluated without losing test triples: all records are well-formed, there are
+        no duplicates, and every test triple has a record.
+        """
+        return (
+            self.counts["malformed_records"] == 0
+            and self.counts["duplicate_truths"] == 0
+            and self.counts["missing_test_triples"] == 0
+        )
+
+    def add(self, problem: str, example) -> None:
+        """Counts a problem and keeps the example if there are fewer than max_examples.
+
+        Parameters
+        ----------
+        problem : str
+            The problem type (key of counts).
+        example
+            JSON serializable description of the occurrence.
+        """
+        self.counts[problem] += 1
+        if len(self.examples[problem]) < self.max_examples:
+            self.examples[problem].append(example)
+
+    def log_summary(self) -> None:
+        """Logs the problems (errors for problems that change the evaluation result, else warnings)."""
+        for problem, count in self.counts.items():
+            if count == 0:
+                continue
+            message = (
+                f"{self.file_to_be_validated}: {count} {problem.replace('_', ' ')} "
+                f"(e.g. {self.examples[problem][:3]})"
+            )
+            if problem in (
+                "malformed_records",
+                "duplicate_truths",
+                "missing_test_triples",
+            ):
+                logger.error(message)
+            else:
+                logger.warning(message)
+
+    def to_dict(self) -> Dict:
+        """Get the report as JSON serializable dictionary.
+
+        Returns
+        -------
+        Dict
+            The report.
+        """
+        values = dict(vars(self))
+        values["is_valid"] = self.is_valid
+        return values
+
+
+class PredictionValidator:
+    """Preflight check of a prediction file against a dataset. The file is scanned at bytes level: candidate lists
+    are not built (the gold concepts are searched in the raw lines), so that the check runs at about I/O speed and
+    problems surface before a long evaluation starts.
+
+    Reported problems: malformed records (truth lines that are not triples, missing or invalid heads/tails lines,
+    an incomplete last record), duplicate truths, test triples without record, records whose truth is not in the
+    test set, entities and relations of truths that do not occur in the dataset (each unknown concept is reported
+    once), and gold concepts that do not occur in the candidate lists (these tasks are ignored by mean_rank).
+    Optionally, all candidates are checked against the entities of the dataset (this requires splitting the
+    candidate lines).
+    """
+
+    def __init__(
+        self,
+        data_set: DataSet,
+        max_examples: int = 20,
+        is_check_candidates: bool = False,
+    ):
+        """Constructor.
+
+        Parameters
+        ----------
+        data_set : DataSet
+            The dataset for which predictions have been made.
+        max_examples : int
+            Maximal number of examples per problem type in the report.
+        is_check_candidates : bool
+            True if every candidate shall be checked against the entities of the dataset.
+        """
+        self.data_set = data_set
+        self.max_examples = max_examples
+        self.is_check_candidates = is_check_candidates
+        self._test_triples = None
+        self._entities = None
+        self._relations = None
+
+    def _load_data_set(self) -> None:
+        """Collects the test triples, entities, and relations of the dataset (as bytes)."""
+        self._test_triples = [
+            tuple(part.encode("utf-8") for part in triple)
+            for triple in self.data_set.test_set()
+        ]
+        self._entities = set()
+        self._relations = set()
+        for split in (
+            self.data_set.train_set(),
+            self.data_set.valid_set(),
+            self.data_set.test_set(),
+        ):
+            for h, r, t in split:
+                self._entities.add(h.encode("utf-8"))
+                self._entities.add(t.encode("utf-8"))
+                self._relations.add(r.encode("utf-8"))
+
+    def validate(self, file_to_be_validated: str) -> ValidationReport:
+        """Scans the file.
+
+        Parameters
+        ----------
+        file_to_be_validated : str
+            The prediction file.
+
+        Returns
+        -------
+        ValidationReport
+            The found problems.
+        """
+        if self._test_triples is None:
+            self._load_data_set()
+        report = ValidationReport(file_to_be_validated, self.max_examples)
+        test_triples = set(self._test_triples)
+        truths: Set[Tuple[bytes, bytes, bytes]] = set()
+        # unknown concepts are reported once
+        unknown: Set[bytes] = set()
+        offset = 0
+        with BackgroundRecordReader(file_to_be_validated) as reader:
+            for truth_line, heads_line, tails_line in reader:
+                record_number = report.records
+                report.records += 1
+                offset += len(truth_line) + len(heads_line) + len(tails_line)
+                truth = truth_line.rstrip(b"\r\n").split(b" ")
+                problems = self._record_problems(truth, heads_line, tails_line)
+                if problems:
+                    report.add(
+                        "malformed_records",
+                        {"record": record_number, "problems": problems},
+                    )
+                    continue
+                h, r, t = truth
+                triple = (h, r, t)
+                if triple in truths:
+                    report.add("duplicate_truths", PredictionValidator._decode(triple))
+                truths.add(triple)
+                if triple not in test_triples:
+                    report.add("extra_triples", PredictionValidator._decode(triple))
+                for concept, known in (
+                    (h, self._entities),
+                    (r, self._relations),
+                    (t, self._entities),
+                ):
+                    PredictionValidator._check_concept(
+                        report, unknown, record_number, concept, known
+                    )
+                if not contains_concept(heads_line, len(_HEADS_PREFIX), h):
+                    report.add(
+                        "gold_heads_not_predicted", PredictionValidator._decode(triple)
+                    )
+                if not contains_concept(tails_line, len(_TAILS_PREFIX), t):
+                    report.add(
+                        "gold_tails_not_predicted", PredictionValidator._decode(triple)
+                    )
+                if self.is_check_candidates:
+                    self._check_candidates(
+                        report, unknown, record_number, heads_line, tails_line
+                    )
+
+        with open(file_to_be_validated, "rb") as f:
+            # lines of an incomplete last record are not returned by the reader
+            f.seek(offset)
+            remainder = f.read()
+        if remainder.strip():
+            report.add(
+                "malformed_records",
+                {"record": report.records, "problems": ["incomplete record"]},
+            )
+        for triple in self._test_triples:
+            if triple not in truths:
+                report.add("missing_test_triples", PredictionValidator._decode(triple))
+        return report
+
+    @staticmethod
+    def _record_problems(
+        truth: List[bytes], heads_line: bytes, tails_line: bytes
+    ) -> List[str]:
+        """Get the format problems of a record.
+
+        Returns
+        -------
+        List[str]
+            Descriptions of the problems (empty if the record is well-formed).
+        """
+        problems = []
+        if len(truth) != 3 or not all(truth):
+            problems.append(
+                f"truth is not a triple: {b' '.join(truth).decode('utf-8', 'replace')}"
+            )
+        if not heads_line.startswith(_HEADS_PREFIX):
+            problems.append("invalid heads line")
+        if not tails_line.startswith(_TAILS_PREFIX):
+            problems.append("invalid tails line")
+        return problems
+
+    def _check_candidates(
+        self,
+        report: ValidationReport,
+        unknown: Set[bytes],
+        record_number: int,
+        heads_line: bytes,
+        tails_line: bytes,
+    ) -> None:
+        """Reports candidates that are not entities of the dataset."""
+        for line, prefix in ((heads_line, _HEADS_PREFIX), (tails_line, _TAILS_PREFIX)):
+            for candidate in line[len(prefix) :].rstrip(b"\r\n").split(b" "):
+                suffix = candidate.find(b"_{")
+                if suffix >= 0 and candidate.endswith(b"}"):
+                    candidate = candidate[:suffix]
+                PredictionValidator._check_concept(
+                    report, unknown, record_number, candidate, self._entities
+                )
+
+    @staticmethod
+    def _check_concept(
+        report: ValidationReport,
+        unknown: Set[bytes],
+        record_number: int,
+        concept: bytes,
+        known: Set[bytes],
+    ) -> None:
+        """Reports the concept if it is not known (only at its first occurrence)."""
+        if concept in known or concept in unknown:
+            return
+        unknown.add(concept)
+        report.add(
+            "unknown_entities",
+            {"record": record_number, "concept": concept.decode("utf-8")},
+        )
+
+    @staticmethod
+    def _decode(triple: Tuple[bytes, bytes, bytes]) -> List[str]:
+        return [part.decode("utf-8") for part in triple]
@@ -0,0 +1,378 @@
+import json
+import logging
+import struct
+from typing import Iterator, Sequence, Tuple
+
+from kbc_evaluation.compression import (
+    DEFAULT_BUFFER_SIZE,
+    infer_compression,
+    open_binary_reader,
+    open_binary_writer,
+)
+
+logger = logging.getLogger(__name__)
+
+FORMAT_TEXT = "text"
+FORMAT_BINARY = "binary"
+
+# binary format: magic, JSON header (length prefixed), records
+# record: head, relation, tail, number of heads, number of tails (int32), flags (uint32, bit 0: scores),
+# head IDs, tail IDs (int32), [head scores, tail scores (float32)]; all little endian
+_MAGIC = b"KBCPRED1"
+_RECORD_HEADER = struct.Struct("<iiiiiI")
+_FLAG_SCORES = 1
+
+
+class PredictionWriter:
+    """Writes prediction files from batches of integer candidate IDs (e.g. the arg-sorted score matrix of a model).
+
+    The text format is the evaluation file format that is read by ParsedSet (truth line, heads line, tails line;
+    scores are written as confidence suffixes). The binary format stores the IDs (and scores) as fixed-width
+    integers (floats) together with the vocabulary; use iterate_binary_predictions or convert_to_text to read it.
+
+    Records are formatted per batch and written in large blocks through a buffered, optionally compressed stream.
+    """
+
+    def __init__(
+        self,
+        file_to_write: str,
+        entities: Sequence[str],
+        relations: Sequence[str],
+        file_format: str = FORMAT_TEXT,
+        compression: str = "infer",
+        top_k: int = None,
+        score_digits: int = 6,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ):
+        """Constructor. Opens the file.
+
+        Parameters
+        ----------
+        file_to_write : str
+            The file that shall be written.
+        entities : Sequence[str]
+            Entity labels, indexed by entity ID (e.g. TripleStore.entities()).
+        relations : Sequence[str]
+            Relation labels, indexed by relation ID (e.g. TripleStore.relations()).
+        file_format : str
+            "text" or "binary".
+        compression : str
+            None, "gzip", "zstd", or "infer" to infer the compression from the file suffix.
+        top_k : int
+            If given, only the first top_k candidates are written, extended up to the position of the correct
+            concept if it is ranked lower. The ranks (raw and filtered) of the written file are, hence, identical to
+            the ranks of the complete candidate lists.
+        score_digits : int
+            Number of decimal places of the scores in the text format (at least 1).
+        buffer_size : int
+            Size of the write buffer in bytes.
+        """
+        import numpy
+
+        if file_format not in (FORMAT_TEXT, FORMAT_BINARY):
+            raise ValueError(f"Unknown file format: {file_format}")
+        if score_digits < 1:
+            # confidences are only recognized by the parser if they contain a decimal point
+            raise ValueError("score_digits must be at least 1.")
+        for label in list(entities) + list(relations):
+            if " " in label or "\n" in label or "\t" in label:
+                raise ValueError(f"Labels must not contain whitespace: {label!r}")
+        if compression == "infer":
+            compression = infer_compression(file_to_write)
+
+        self.file_to_write = file_to_write
+        self.file_format = file_format
+        self.top_k = top_k
+        self.records = 0
+        self._entities = list(entities)
+        self._relations = list(relations)
+        self._entity_labels = numpy.array(self._entities, dtype=object)
+        self._candidate_format = "{}_{{{:.%df}}}" % score_digits
+        self._file = open_binary_writer(file_to_write, compression, buffer_size)
+        if file_format == FORMAT_BINARY:
+            header = json.dumps(
+                {"entities": self._entities, "relations": self._relations}
+            ).encode("utf-8")
+            self._file.write(_MAGIC + struct.pack("<Q", len(header)) + header)
+
+    @staticmethod
+    def for_data_set(file_to_write: str, data_set, **kwargs) -> "PredictionWriter":
+        """Creates a writer that uses the IDs of the triple store of the given dataset (see DataSet.triple_store).
+
+        Parameters
+        ----------
+        file_to_write : str
+            The file that shall be written.
+        data_set : DataSet
+            The dataset (DataSet or CustomDataSet).
+        kwargs
+            Further arguments of the constructor.
+
+        Returns
+        -------
+        PredictionWriter
+            The writer.
+        """
+        triple_store = data_set.triple_store()
+        return PredictionWriter(
+            file_to_write,
+            entities=triple_store.entities(),
+            relations=triple_store.relations(),
+            **kwargs,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        """Flushes and closes the file."""
+        if not self._file.closed:
+            self._file.close()
+
+    def write_batch(
+        self,
+        triples,
+        head_candidates,
+        tail_candidates,
+        head_scores=None,
+        tail_scores=None,
+    ) -> None:
+        """Writes a batch of records.
+
+        Parameters
+        ----------
+        triples
+            Array-like of shape (batch, 3): head, relation, and tail ID of the test triples.
+        head_candidates
+            Array-like of shape (batch, candidates) with the entity IDs of the head predictions, best first.
+            Rows may differ in length if a list of 1D arrays is given.
+        tail_candidates
+            Like head_candidates for the tail predictions.
+        head_scores
+            Optional scores of the head candidates (same shape as head_candidates).
+        tail_scores
+            Optional scores of the tail candidates (same shape as tail_candidates).
+        """
+        import numpy
+
+        triples = numpy.asarray(triples, dtype=numpy.int64).reshape(-1, 3)
+        if (head_scores is None) != (tail_scores is None):
+            raise ValueError("Scores must be given for heads and tails or not at all.")
+        if len(head_candidates) != len(triples) or len(tail_candidates) != len(triples):
+            raise ValueError("The number of candidate rows must match the triples.")
+
+        chunks = []
+        for i, (h, r, t) in enumerate(triples.tolist()):
+            heads, heads_scores = self._cut(
+                head_candidates[i], None if head_scores is None else head_scores[i], h
+            )
+            tails, tails_scores = self._cut(
+                tail_candidates[i], None if tail_scores is None else tail_scores[i], t
+            )
+            if self.file_format == FORMAT_TEXT:
+                record = (
+                    f"{self._entities[h]} {self._relations[r]} {self._entities[t]}\n"
+                    f"\tHeads: {self._format_candidates(heads, heads_scores)}\n"
+                    f"\tTails: {self._format_candidates(tails, tails_scores)}\n"
+                )
+                chunks.append(record.encode("utf-8"))
+            else:
+                chunks.append(
+                    _RECORD_HEADER.pack(
+                        h,
+                        r,
+                        t,
+                        len(heads),
+                        len(tails),
+                        0 if heads_scores is None else _FLAG_SCORES,
+                    )
+                )
+                chunks.append(heads.astype("<i4").tobytes())
+                chunks.append(tails.astype("<i4").tobytes())
+                if heads_scores is not None:
+                    chunks.append(heads_scores.astype("<f4").tobytes())
+                    chunks.append(tails_scores.astype("<f4").tobytes())
+        self._file.write(b"".join(chunks))
+        self.records += len(triples)
+
+    def write(
+        self,
+        triple: Sequence[int],
+        heads: Sequence[int],
+        tails: Sequence[int],
+        head_scores: Sequence[float] = None,
+        tail_scores: Sequence[float] = None,
+    ) -> None:
+        """Writes a single record (see write_batch; prefer batches for throughput).
+
+        Parameters
+        ----------
+        triple : Sequence[int]
+            Head, relation, and tail ID.
+        heads : Sequence[int]
+            The head candidate IDs, best first.
+        tails : Sequence[int]
+            The tail candidate IDs, best first.
+        head_scores : Sequence[float]
+            Optional scores of the head candidates.
+        tail_scores : Sequence[float]
+            Optional scores of the tail candidates.
+        """
+        self.write_batch(
+            [triple],
+            [heads],
+            [tails],
+            None if head_scores is None else [head_scores],
+            None if tail_scores is None else [tail_scores],
+        )
+
+    def _cut(self, candidates, scores, gold: int) -> Tuple:
+        """Applies top_k to the candidates of one task.
+
+        Parameters
+        ----------
+        candidates
+            The candidate IDs.
+        scores
+            The scores of the candidates or None.
+        gold : int
+            ID of the correct concept.
+
+        Returns
+        -------
+        Tuple
+            The (possibly shortened) candidates and scores as NumPy arrays (scores may be None).
+        """
+        import numpy
+
+        candidates = numpy.asarray(candidates)
+        if scores is not None:
+            scores = numpy.asarray(scores, dtype=numpy.float64)
+            if len(scores) != len(candidates):
+                raise ValueError("Scores and candidates differ in length.")
+            if not numpy.all(numpy.isfinite(scores)):
+                raise ValueError("Scores must be finite.")
+        if self.top_k is not None and len(candidates) > self.top_k:
+            end = self.top_k
+            position = numpy.flatnonzero(candidates == gold)
+            if len(position) > 0 and position[0] >= end:
+                end = position[0] + 1
+            candidates = candidates[:end]
+            if scores is not None:
+                scores = scores[:end]
+        return candidates, scores
+
+    def _format_candidates(self, candidates, scores) -> str:
+        """Formats the candidates of one task for the text format.
+
+        Parameters
+        ----------
+        candidates
+            The candidate IDs.
+        scores
+            The scores of the candidates or None.
+
+        Returns
+        -------
+        str
+            The space separated candidates (with confidence suffixes if scores are given).
+        """
+        labels = self._entity_labels[candidates]
+        if scores is None:
+            return " ".join(labels)
+        return " ".join(map(self._candidate_format.format, labels, scores.tolist()))
+
+
+def iterate_binary_predictions(
+    file_path: str, compression: str = "infer", score_digits: int = 6
+) -> Iterator[Tuple[str, str, str]]:
+    """Reads a binary prediction file (see PredictionWriter) and yields its records in the text format.
+
+    Parameters
+    ----------
+    file_path : str
+        The binary prediction file.
+    compression : str
+        None, "gzip", "zstd", or "infer" to infer the compression from the file suffix.
+    score_digits : int
+        Number of decimal places of the scores.
+
+    Returns
+    -------
+    Iterator[Tuple[str, str, str]]
+        Per record: truth line, heads line, tails line (including line breaks). The records can be evaluated
+        directly with StreamingEvaluationRunner.evaluate_records.
+    """
+    import numpy
+
+    if compression == "infer":
+        compression = infer_compression(file_path)
+    candidate_format = "{}_{{{:.%df}}}" % score_digits
+    with open_binary_reader(file_path, compression) as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"Not a binary prediction file: {file_path}")
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size).decode("utf-8"))
+        entities = header["entities"]
+        relations = header["relations"]
+        entity_labels = numpy.array(entities, dtype=object)
+
+        def candidates_line(prefix: str, ids, scores) -> str:
+            labels = entity_labels[ids]
+            if scores is None:
+                return prefix + " ".join(labels) + "\n"
+            return (
+                prefix
+                + " ".join(map(candidate_format.format, labels, scores.tolist()))
+                + "\n"
+            )
+
+        while True:
+            record_header = f.read(_RECORD_HEADER.size)
+            if not record_header:
+                break
+            if len(record_header) != _RECORD_HEADER.size:
+                raise ValueError(f"Truncated binary prediction file: {file_path}")
+            h, r, t, heads_count, tails_count, flags = _RECORD_HEADER.unpack(
+                record_header
+            )
+            heads = numpy.frombuffer(f.read(4 * heads_count), dtype="<i4")
+            tails = numpy.frombuffer(f.read(4 * tails_count), dtype="<i4")
+            heads_scores = tails_scores = None
+            if flags & _FLAG_SCORES:
+                heads_scores = numpy.frombuffer(f.read(4 * heads_count), dtype="<f4")
+                tails_scores = numpy.frombuffer(f.read(4 * tails_count), dtype="<f4")
+            yield (
+                f"{entities[h]} {relations[r]} {entities[t]}\n",
+                candidates_line("\tHeads: ", heads, heads_scores),
+                candidates_line("\tTails: ", tails, tails_scores),
+            )
+
+
+def convert_to_text(
+    binary_file: str, text_file: str, compression: str = "infer"
+) -> None:
+    """Converts a binary prediction file into the text format that can be evaluated by Evaluator.
+
+    Parameters
+    ----------
+    binary_file : str
+        The binary prediction file.
+    text_file : str
+        The text file that shall be written.
+    compression : str
+        Compression of the text file: None, "gzip", "zstd", or "infer" to infer it from the file suffix.
+    """
+    if compression == "infer":
+        compression = infer_compression(text_file)
+    with open_binary_writer(text_file, compression) as f:
+        batch = []
+        for record in iterate_binary_predictions(binary_file):
+            batch.extend(record)
+            if len(batch) >= 3 * 4096:
+                f.write("".join(batch).encode("utf-8"))
+                batch = []
+        f.write("".join(batch).encode("utf-8"))
@@ -12,4 +12,5 @@ setup(
     package_data={
         "kbc_evaluation": ["log.conf", "datasets/fb15k/*", "datasets/wn18/*"]
     },
+    entry_points={"console_scripts": ["kbc-eval=kbc_evaluation.cli:main"]},
 )
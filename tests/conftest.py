@@ -0,0 +1,73 @@
+import os
+import shutil
+from typing import List
+
+import pytest
+
+from kbc_evaluation.registry import DataSetRegistry
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CUSTOM_DATA_SET_DIRECTORY = "./tests/test_resources/custom_data_set"
+
+
+@pytest.fixture(autouse=True)
+def repository_directory(monkeypatch) -> str:
+    """Runs every test in the repository directory: the test resources are referenced relative to it."""
+    monkeypatch.chdir(REPOSITORY_DIRECTORY)
+    return REPOSITORY_DIRECTORY
+
+
+@pytest.fixture(autouse=True, scope="session")
+def cache_directory(tmp_path_factory) -> str:
+    """Caches the encoded splits of the datasets in a temporary directory instead of ~/.cache/kbc_evaluation.
+    The triple stores are shared by all tests, hence the session scope.
+    """
+    directory = str(tmp_path_factory.mktemp("cache"))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("KBC_EVALUATION_CACHE", directory)
+        yield directory
+
+
+@pytest.fixture
+def make_custom_data_set(tmp_path):
+    """Factory that registers a copy of the custom test dataset in tmp_path (encoded splits cached in tmp_path).
+    The registered datasets are unregistered after the test.
+
+    The factory takes the name of the dataset, optional training triples (tab separated lines), whether the
+    triples replace (is_replace_train) or extend the training split, and an optional definitions file.
+    """
+    names = []
+
+    def make(
+        name: str,
+        train: List[str] = (),
+        is_replace_train: bool = False,
+        definitions_file: str = None,
+    ):
+        directory = tmp_path / name
+        shutil.copytree(CUSTOM_DATA_SET_DIRECTORY, str(directory))
+        if train or is_replace_train:
+            with open(
+                str(directory / "train.txt"),
+                "w" if is_replace_train else "a",
+                encoding="utf-8",
+            ) as f:
+                f.writelines(line + "\n" for line in train)
+        names.append(name)
+        return DataSetRegistry.register(
+            name=name,
+            directory=str(directory),
+            definitions_file=definitions_file,
+            cache_directory=str(tmp_path / ("cache_" + name)),
+            is_overwrite=True,
+        )
+
+    yield make
+    for name in names:
+        DataSetRegistry.unregister(name)
+
+
+@pytest.fixture
+def custom_data_set(make_custom_data_set):
+    """The custom test dataset (see tests/test_resources/custom_data_set)."""
+    return make_custom_data_set("custom")
@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+from kbc_evaluation.adjusted import AdjustedMetrics
+from kbc_evaluation.evaluator import Evaluator, EvaluatorResult
+from kbc_evaluation.streaming import StreamingEvaluator
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+def write_records(file_path: str, truths: list) -> str:
+    """Writes the records of TEST_FILE with the given truths (space separated) to file_path."""
+    with open(TEST_FILE, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    with open(file_path, "w", encoding="utf-8") as f:
+        for i in range(0, len(lines) - 2, 3):
+            if lines[i].rstrip("\n") in truths:
+                f.writelines(lines[i : i + 3])
+    return file_path
+
+
+@pytest.fixture
+def result(custom_data_set) -> EvaluatorResult:
+    return Evaluator.calculate_results(
+        TEST_FILE, custom_data_set, n=10, is_calculate_adjusted_metrics=True
+    )
+
+
+def test_candidate_set_sizes(custom_data_set):
+    store = custom_data_set.triple_store()
+    # 13 entities; e.g. the heads of (?, M, N) are P, Z, and L
+    assert len(store.entities()) == 13
+    assert store.candidate_set_sizes().tolist() == [
+        [12, 12],
+        [13, 12],
+        [12, 13],
+        [11, 11],
+    ]
+    assert os.path.isfile(os.path.join(store.cache_directory, "candidates_test.npy"))
+
+
+def test_expectations():
+    expected = AdjustedMetrics.expectations([1, 3], n=1)
+    assert expected["mean_rank"] == pytest.approx(1.5)
+    assert expected["hits_at_n"] == pytest.approx(2 / 3)
+    assert expected["reciprocal_mean_rank"] == pytest.approx((1 + 11 / 18) / 2)
+
+
+def test_completed_metrics():
+    # the second task is not ranked: the gold entity is one of the 3 candidates after the 2 listed ones
+    observed = AdjustedMetrics.completed_metrics([1, 0], [4, 2], [3, 5], n=1)
+    assert observed["mean_rank"] == pytest.approx((1 + 4) / 2)
+    assert observed["hits_at_n"] == pytest.approx(1 / 2)
+    assert observed["reciprocal_mean_rank"] == pytest.approx((1 + 47 / 180) / 2)
+    # without listed candidates, the completion is the expectation of a random ranking
+    assert AdjustedMetrics.completed_metrics(
+        [0, 0], [0, 0], [1, 3], n=1
+    ) == pytest.approx(AdjustedMetrics.expectations([1, 3], n=1))
+
+
+def test_adjusted_results(result):
+    assert 0 < result.filtered_adjusted_mean_rank < 1
+    assert result.filtered_adjusted_mean_rank <= result.non_filtered_adjusted_mean_rank
+    assert 0 < result.filtered_adjusted_hits_at_n <= 1
+    assert 0 < result.non_filtered_adjusted_reciprocal_mean_rank <= 1
+
+
+def test_task_ranks(custom_data_set):
+    tasks = AdjustedMetrics.task_ranks(TEST_FILE, custom_data_set)
+    ranks, listed = tasks["raw"]
+    # A B C: the heads B C D F G A ... rank A sixth, the tails A B C ... rank C third
+    assert ranks[0].tolist() == [6, 3]
+    assert listed[0].tolist() == [10, 10]
+    ranks, listed = tasks["filtered"]
+    assert (ranks <= tasks["raw"][0]).all()
+    assert (listed <= tasks["raw"][1]).all()
+
+
+def test_partial_coverage_is_not_rewarded(custom_data_set, tmp_path):
+    partial_file = write_records(str(tmp_path / "partial.txt"), ["A B C"])
+    result = Evaluator.calculate_results(
+        partial_file, custom_data_set, n=10, is_calculate_adjusted_metrics=True
+    )
+    # 2 of 8 tasks are ranked, the other tasks are as good as a random ranking
+    assert result.filtered_adjusted_mean_rank > 0.5
+    assert result.non_filtered_adjusted_mean_rank > 0.5
+    assert (
+        result.filtered_adjusted_mean_rank
+        > Evaluator.calculate_results(
+            TEST_FILE, custom_data_set, n=10, is_calculate_adjusted_metrics=True
+        ).filtered_adjusted_mean_rank
+    )
+
+
+def test_no_coverage_is_random(custom_data_set, tmp_path):
+    # G H I is a training triple: no prediction task of the test set is covered
+    other_file = write_records(str(tmp_path / "other.txt"), ["G H I"])
+    result = Evaluator.calculate_results(
+        other_file, custom_data_set, n=10, is_calculate_adjusted_metrics=True
+    )
+    for prefix in ("filtered_", "non_filtered_"):
+        assert getattr(result, prefix + "adjusted_mean_rank") == pytest.approx(1)
+        assert getattr(result, prefix + "adjusted_hits_at_n") == pytest.approx(0)
+        assert getattr(
+            result, prefix + "adjusted_reciprocal_mean_rank"
+        ) == pytest.approx(0)
+
+
+def test_streaming_equal_to_evaluator(custom_data_set, result):
+    streaming = StreamingEvaluator.calculate_results(
+        TEST_FILE, custom_data_set, n=10, is_calculate_adjusted_metrics=True
+    )
+    assert vars(streaming) == vars(result)
+
+
+def test_results_without_adjusted_metrics_can_be_restored(custom_data_set):
+    # e.g. results stored by earlier versions
+    values = Evaluator.calculate_results(TEST_FILE, custom_data_set, n=10).to_dict()
+    for key in list(values):
+        if "adjusted" in key:
+            del values[key]
+    assert EvaluatorResult.from_dict(values).filtered_adjusted_mean_rank is None
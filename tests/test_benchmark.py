@@ -0,0 +1,44 @@
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+
+from kbc_evaluation.benchmark import Benchmark
+
+
+def test_startup():
+    result = Benchmark.startup(repetitions=1)
+    assert result["min_seconds"] > 0
+    assert result["heavy_modules"] == []
+
+
+def test_no_logging_configuration_on_import():
+    """Importing the package must not configure logging or write global.log."""
+    script = (
+        "import logging\n"
+        "import kbc_evaluation.evaluator, kbc_evaluation.util\n"
+        "assert logging.getLogger().handlers == []\n"
+    )
+    if os.path.isfile("global.log"):
+        os.remove("global.log")
+    subprocess.run([sys.executable, "-c", script], check=True)
+    assert not os.path.isfile("global.log")
+
+
+def test_ingestion():
+    result = Benchmark.ingestion(records=200, candidates=10, repetitions=1)
+    assert result["readline_records_per_second"] > 0
+    assert result["background_reader_records_per_second"] > 0
+
+
+def test_parser_allocations():
+    result = Benchmark.parser_allocations(records=100, candidates=100)
+    # the mapped engine does not materialize candidates, the streaming engine creates a str object per candidate
+    assert result["mapped_bytes_per_candidate"] < 16
+    assert result["streaming_bytes_per_candidate"] > 16
+    # the allocation per candidate does not depend on the number of records
+    assert Benchmark.parser_allocations(records=200, candidates=100)[
+        "streaming_bytes_per_candidate"
+    ] == pytest.approx(result["streaming_bytes_per_candidate"], rel=0.2)
@@ -0,0 +1,76 @@
+import json
+import os
+
+from kbc_evaluation.cli import main, parse_size
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.evaluator import Evaluator
+from kbc_evaluation.index import PredictionIndex
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+def read_output(output_file: str) -> str:
+    with open(output_file, "r", encoding="utf8") as f:
+        return f.read()
+
+
+def test_parse_size():
+    assert parse_size("512") == 512
+    assert parse_size("2k") == 2048
+    assert parse_size("1.5G") == 3 * 1024**3 // 2
+
+
+def test_evaluate(tmp_path):
+    output_file = str(tmp_path / "output")
+    expected = [
+        Evaluator.calculate_results(TEST_FILE, DataSet.WN18, n=n).to_dict()
+        for n in (1, 10)
+    ]
+    for options in (
+        [],
+        ["--mode", "in-memory", "--memory-budget", "1K"],
+        ["--workers", "2"],
+    ):
+        exit_code = main(
+            ["evaluate", TEST_FILE, "--data-set", "wn18", "--hits-at", "1", "10"]
+            + ["--format", "json", "--output", output_file]
+            + options
+        )
+        assert exit_code == 0
+        assert json.loads(read_output(output_file)) == expected
+
+    assert (
+        main(
+            ["batch", TEST_FILE, TEST_FILE, "--data-set", "wn18"]
+            + ["--format", "csv", "--output", output_file]
+        )
+        == 0
+    )
+    assert len(read_output(output_file).splitlines()) == 3
+
+
+def test_validate_and_index(tmp_path):
+    output_file = str(tmp_path / "output")
+    # the test file covers only a few test triples of WN18
+    exit_code = main(
+        ["validate", TEST_FILE, "--data-set", "wn18", "--output", output_file]
+    )
+    assert exit_code == 1
+    assert json.loads(read_output(output_file))["records"] == 9
+
+    index_file = str(tmp_path / "index")
+    assert main(["index", TEST_FILE, "--index-file", index_file]) == 0
+    assert len(PredictionIndex.load(TEST_FILE, index_file)) == 9
+    assert not os.path.isfile(PredictionIndex.default_index_file(TEST_FILE))
+
+
+def test_benchmark_output(tmp_path, monkeypatch):
+    from kbc_evaluation.benchmark import Benchmark
+
+    # the benchmarks themselves are tested in test_benchmark
+    results = [{"benchmark": "startup", "seconds": 0.1}, {"benchmark": "ingestion"}]
+    monkeypatch.setattr(Benchmark, "run_all", lambda data_set: results)
+    output_file = str(tmp_path / "benchmark.jsonl")
+    assert main(["benchmark", "--output", output_file]) == 0
+    with open(output_file, "r", encoding="utf8") as f:
+        assert [json.loads(line) for line in f] == results
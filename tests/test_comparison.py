@@ -0,0 +1,79 @@
+import os
+
+from kbc_evaluation.comparison import PairedComparison
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.index import PredictionIndex
+from kbc_evaluation.streaming import StreamingEvaluationRunner
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+def read_records(file_path: str):
+    with open(file_path, "r", encoding="utf8") as f:
+        lines = f.read().split("\n")
+    return ["\n".join(lines[i : i + 3]) + "\n" for i in range(0, len(lines), 3)]
+
+
+def test_compare_with_itself():
+    result = PairedComparison(TEST_FILE, TEST_FILE, DataSet.WN18).compare()
+    assert result.records_a == result.records_b == result.paired_records == 9
+    for mode in ["raw", "filtered"]:
+        assert result.modes[mode]["tasks"] == 18
+        assert result.modes[mode]["ties"] == 18
+        assert result.modes[mode]["mrr_delta"] == 0
+    assert result.regressions == [] and result.improvements == []
+
+
+def test_compare(tmp_path):
+    file_b = str(tmp_path / "b.txt")
+    records = read_records(TEST_FILE)
+    # record 0: correct head A moves from position 6 to position 1
+    records[0] = records[0].replace("Heads: B C D F G A", "Heads: A B C D F G")
+    # record 2: correct tail F moves from position 1 to position 3
+    records[2] = records[2].replace("\tTails: F G H", "\tTails: G H F")
+    with open(file_b, "w", encoding="utf8") as f:
+        f.write("".join(records))
+
+    filter_index = FilterIndex.from_data_set(DataSet.WN18)
+    result = PairedComparison(
+        TEST_FILE, file_b, DataSet.WN18, filter_index=filter_index
+    ).compare(top_n=1)
+    filtered = result.modes["filtered"]
+    assert (filtered["wins"], filtered["losses"], filtered["ties"]) == (1, 1, 16)
+    assert result.relations["filtered"]["B"]["wins"] == 1
+    assert result.relations["filtered"]["E"]["losses"] == 1
+    assert result.regressions[0]["triple"] == ["D", "E", "F"]
+    assert len(result.improvements) == 1
+    assert result.improvements[0]["triple"] == ["A", "B", "C"]
+    assert result.improvements[0]["filtered_rank_b"] == 1
+
+    # the MRR delta equals the difference of separate evaluations
+    reciprocal_sums = []
+    for file_path in [TEST_FILE, file_b]:
+        statistics = (
+            StreamingEvaluationRunner(
+                file_path, DataSet.WN18, filter_index=filter_index
+            )
+            .run()
+            .to_state()["statistics"]["filtered"]
+        )
+        reciprocal_sums.append(
+            statistics["heads"]["reciprocal_sum"]
+            + statistics["tails"]["reciprocal_sum"]
+        )
+    assert (
+        abs(filtered["mrr_delta"] * 18 - (reciprocal_sums[1] - reciprocal_sums[0]))
+        < 1e-9
+    )
+
+    # records in another order are joined via the index
+    with open(file_b, "w", encoding="utf8") as f:
+        f.write("".join(reversed(records)))
+    joined = PairedComparison(
+        TEST_FILE, file_b, DataSet.WN18, filter_index=filter_index
+    ).compare(top_n=1)
+    assert joined.paired_records == 9
+    assert joined.modes == result.modes
+    assert joined.improvements == result.improvements
+    assert os.path.isfile(PredictionIndex.default_index_file(file_b))
@@ -0,0 +1,53 @@
+import os
+
+from kbc_evaluation.constraints import TypeConstraints
+from kbc_evaluation.evaluator import EvaluationRunner, Evaluator
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+def test_type_constraints(custom_data_set):
+    constraints = TypeConstraints(custom_data_set)
+    assert constraints.domain("M") == {"P", "L"}
+    assert constraints.range("M") == {"N", "O"}
+    assert constraints.domain("B") == {"W"}
+    assert constraints.range("E") == {"F"}
+    # relations without training triples are not constrained
+    assert constraints.domain("X") is None
+    assert os.path.isfile(
+        os.path.join(
+            custom_data_set.triple_store().cache_directory, "constraints_train.npz"
+        )
+    )
+
+
+def test_constrained_evaluation(custom_data_set):
+    ranks = EvaluationRunner(
+        TEST_FILE, custom_data_set, is_apply_type_constraints=True
+    ).task_ranks()
+    # A B C: all candidates before the gold concepts are incompatible with B
+    assert ranks[("A", "B", "C")] == (1, 1)
+    # L M N (heads: A B P L): P is in the domain of M
+    assert ranks[("L", "M", "N")][0] == 2
+
+    # filtering and constraints in the same pass: P M N is true
+    filtered_ranks = EvaluationRunner(
+        TEST_FILE,
+        custom_data_set,
+        is_apply_filtering=True,
+        is_apply_type_constraints=True,
+    ).task_ranks()
+    assert filtered_ranks[("L", "M", "N")][0] == 1
+    for truth, (head_rank, tail_rank) in filtered_ranks.items():
+        assert head_rank is None or head_rank <= ranks[truth][0]
+        assert tail_rank is None or tail_rank <= ranks[truth][1]
+
+    constrained = Evaluator.calculate_results(
+        TEST_FILE, custom_data_set, n=1, is_apply_type_constraints=True
+    )
+    unconstrained = Evaluator.calculate_results(TEST_FILE, custom_data_set, n=1)
+    assert constrained.filtered_hits_at_n_all > unconstrained.filtered_hits_at_n_all
+    assert (
+        constrained.non_filtered_reciprocal_mean_rank_all
+        > unconstrained.non_filtered_reciprocal_mean_rank_all
+    )
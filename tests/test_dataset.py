@@ -1,4 +1,5 @@
 from kbc_evaluation.dataset import DataSet
+import gzip
 import os.path
 
 
@@ -53,6 +54,37 @@ class TestDataSet:
                 assert content[10].count("> <") == 2  # random line test
             os.remove(file_to_write)
 
+    def test_write_training_file(self):
+        """Tests the compressed NT export and the TSV export with integer IDs."""
+        data_set = DataSet.WN18
+        expected_lines = len(data_set.train_set()) + len(data_set.valid_set())
+
+        file_to_write = "./wn18_test_file.nt.gz"
+        DataSet.write_training_file_nt(
+            data_set=data_set,
+            file_to_write=file_to_write,
+            iri_prefix="http://wordnet-rdf.princeton.edu/wn30/",
+        )
+        with gzip.open(file_to_write, mode="rt", encoding="utf8") as f:
+            content = f.readlines()
+        assert len(content) == expected_lines
+        assert content[10].startswith("<http://wordnet-rdf.princeton.edu/wn30/")
+        assert content[10].count("> <") == 2
+        os.remove(file_to_write)
+
+        file_to_write = "./wn18_test_file.tsv"
+        DataSet.write_training_file(
+            data_set=data_set, file_to_write=file_to_write, file_format="tsv"
+        )
+        with open(file_to_write, mode="r", encoding="utf8") as f:
+            content = f.readlines()
+        assert len(content) == expected_lines
+        assert content[0] == "0\t0\t1\n"
+        with open(file_to_write + ".entities.tsv", mode="r", encoding="utf8") as f:
+            assert f.readline() == "0\t" + data_set.train_set()[0][0] + "\n"
+        for suffix in ["", ".entities.tsv", ".relations.tsv"]:
+            os.remove(file_to_write + suffix)
+
     def test_file_parser(self):
         """The following is tested
         - whether the given files can be parsed.
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from kbc_evaluation.degrees import DegreeBuckets
+from kbc_evaluation.ranks import RankDump
+from kbc_evaluation.streaming import StreamingEvaluationRunner
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+@pytest.fixture
+def dump(custom_data_set) -> RankDump:
+    runner = StreamingEvaluationRunner(TEST_FILE, custom_data_set, is_keep_ranks=True)
+    runner.run()
+    return RankDump.from_rows(runner.ranks, TEST_FILE, len(custom_data_set.test_set()))
+
+
+def test_degrees(custom_data_set):
+    store = custom_data_set.triple_store()
+    degrees = store.degrees()
+    entity_ids = store.entity_ids()
+    assert degrees[entity_ids["A"]] == 1
+    assert degrees[entity_ids["D"]] == 0
+    assert len(degrees) == len(store.entities())
+    assert store.degrees("test")[entity_ids["A"]] == 2
+
+
+def test_degrees_are_cached(custom_data_set):
+    store = custom_data_set.triple_store()
+    store.degrees()
+    assert os.path.isfile(os.path.join(store.cache_directory, "degrees_train.npy"))
+
+
+def test_degree_buckets(custom_data_set, dump):
+    # gold degrees of the test set: 0 (D) and 1 (all others)
+    buckets = DegreeBuckets(custom_data_set, quantiles=[0.25])
+    assert buckets.labels() == ["<=0", ">0"]
+    result = buckets.evaluate(dump, n=1)
+    assert [bucket["tasks"] for bucket in result] == [4, 14]
+    assert sum(bucket["hits_at_n"] for bucket in result) == dump.hits_at(1, True)[2]
+    # degree 0: the tasks with gold D, Q, and Z
+    assert result[0]["found"] == 4
+    assert result[0]["hits_at_n_relative"] == 0.5
+    assert abs(result[0]["mean_reciprocal_rank"] - 2 / 3) < 1e-12
+
+
+def test_single_bucket_reproduces_overall_metrics(custom_data_set, dump):
+    single = dump.by_degree(custom_data_set, quantiles=[0.99], n=10)
+    assert len(single) == 2 and single[1]["tasks"] == 0
+    assert single[0]["hits_at_n"] == dump.hits_at(10, True)[2]
@@ -4,6 +4,7 @@ import pytest
 
 from kbc_evaluation.dataset import DataSet
 from kbc_evaluation.evaluator import EvaluationRunner, Evaluator
+from kbc_evaluation.progress import Progress
 
 
 class TestEvaluator:
@@ -121,6 +122,23 @@ class TestEvaluator:
         assert type(results.filtered_hits_at_n_tails) == int
         assert type(results.filtered_hits_at_n_heads) == int
 
+    def test_calculate_results_at(self):
+        test_file_path = "./tests/test_resources/eval_test_file_filtering.txt"
+        events = []
+        Progress.add_callback(events.append)
+        try:
+            results = Evaluator.calculate_results_at(
+                test_file_path, DataSet.WN18, hits_at=[1, 3, 10]
+            )
+        finally:
+            Progress.clear_callbacks()
+        # one non-filtered and one filtered parse for all n values
+        assert [e.stage for e in events if e.is_finished].count("parse") == 2
+        assert [vars(result) for result in results] == [
+            vars(Evaluator.calculate_results(test_file_path, DataSet.WN18, n=n))
+            for n in (1, 3, 10)
+        ]
+
     def test_hits_at_filtering_with_confidence(self):
         test_file_path = (
             "./tests/test_resources/eval_test_file_filtering_with_confidences.txt"
@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+from kbc_evaluation.evaluator import EvaluationRunner
+from kbc_evaluation.incremental import IncrementalFilterIndex
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+def labels(index: IncrementalFilterIndex) -> set:
+    entities = index.entities()
+    relations = index.relations()
+    return {
+        (entities[h], relations[r], entities[t]) for h, r, t in index.triples().tolist()
+    }
+
+
+@pytest.fixture
+def index(custom_data_set, tmp_path) -> IncrementalFilterIndex:
+    return IncrementalFilterIndex.from_data_set(
+        custom_data_set, str(tmp_path / "index"), compaction_ratio=10.0
+    )
+
+
+@pytest.fixture
+def updated_index(index, tmp_path) -> IncrementalFilterIndex:
+    """The index after two deltas: X M N added, P M N removed; then P M N re-added (X B Y added and removed)."""
+    index.apply_triples(
+        added=[["X", "M", "N"]], removed=[["P", "M", "N"], ["Y", "M", "N"]]
+    )
+    added_file = str(tmp_path / "added.txt")
+    removed_file = str(tmp_path / "removed.txt")
+    with open(added_file, "w", encoding="utf-8") as f:
+        f.write("P\tM\tN\nX\tB\tY\n")
+    with open(removed_file, "w", encoding="utf-8") as f:
+        f.write("X\tB\tY\n")
+    index.apply_delta(added_file=added_file, removed_file=removed_file)
+    return index
+
+
+def test_from_data_set(index):
+    assert len(index) == 11
+    assert index.generation == 0
+
+
+def test_equal_to_split_filtering(custom_data_set, index):
+    expected = EvaluationRunner(TEST_FILE, custom_data_set, is_apply_filtering=True)
+    runner = EvaluationRunner(
+        TEST_FILE,
+        custom_data_set,
+        is_apply_filtering=True,
+        filter_index=index.filter_index(),
+    )
+    assert runner.mean_rank() == expected.mean_rank()
+    assert runner.calculate_hits_at(1) == expected.calculate_hits_at(1)
+
+
+def test_apply_triples_updates_cached_filter_index(index):
+    # a delta with a new entity and a tombstone
+    filter_index = index.filter_index()
+    index.apply_triples(
+        added=[["X", "M", "N"]], removed=[["P", "M", "N"], ["Y", "M", "N"]]
+    )
+    assert len(index) == 11
+    assert filter_index.correct_heads("M", "N") == {"L", "Z", "X"}
+    assert index.filter_index(is_bytes=True).correct_heads(b"M", b"N") == {
+        b"L",
+        b"Z",
+        b"X",
+    }
+    assert index.generation == 1 and index.deltas == 1
+
+
+def test_apply_delta(updated_index):
+    # re-adding a removed statement; added and removed in the same delta: removed
+    updated_labels = labels(updated_index)
+    assert ("P", "M", "N") in updated_labels
+    assert ("X", "B", "Y") not in updated_labels
+    assert ("X", "M", "N") in updated_labels
+    assert len(updated_labels) == 12
+
+
+def test_snapshot_is_persisted(updated_index):
+    # base and deltas are folded on load
+    reopened = IncrementalFilterIndex(updated_index.directory)
+    assert reopened.generation == 2 and reopened.deltas == 2
+    assert labels(reopened) == labels(updated_index)
+    assert reopened.filter_index().correct_tails("P", "M") == {"N"}
+    assert len(reopened.kernel()._triples) == 12
+
+
+def test_compact(updated_index):
+    directory = updated_index.directory
+    updated_index.compact()
+    assert updated_index.deltas == 0
+    assert sorted(f for f in os.listdir(directory) if f.endswith((".npy", ".npz"))) == [
+        "base_00000002.npy"
+    ]
+    assert labels(IncrementalFilterIndex(directory)) == labels(updated_index)
+
+
+def test_automatic_compaction(updated_index):
+    expected_labels = labels(updated_index)
+    automatic = IncrementalFilterIndex(updated_index.directory, max_deltas=2)
+    automatic.apply_triples(removed=[["P", "M", "N"]])
+    assert automatic.deltas == 0 and automatic.generation == 3
+    automatic.apply_triples(added=[["P", "M", "N"]])
+    assert automatic.deltas == 1 and automatic.generation == 4
+    assert labels(IncrementalFilterIndex(updated_index.directory)) == expected_labels
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from kbc_evaluation.dataset import DataSet, ParsedSet
+from kbc_evaluation.index import PredictionIndex
+
+
+class TestPredictionIndex:
+    def test_build_and_read(self, tmp_path):
+        test_file_path = "./tests/test_resources/eval_test_file_filtering.txt"
+        index_file = str(tmp_path / "index.idx")
+        index = PredictionIndex.build(test_file_path, index_file=index_file)
+        assert os.path.isfile(index_file)
+        assert len(index) == 9
+        assert index.offset(0) == 0
+        assert index.relations() == ["B", "E", "H", "M"]
+        assert len(index.records_for_relation("M")) == 5
+        assert index.records_for_triple(("X", "Y", "Z")) == []
+
+        parsed = ParsedSet(file_to_be_evaluated=test_file_path, data_set=DataSet.WN18)
+        with index:
+            for truth, predictions in parsed.triple_predictions.items():
+                assert index.read_triple(truth) == predictions
+            for truth, predictions in index.read_relation("M"):
+                assert truth[1] == "M"
+                assert parsed.triple_predictions[truth] == predictions
+            assert index.read_triple(("X", "Y", "Z")) is None
+
+        # persisted index is equal to the built one
+        loaded = PredictionIndex.load(test_file_path, index_file=index_file)
+        assert loaded.truths() == index.truths()
+        assert [loaded.offset(i) for i in range(len(loaded))] == [
+            index.offset(i) for i in range(len(index))
+        ]
+
+    def test_stale_index(self, tmp_path):
+        test_file_path = "./tests/test_resources/eval_test_file.txt"
+        index_file = str(tmp_path / "stale.idx")
+        with open(index_file, "w", encoding="utf-8") as f:
+            f.write("#kbc_index\t1\t0\t0\n")
+        with pytest.raises(ValueError):
+            PredictionIndex.load(test_file_path, index_file=index_file)
+
+        # get rebuilds a stale index
+        index = PredictionIndex.get(test_file_path, index_file=index_file)
+        assert len(index) == 3
+        assert len(PredictionIndex.load(test_file_path, index_file=index_file)) == 3
+
+    def test_get_without_writable_location(self, tmp_path):
+        test_file_path = "./tests/test_resources/eval_test_file.txt"
+        # the directory of the index file does not exist: the index is kept in memory
+        index_file = str(tmp_path / "missing" / "index.idx")
+        index = PredictionIndex.get(test_file_path, index_file=index_file)
+        assert len(index) == 3
+        assert not os.path.exists(index_file)
@@ -0,0 +1,81 @@
+import json
+import os
+import pstats
+
+from kbc_evaluation.dataset import DataSet, ParsedSet
+from kbc_evaluation.evaluator import Evaluator
+from kbc_evaluation.instrumentation import Instrumentation
+
+
+class TestInstrumentation:
+    def test_disabled_by_default(self):
+        Instrumentation.reset()
+        assert not Instrumentation.enabled
+        with Instrumentation.stage("some_stage"):
+            Instrumentation.count("some_stage.records", 10)
+        snapshot = Instrumentation.snapshot()
+        assert snapshot["stages"] == {}
+        assert snapshot["counters"] == {}
+
+    def test_stages_and_counters(self):
+        test_file_path = "./tests/test_resources/eval_test_file_filtering.txt"
+
+        Instrumentation.enable()
+        try:
+            ParsedSet(
+                file_to_be_evaluated=test_file_path,
+                data_set=DataSet.WN18,
+                is_apply_filtering=True,
+            )
+        finally:
+            Instrumentation.disable()
+
+        snapshot = Instrumentation.snapshot()
+        for stage in ["parse", "parse.tokenize", "filtering", "filtering.index"]:
+            assert snapshot["stages"][stage]["calls"] == 1
+        assert snapshot["counters"]["parse.records"] == 9
+        assert snapshot["counters"]["parse.candidates"] == 180
+        assert snapshot["counters"]["parse.bytes_read"] == os.path.getsize(
+            test_file_path
+        )
+        assert snapshot["counters"]["filtering.records"] == 9
+        # see eval_test_file_filtering_readme.md: C, P, O, L, N, O, P, L are filtered
+        assert snapshot["counters"]["filtering.filtered_out"] == 8
+        assert "records_per_second" in snapshot["stages"]["parse"]
+        Instrumentation.reset()
+
+    def test_export(self, tmp_path):
+        test_file_path = "./tests/test_resources/eval_test_file.txt"
+        profile_file = str(tmp_path / "profile.prof")
+        json_file = str(tmp_path / "instrumentation.json")
+        prometheus_file = str(tmp_path / "instrumentation.prom")
+
+        Instrumentation.reset()
+        Instrumentation.enable()
+        try:
+            with Instrumentation.profile(profile_file):
+                Evaluator.calculate_results(
+                    file_to_be_evaluated=test_file_path, data_set=DataSet.WN18
+                )
+        finally:
+            Instrumentation.disable()
+
+        try:
+            Instrumentation.export_json(json_file)
+            with open(json_file, "r", encoding="utf-8") as f:
+                exported = json.load(f)
+            assert exported["stages"]["calculate_results"]["calls"] == 1
+            assert exported["stages"]["mean_rank"]["calls"] == 2
+
+            Instrumentation.export_prometheus(prometheus_file)
+            with open(prometheus_file, "r", encoding="utf-8") as f:
+                content = f.read()
+            assert 'kbc_evaluation_stage_calls_total{stage="hits_at"} 2' in content
+            assert (
+                'kbc_evaluation_count_total{stage="parse",counter="records"} 6'
+                in content
+            )
+
+            assert pstats.Stats(profile_file).total_calls > 0
+        finally:
+            Instrumentation.reset()
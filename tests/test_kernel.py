@@ -0,0 +1,79 @@
+import numpy as np
+
+from kbc_evaluation.dataset import DataSet, ParsedSet
+from kbc_evaluation.evaluator import EvaluationRunner
+from kbc_evaluation.kernel import FilterKernel
+
+TEST_FILES = [
+    ("./tests/test_resources/eval_test_file.txt", DataSet.WN18),
+    ("./tests/test_resources/eval_test_file_with_confidences.txt", DataSet.WN18),
+    ("./tests/test_resources/eval_test_file_filtering.txt", DataSet.WN18),
+    (
+        "./tests/test_resources/eval_test_file_filtering_with_confidences.txt",
+        DataSet.WN18,
+    ),
+    ("./tests/test_resources/freebase_filtering_example.txt", DataSet.FB15K),
+]
+
+
+def read_as_ids(file_path: str, data_set: DataSet):
+    """Parses a prediction file into ID arrays (labels unknown to the dataset get new IDs)."""
+    store = data_set.triple_store()
+    entity_ids = dict(store.entity_ids())
+    relation_ids = dict(store.relation_ids())
+    triples, heads, tails = [], [], []
+    with open(file_path, "r", encoding="utf8") as f:
+        lines = f.readlines()
+    for i in range(0, len(lines) - 2, 3):
+        truth, head_list, tail_list = ParsedSet.parse_record(*lines[i : i + 3])
+        h, r, t = truth
+        triples.append(
+            [
+                entity_ids.setdefault(h, len(entity_ids)),
+                relation_ids.setdefault(r, len(relation_ids)),
+                entity_ids.setdefault(t, len(entity_ids)),
+            ]
+        )
+        for candidates, target in ((head_list, heads), (tail_list, tails)):
+            target.append(
+                np.array(
+                    [entity_ids.setdefault(c, len(entity_ids)) for c in candidates]
+                )
+            )
+    labels = {i: label for label, i in entity_ids.items()}
+    relation_labels = {i: label for label, i in relation_ids.items()}
+    truths = [(labels[h], relation_labels[r], labels[t]) for h, r, t in triples]
+    return np.array(triples), heads, tails, truths
+
+
+def test_rank_batch():
+    # true statements: (0, 0, 1), (0, 0, 2), (3, 0, 2)
+    kernel = FilterKernel(np.array([[0, 0, 1], [0, 0, 2], [3, 0, 2]]))
+    candidates = np.array([[2, 4, 1, 5], [1, 2, 4, -1], [4, 5, -1, -1]])
+    raw, filtered = kernel.rank_batch(
+        "tails", [0, 0, 0], [0, 0, 0], [1, 4, 1], candidates
+    )
+    assert raw.tolist() == [3, 3, 0]
+    assert filtered.tolist() == [2, 1, 0]
+    # unknown task: nothing is filtered
+    raw, filtered = kernel.rank_batch("heads", [7], [0], [3], [[0, 3]])
+    assert raw.tolist() == [2] and filtered.tolist() == [2]
+    raw, filtered = kernel.rank_batch("heads", [2], [0], [3], [[0, 3]])
+    assert filtered.tolist() == [1]
+
+
+def test_equal_to_parsed_set_filtering():
+    for test_file_path, data_set in TEST_FILES:
+        triples, heads, tails, truths = read_as_ids(test_file_path, data_set)
+        kernel = FilterKernel.from_data_set(data_set)
+        kernel.add(triples)
+        for batch_size in (1, 2, 4096):
+            ranks = kernel.ranks(triples, heads, tails, batch_size=batch_size)
+            for prefix, is_apply_filtering in (("raw", False), ("filtered", True)):
+                expected = EvaluationRunner(
+                    test_file_path, data_set, is_apply_filtering=is_apply_filtering
+                ).task_ranks()
+                for i, truth in enumerate(truths):
+                    head_rank, tail_rank = expected[truth]
+                    assert ranks[prefix + "_head_rank"][i] == (head_rank or 0)
+                    assert ranks[prefix + "_tail_rank"][i] == (tail_rank or 0)
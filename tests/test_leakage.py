@@ -0,0 +1,96 @@
+import pytest
+
+from kbc_evaluation.ranks import RankDump
+from kbc_evaluation.streaming import StreamingEvaluationRunner
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+def rank_dump(data_set) -> RankDump:
+    runner = StreamingEvaluationRunner(TEST_FILE, data_set, is_keep_ranks=True)
+    runner.run()
+    return RankDump.from_rows(runner.ranks, TEST_FILE, len(data_set.test_set()))
+
+
+def truths() -> list:
+    with open(TEST_FILE, "r", encoding="utf-8") as f:
+        return [line.rstrip("\n").split(" ") for line in f if line[0] != "\t"]
+
+
+@pytest.fixture
+def leaking_data_set(make_custom_data_set):
+    # the custom dataset with leaking training triples: A H C (duplicate pair of the test triple A B C), N M L
+    # (inverse of the test triple L M N), W H C (B => H), and O M L (M is partly symmetric)
+    return make_custom_data_set(
+        "leakage", train=["A\tH\tC", "N\tM\tL", "W\tH\tC", "O\tM\tL"]
+    )
+
+
+def test_split_flags(leaking_data_set):
+    analysis = leaking_data_set.leakage_analysis()
+    # test set: A B C, A B D, D E F, L M N
+    flags = analysis.split_flags("test")
+    assert flags["duplicate"].tolist() == [True, False, False, False]
+    assert flags["inverse"].tolist() == [False, False, False, True]
+    assert flags["leaky"].tolist() == [True, False, False, True]
+    # the validation split is not leaking
+    assert not analysis.split_flags("valid")["leaky"].any()
+    # a triple of the training split is a duplicate of itself
+    assert analysis.split_flags("train")["duplicate"].all()
+
+
+def test_unknown_concepts_are_not_leaky(leaking_data_set):
+    assert not leaking_data_set.leakage_analysis().flags([[-1, 0, -1]])["leaky"].any()
+
+
+def test_relation_patterns(leaking_data_set):
+    analysis = leaking_data_set.leakage_analysis()
+    patterns = analysis.relation_patterns(threshold=0.5)
+    assert patterns["duplicate"] == [("B", "H", 1.0)]
+    assert patterns["inverse"] == [("M", "M", 0.5)]
+    assert analysis.relation_patterns(threshold=0.6)["inverse"] == []
+
+
+def test_by_leakage(leaking_data_set):
+    dump = rank_dump(leaking_data_set)
+    # the file also contains the training triples G H I, L M O, and P M N
+    assert leaking_data_set.leakage_analysis().dump_flags(dump)["leaky"].sum() == 5
+    results = dump.by_leakage(leaking_data_set, n=10)
+    assert results["leaky"].test_set_size == 5
+    assert results["non_leaky"].test_set_size == 4
+    assert (
+        results["leaky"].filtered_hits_at_n_all
+        + results["non_leaky"].filtered_hits_at_n_all
+        == dump.to_result(10).filtered_hits_at_n_all
+    )
+
+
+@pytest.mark.parametrize(
+    "is_everything_leaking, empty, non_empty",
+    [
+        # no training triple shares an entity pair with the file: nothing leaks
+        (False, "leaky", "non_leaky"),
+        # every truth of the file is a training triple: everything leaks
+        (True, "non_leaky", "leaky"),
+    ],
+)
+def test_by_leakage_with_empty_subsets(
+    make_custom_data_set, is_everything_leaking, empty, non_empty
+):
+    train = (
+        ["\t".join(truth) for truth in truths()]
+        if is_everything_leaking
+        else ["X\tB\tY"]
+    )
+    data_set = make_custom_data_set(
+        "leakage_" + empty, train=train, is_replace_train=True
+    )
+    dump = rank_dump(data_set)
+    results = dump.by_leakage(data_set, n=10)
+    assert results[empty].test_set_size == 0
+    assert results[empty].filtered_hits_at_n_all == 0
+    assert results[non_empty].test_set_size == len(truths())
+    assert (
+        results[non_empty].filtered_hits_at_n_all
+        == dump.to_result(10).filtered_hits_at_n_all
+    )
@@ -0,0 +1,64 @@
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.evaluator import Evaluator
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.mapped import (
+    MappedEvaluationRunner,
+    count_concepts,
+    find_concept,
+)
+from kbc_evaluation.streaming import StreamingEvaluationRunner
+
+TEST_FILES = [
+    ("./tests/test_resources/eval_test_file.txt", DataSet.WN18),
+    ("./tests/test_resources/eval_test_file_with_confidences.txt", DataSet.WN18),
+    ("./tests/test_resources/eval_test_file_filtering.txt", DataSet.WN18),
+    (
+        "./tests/test_resources/eval_test_file_filtering_with_confidences.txt",
+        DataSet.WN18,
+    ),
+    ("./tests/test_resources/freebase_filtering_example.txt", DataSet.FB15K),
+]
+
+
+def test_find_concept():
+    line = b"\tHeads: AB B_{0.5} A C B"
+    start = len(b"\tHeads: ")
+    assert find_concept(line, start, len(line), b"A") == line.index(b" A ") + 1
+    assert find_concept(line, start, len(line), b"B") == line.index(b"B_{")
+    assert find_concept(line, start, len(line), b"AB") == start
+    assert find_concept(line, start, len(line), b"D") == -1
+    # duplicates before the limit are counted, partial matches are not
+    limit = find_concept(line, start, len(line), b"C")
+    assert count_concepts(line, start, len(line), [b"B", b"A", b"X"], limit) == 2
+    assert count_concepts(line, start, len(line), [b"B"], len(line)) == 2
+
+
+def test_equal_to_streaming_runner():
+    for test_file_path, data_set in TEST_FILES:
+        expected = StreamingEvaluationRunner(
+            file_to_be_evaluated=test_file_path, data_set=data_set, is_keep_ranks=True
+        )
+        expected_accumulator = expected.run()
+        actual = MappedEvaluationRunner(
+            file_to_be_evaluated=test_file_path,
+            data_set=data_set,
+            filter_index=FilterIndex.from_data_set(data_set, is_bytes=True),
+            is_keep_ranks=True,
+        )
+        actual_accumulator = actual.run()
+        assert actual.ranks == expected.ranks
+        assert actual_accumulator.to_state() == expected_accumulator.to_state()
+
+
+def test_crlf_equal_to_evaluator(tmp_path):
+    for test_file_path, data_set in TEST_FILES:
+        crlf_file = str(tmp_path / "crlf.txt")
+        with open(test_file_path, "rb") as f, open(crlf_file, "wb") as g:
+            g.write(f.read().replace(b"\n", b"\r\n"))
+        expected = Evaluator.calculate_results(test_file_path, data_set, n=10)
+        actual = (
+            MappedEvaluationRunner(crlf_file, data_set, hits_at=[10])
+            .run()
+            .to_result(test_file_path, len(data_set.test_set()), 10)
+        )
+        assert vars(actual) == vars(expected)
@@ -0,0 +1,103 @@
+import logging
+import os
+
+import pytest
+
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.evaluator import EvaluationRunner
+from kbc_evaluation.progress import (
+    LoggingProgress,
+    Progress,
+    ProgressCallback,
+    ProgressEvent,
+)
+from kbc_evaluation.streaming import StreamingEvaluationRunner
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+class TestProgress:
+    def test_silent_without_terminal(self):
+        # the output of pytest is captured, i.e., stderr is not a terminal
+        Progress.clear_callbacks()
+        with Progress.stage("parse", total=10) as progress:
+            assert not progress.is_active
+            progress.update(5)
+
+    def test_callbacks(self):
+        events = []
+
+        def failing_callback(event: ProgressEvent) -> None:
+            raise ValueError("must not break the evaluation")
+
+        interval = Progress.interval
+        Progress.interval = 0.0
+        Progress.add_callback(events.append)
+        Progress.add_callback(failing_callback)
+        try:
+            runner = EvaluationRunner(
+                TEST_FILE, data_set=DataSet.WN18, is_apply_filtering=True
+            )
+            runner.mean_rank()
+            runner.calculate_hits_at(10)
+            StreamingEvaluationRunner(TEST_FILE, DataSet.WN18).run()
+        finally:
+            Progress.interval = interval
+            Progress.clear_callbacks()
+
+        stages = [event.stage for event in events if event.is_finished]
+        assert stages == ["parse", "filtering", "mean_rank", "hits_at", "streaming"]
+        final = {event.stage: event for event in events if event.is_finished}
+        file_size = os.path.getsize(TEST_FILE)
+        for stage in ("parse", "streaming"):
+            assert final[stage].unit == "bytes"
+            assert final[stage].done == final[stage].total == file_size
+            assert final[stage].records == 9
+        for stage in ("filtering", "mean_rank", "hits_at"):
+            assert final[stage].unit == "records"
+            assert final[stage].done == final[stage].total == 9
+        # intermediate events (interval 0: one per record)
+        parse_events = [event for event in events if event.stage == "parse"]
+        assert len(parse_events) == 10
+        assert [event.records for event in parse_events[:-1]] == list(range(1, 10))
+
+    def test_event(self):
+        event = ProgressEvent("parse", "bytes", 250, 1000, 5, 2.0)
+        assert event.rate == 125.0
+        assert event.records_per_second == 2.5
+        assert event.eta_seconds == 6.0
+        assert ProgressEvent("parse", "bytes", 0, None, 0, 0.0).eta_seconds is None
+
+    def test_logging_progress(self, caplog):
+        callback = LoggingProgress(interval=10.0)
+        with caplog.at_level(logging.INFO, logger="kbc_evaluation.progress"):
+            for seconds, is_finished in ((0.1, False), (1.0, False), (11.0, False)):
+                callback(
+                    ProgressEvent("parse", "bytes", 1, 10, 1, seconds, is_finished)
+                )
+            callback(ProgressEvent("parse", "bytes", 10, 10, 2, 12.0, True))
+        assert len(caplog.records) == 3
+        assert "ETA" in caplog.records[0].getMessage()
+        assert (
+            caplog.records[-1].getMessage() == "parse: 100.0% (2 records, 0 records/s)"
+        )
+
+    def test_callback_base_class(self):
+        with pytest.raises(TypeError):
+            ProgressCallback()
+
+        class Collector(ProgressCallback):
+            def __init__(self):
+                self.events = []
+
+            def __call__(self, event: ProgressEvent) -> None:
+                self.events.append(event)
+
+        collector = Collector()
+        Progress.add_callback(collector)
+        try:
+            with Progress.stage("parse", total=1) as progress:
+                progress.update(1)
+        finally:
+            Progress.clear_callbacks()
+        assert collector.events[-1].is_finished
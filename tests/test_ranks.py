@@ -0,0 +1,68 @@
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.evaluator import Evaluator
+from kbc_evaluation.ranks import RankDump
+from kbc_evaluation.streaming import StreamingEvaluationRunner
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+def test_rank_dump(tmp_path):
+    dump_file = str(tmp_path / "ranks.npz")
+    expected = Evaluator.calculate_results(
+        file_to_be_evaluated=TEST_FILE,
+        data_set=DataSet.WN18,
+        n=10,
+        rank_dump_file=dump_file,
+    )
+    dump = RankDump.load(dump_file)
+    assert len(dump) == 9
+    assert vars(dump.to_result(10)) == vars(expected)
+    for n in [1, 3]:
+        assert vars(dump.to_result(n)) == vars(
+            Evaluator.calculate_results(
+                file_to_be_evaluated=TEST_FILE, data_set=DataSet.WN18, n=n
+            )
+        )
+
+    # the ranks of the streaming engine yield the same dump
+    runner = StreamingEvaluationRunner(TEST_FILE, DataSet.WN18, is_keep_ranks=True)
+    runner.run()
+    streamed = RankDump.from_rows(
+        runner.ranks, evaluated_file=TEST_FILE, test_set_size=dump.test_set_size
+    )
+    for name, column in dump.columns.items():
+        assert column.tolist() == streamed.columns[name].tolist()
+
+    # subgroups
+    relation_m = dump.select(relations=["M"])
+    assert len(relation_m) == 5
+    assert relation_m.test_set_size == 5
+    by_relation = dump.by_relation(n=1)
+    assert sorted(by_relation) == ["B", "E", "H", "M"]
+    assert sum(result.filtered_hits_at_n_all for result in by_relation.values()) == (
+        dump.hits_at(1, is_filtered=True)[2]
+    )
+    assert dump.ranks(is_filtered=False, direction="heads")[0] == 6
+
+
+def test_empty_selection(tmp_path):
+    dump_file = str(tmp_path / "ranks.npz")
+    Evaluator.calculate_results(
+        file_to_be_evaluated=TEST_FILE,
+        data_set=DataSet.WN18,
+        n=10,
+        rank_dump_file=dump_file,
+    )
+    dump = RankDump.load(dump_file)
+    for empty in (
+        dump.select(mask=[False] * len(dump)),
+        dump.select(relations=["unknown"]),
+    ):
+        assert len(empty) == 0
+        result = empty.to_result(10)
+        assert result.test_set_size == 0
+        assert result.filtered_hits_at_n_all == 0
+        assert result.filtered_hits_at_n_relative == 0.0
+        assert result.non_filtered_mean_rank_all == 0
+        assert result.filtered_reciprocal_mean_rank_all == 0
+        assert empty.by_relation(10) == {}
@@ -0,0 +1,56 @@
+from kbc_evaluation.reader import BackgroundRecordReader
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+def read_records(file_path: str, mode: str, **kwargs):
+    with open(file_path, mode, **kwargs) as f:
+        lines = f.readlines()
+    return [tuple(lines[i : i + 3]) for i in range(0, len(lines) - 2, 3)]
+
+
+def test_records_equal_readline():
+    expected_bytes = read_records(TEST_FILE, "rb")
+    expected_text = read_records(TEST_FILE, "r", encoding="utf8")
+    assert len(expected_bytes) == 9
+    # chunks smaller than a line, than a record, and larger than the file
+    for chunk_size in [7, 100, 1 << 20]:
+        with BackgroundRecordReader(TEST_FILE, chunk_size=chunk_size) as reader:
+            assert list(reader) == expected_bytes
+        with BackgroundRecordReader(
+            TEST_FILE, encoding="utf8", chunk_size=chunk_size, queue_size=1
+        ) as reader:
+            assert list(reader) == expected_text
+
+    # start at the second record
+    offset = sum(len(line) for line in expected_bytes[0])
+    with BackgroundRecordReader(TEST_FILE, start_offset=offset) as reader:
+        assert list(reader) == expected_bytes[1:]
+
+
+def test_incomplete_last_record(tmp_path):
+    file_path = str(tmp_path / "incomplete.txt")
+    with open(file_path, "w", encoding="utf8") as f:
+        f.write("A B C\n\tHeads: A B\n\tTails: C D\nD E F\n\tHeads: D")
+    with BackgroundRecordReader(file_path, encoding="utf8", chunk_size=4) as reader:
+        assert list(reader) == [("A B C\n", "\tHeads: A B\n", "\tTails: C D\n")]
+    with open(file_path, "a", encoding="utf8") as f:
+        f.write("\n\tTails: F")
+    with BackgroundRecordReader(file_path, encoding="utf8") as reader:
+        assert list(reader)[1] == ("D E F\n", "\tHeads: D\n", "\tTails: F")
+
+
+def test_close_early():
+    reader = BackgroundRecordReader(TEST_FILE, chunk_size=7, queue_size=1)
+    assert next(iter(reader))[0].startswith(b"A B C")
+    reader.close()
+    assert not reader._thread.is_alive()
+
+
+def test_missing_file():
+    with BackgroundRecordReader("./does_not_exist.txt") as reader:
+        try:
+            list(reader)
+            assert False
+        except FileNotFoundError:
+            pass
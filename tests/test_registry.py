@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.evaluator import EvaluationRunner, Evaluator
+from kbc_evaluation.registry import DataSetRegistry
+
+CUSTOM_DATA_SET_DIRECTORY = "./tests/test_resources/custom_data_set"
+
+
+class TestDataSetRegistry:
+    def test_register(self, custom_data_set):
+        data_set = custom_data_set
+        assert DataSetRegistry.get("CUSTOM") is data_set
+        assert DataSetRegistry.get("wn18") == DataSet.WN18
+        assert "custom" in DataSetRegistry.names()
+        assert "WN18" in DataSetRegistry.names()
+
+        with pytest.raises(ValueError):
+            DataSetRegistry.register(name="custom", directory=CUSTOM_DATA_SET_DIRECTORY)
+        with pytest.raises(ValueError):
+            DataSetRegistry.register(name="wn18", directory=CUSTOM_DATA_SET_DIRECTORY)
+        with pytest.raises(FileNotFoundError):
+            DataSetRegistry.register(name="missing", directory="./does_not_exist")
+
+        DataSetRegistry.unregister("custom")
+        with pytest.raises(KeyError):
+            DataSetRegistry.get("custom")
+
+    def test_lazy_splits(self, make_custom_data_set):
+        data_set = make_custom_data_set("custom", definitions_file="definitions.txt")
+        test_set = data_set.test_set()
+        assert len(test_set) == 4
+        assert test_set[0] == ["A", "B", "C"]
+        assert test_set[-1] == ["L", "M", "N"]
+        assert list(data_set.valid_set()) == [["L", "M", "Q"], ["Z", "M", "N"]]
+        assert len(data_set.train_set()[1:3]) == 2
+
+        store = data_set.triple_store()
+        train = store.split("train")
+        assert train.shape == (5, 3)
+        assert store.entities()[train[0][0]] == "P"
+        assert store.relations()[train[0][1]] == "M"
+        assert store.entity_ids()["P"] == train[0][0]
+        assert os.path.isfile(os.path.join(store.cache_directory, "train.npy"))
+
+        assert data_set.definitions_map()["A"] == ("concept A", "description of A")
+
+    def test_evaluation_with_custom_data_set(self, custom_data_set):
+        """Results are equal to the ones explained in eval_test_file_filtering_readme.md"""
+        data_set = custom_data_set
+        test_file_path = "./tests/test_resources/eval_test_file_filtering.txt"
+        runner = EvaluationRunner(
+            file_to_be_evaluated=test_file_path,
+            is_apply_filtering=True,
+            data_set=data_set,
+        )
+        assert runner.calculate_hits_at(1)[2] == 3
+        assert runner.calculate_hits_at(10)[2] == 11
+
+        results = Evaluator.calculate_results(
+            file_to_be_evaluated=test_file_path, data_set=data_set, n=1
+        )
+        assert results.test_set_size == 4
+        assert results.filtered_hits_at_n_all == 3
+        assert results.filtered_mean_rank_all == 3
@@ -0,0 +1,80 @@
+import os
+import shutil
+
+import pytest
+
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.evaluator import Evaluator
+from kbc_evaluation.index import PredictionIndex
+from kbc_evaluation.sampling import SampledEvaluation, normal_quantile
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+def test_normal_quantile():
+    assert abs(normal_quantile(0.975) - 1.959964) < 1e-6
+    assert abs(normal_quantile(0.5)) < 1e-9
+
+
+@pytest.fixture
+def prediction_file(tmp_path) -> str:
+    """Copy of the test file, so that no sidecar index is written next to the test resources."""
+    copied_file = str(tmp_path / "predictions.txt")
+    shutil.copyfile(TEST_FILE, copied_file)
+    return copied_file
+
+
+def test_complete_sample_is_exact(prediction_file):
+    result = SampledEvaluation(prediction_file, DataSet.WN18, fraction=1.0).run()
+    assert result.records == result.sampled_records == 9
+    for n in [1, 3, 10]:
+        expected = Evaluator.calculate_results(prediction_file, DataSet.WN18, n=n)
+        for mode, prefix in [("filtered", "filtered"), ("raw", "non_filtered")]:
+            hits = result.metrics[mode][n]
+            assert hits["estimate"] == getattr(expected, f"{prefix}_hits_at_n_relative")
+            assert hits["lower"] == hits["estimate"] == hits["upper"]
+            mrr = result.metrics[mode]["mrr"]
+            assert (
+                abs(
+                    mrr["estimate"]
+                    - getattr(expected, f"{prefix}_reciprocal_mean_rank_all")
+                )
+                < 1e-9
+            )
+            assert mrr["lower"] == mrr["estimate"] == mrr["upper"]
+
+
+def test_stratified_sample(prediction_file):
+    # every relation is contained
+    evaluation = SampledEvaluation(
+        prediction_file, DataSet.WN18, fraction=0.2, min_per_relation=1, seed=3
+    )
+    with PredictionIndex.get(prediction_file, is_write_index=False) as index:
+        strata = evaluation.sample(index)
+    assert sorted(strata) == ["B", "E", "H", "M"]
+    assert strata["M"][0] == 5 and len(strata["M"][1]) == 1
+    assert sum(len(records) for _, records in strata.values()) == 4
+
+
+def test_partial_sample(prediction_file):
+    result = SampledEvaluation(prediction_file, DataSet.WN18, fraction=0.5).run()
+    assert result.sampled_records == 7
+    assert (
+        result.to_dict()
+        == SampledEvaluation(prediction_file, DataSet.WN18, fraction=0.5)
+        .run()
+        .to_dict()
+    )
+    for mode in ["raw", "filtered"]:
+        for metric in result.metrics[mode].values():
+            assert 0 <= metric["lower"] <= metric["estimate"] <= metric["upper"] <= 1
+
+
+def test_sidecar_index_is_opt_in(prediction_file):
+    index_file = PredictionIndex.default_index_file(prediction_file)
+    SampledEvaluation(prediction_file, DataSet.WN18, fraction=0.5).run()
+    assert not os.path.isfile(index_file)
+    SampledEvaluation(
+        prediction_file, DataSet.WN18, fraction=0.5, is_write_index=True
+    ).run()
+    assert os.path.isfile(index_file)
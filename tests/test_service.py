@@ -0,0 +1,58 @@
+import os
+import threading
+
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.evaluator import Evaluator, EvaluatorResult
+from kbc_evaluation.service import EvaluationClient, EvaluationService
+
+
+def test_result_dict_round_trip():
+    test_file_path = "./tests/test_resources/eval_test_file_filtering.txt"
+    result = Evaluator.calculate_results(
+        file_to_be_evaluated=test_file_path, data_set=DataSet.WN18, n=3
+    )
+    assert vars(EvaluatorResult.from_dict(result.to_dict())) == vars(result)
+
+
+def test_service():
+    test_file_path = "./tests/test_resources/eval_test_file_filtering.txt"
+    service = EvaluationService(data_sets=["WN18"], workers=2)
+    thread = threading.Thread(target=service.serve, kwargs={"port": 0})
+    thread.start()
+    assert service.started.wait(timeout=60)
+    try:
+        with EvaluationClient(*service.address) as client:
+            assert client.request({"command": "data_sets"})["data_sets"] == ["wn18"]
+            for n in [1, 10]:
+                expected = Evaluator.calculate_results(
+                    file_to_be_evaluated=test_file_path, data_set=DataSet.WN18, n=n
+                )
+                actual = client.evaluate_file(test_file_path, "wn18", n=n)
+                assert actual.evaluated_file == os.path.abspath(test_file_path)
+                actual.evaluated_file = test_file_path
+                assert vars(actual) == vars(expected)
+
+                # the same predictions sent as records
+                with open(test_file_path, "r", encoding="utf-8") as f:
+                    lines = f.readlines()
+                records = [
+                    (lines[i], lines[i + 1], lines[i + 2])
+                    for i in range(0, len(lines), 3)
+                ]
+                actual = client.evaluate_records(
+                    records, "wn18", n=n, name=test_file_path
+                )
+                assert vars(actual) == vars(expected)
+
+            # errors are reported, the connection stays usable
+            try:
+                client.request({"command": "unknown"})
+                assert False
+            except Exception as e:
+                assert "unknown" in str(e)
+            assert client.request({"command": "ping"})["status"] == "ok"
+    finally:
+        with EvaluationClient(*service.address) as client:
+            client.shutdown()
+        thread.join(timeout=60)
+    assert not thread.is_alive()
@@ -0,0 +1,101 @@
+import os
+import shutil
+
+import pytest
+
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.evaluator import Evaluator
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.index import PredictionIndex
+from kbc_evaluation.sharding import ShardedEvaluation
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+@pytest.fixture
+def test_file_path(tmp_path) -> str:
+    """A copy of the test file in tmp_path: the sidecar index is written next to it."""
+    return shutil.copy(TEST_FILE, str(tmp_path / "predictions.txt"))
+
+
+def test_merge_equal_to_evaluator(test_file_path, tmp_path):
+    filter_index = FilterIndex.from_data_set(DataSet.WN18)
+    size = os.path.getsize(test_file_path)
+
+    # byte boundaries in the middle of records
+    for shards in [1, 2, 3, 7]:
+        partial_result_files = []
+        for shard in range(shards):
+            start_byte, end_byte = ShardedEvaluation.shard_range(
+                test_file_path, shard, shards
+            )
+            assert start_byte <= end_byte <= size
+            partial_result_file = str(tmp_path / f"shard_{shard}.json")
+            ShardedEvaluation.evaluate_shard(
+                file_to_be_evaluated=test_file_path,
+                data_set=DataSet.WN18,
+                partial_result_file=partial_result_file,
+                start_byte=start_byte,
+                end_byte=end_byte,
+                is_keep_ranks=True,
+                filter_index=filter_index,
+            )
+            partial_result_files.append(partial_result_file)
+
+        # order of the partial results does not matter
+        partial_result_files.reverse()
+        for n in [1, 3, 10]:
+            expected = Evaluator.calculate_results(
+                file_to_be_evaluated=test_file_path, data_set=DataSet.WN18, n=n
+            )
+            actual = ShardedEvaluation.merge(partial_result_files, n=n)
+            assert vars(actual) == vars(expected)
+
+        ranks = ShardedEvaluation.merge_ranks(partial_result_files)
+        assert len(ranks) == 9
+        assert [rank[:3] for rank in ranks] == [
+            list(triple) for triple in PredictionIndex.build(test_file_path).truths()
+        ]
+
+
+def test_record_range(test_file_path, tmp_path):
+    partial_result_files = []
+    for i, (start_record, end_record) in enumerate([(0, 4), (4, None)]):
+        start_byte, end_byte = ShardedEvaluation.record_range(
+            test_file_path, start_record, end_record
+        )
+        partial_result_file = str(tmp_path / f"shard_{i}.json")
+        accumulator = ShardedEvaluation.evaluate_shard(
+            file_to_be_evaluated=test_file_path,
+            data_set=DataSet.WN18,
+            partial_result_file=partial_result_file,
+            start_byte=start_byte,
+            end_byte=end_byte,
+        )
+        assert accumulator.records == (4 if i == 0 else 5)
+        partial_result_files.append(partial_result_file)
+    assert os.path.isfile(PredictionIndex.default_index_file(test_file_path))
+    expected = Evaluator.calculate_results(
+        file_to_be_evaluated=test_file_path, data_set=DataSet.WN18, n=10
+    )
+    assert vars(ShardedEvaluation.merge(partial_result_files)) == vars(expected)
+
+
+def test_parallel_with_custom_data_set(make_custom_data_set):
+    data_set = make_custom_data_set("sharding")
+    cache_directory = data_set.triple_store().cache_directory
+    # the cache is encoded once before the processes start
+    accumulator = ShardedEvaluation.evaluate_parallel(
+        TEST_FILE, data_set, workers=2, hits_at=[10]
+    )
+    assert sorted(os.listdir(cache_directory)) == [
+        "entities.txt",
+        "meta.json",
+        "relations.txt",
+        "test.npy",
+        "train.npy",
+        "valid.npy",
+    ]
+    expected = Evaluator.calculate_results(TEST_FILE, data_set, n=10)
+    actual = accumulator.to_result(TEST_FILE, len(data_set.test_set()), 10)
+    assert vars(actual) == vars(expected)
@@ -0,0 +1,51 @@
+from kbc_evaluation.dataset import DataSet, ParsedSet
+from kbc_evaluation.spill import SpillingPredictions
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+def test_spilling_predictions():
+    predictions = SpillingPredictions(memory_budget=600)
+    predictions[("A", "B", "C")] = (["A", "B"], ["C"])
+    predictions[("D", "E", "F")] = (["D"] * 10, ["F", "G"])
+    predictions[("G", "H", "I")] = (["G"], ["I"])
+    assert not predictions.is_spilled(("A", "B", "C"))
+    assert predictions.is_spilled(("D", "E", "F"))
+    assert predictions.spilled == 1
+    assert predictions.memory_used <= 600
+    assert list(predictions) == [("A", "B", "C"), ("D", "E", "F"), ("G", "H", "I")]
+    assert predictions[("D", "E", "F")] == (["D"] * 10, ["F", "G"])
+
+    # deleting frees memory, a replaced entry is kept in memory if it fits
+    del predictions[("A", "B", "C")]
+    assert len(predictions) == 2 and ("A", "B", "C") not in predictions
+    predictions[("D", "E", "F")] = ([], ["F"])
+    assert predictions.spilled == 0
+    assert predictions[("D", "E", "F")] == ([], ["F"])
+    assert list(predictions) == [("D", "E", "F"), ("G", "H", "I")]
+    predictions.close()
+
+
+def test_parsed_set_with_memory_budget():
+    for is_apply_filtering in [False, True]:
+        expected = ParsedSet(
+            TEST_FILE,
+            DataSet.WN18,
+            is_apply_filtering=is_apply_filtering,
+            is_stop_early=False,
+        )
+        # room for about two records
+        spilling = ParsedSet(
+            TEST_FILE,
+            DataSet.WN18,
+            is_apply_filtering=is_apply_filtering,
+            is_stop_early=False,
+            memory_budget=3000,
+        )
+        assert isinstance(spilling.triple_predictions, SpillingPredictions)
+        assert spilling.triple_predictions.spilled > 0
+        assert spilling.triple_predictions.memory_used <= 3000
+        assert list(spilling.triple_predictions.items()) == list(
+            expected.triple_predictions.items()
+        )
+        assert spilling.total_prediction_tasks == expected.total_prediction_tasks
@@ -0,0 +1,81 @@
+import shutil
+
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.evaluator import Evaluator
+from kbc_evaluation.store import ResultStore
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+def test_result_store(tmp_path):
+    store_file = str(tmp_path / "results.sqlite")
+    copied_file = str(tmp_path / "copy.txt")
+    shutil.copyfile(TEST_FILE, copied_file)
+    with ResultStore(store_file) as store:
+        expected = Evaluator.calculate_results(TEST_FILE, DataSet.WN18, n=10)
+        result = Evaluator.calculate_results(
+            TEST_FILE, DataSet.WN18, n=10, result_store=store
+        )
+        assert vars(result) == vars(expected)
+        assert len(store) == 1
+
+        # same content under another path: the stored result is used
+        cached = Evaluator.calculate_results(
+            copied_file, DataSet.WN18, n=10, result_store=store
+        )
+        assert len(store) == 1
+        assert cached.evaluated_file == copied_file
+        cached.evaluated_file = TEST_FILE
+        assert vars(cached) == vars(expected)
+
+        # other settings and other content are stored separately
+        Evaluator.calculate_results(TEST_FILE, DataSet.WN18, n=1, result_store=store)
+        with open(copied_file, "a", encoding="utf8") as f:
+            f.write("\nA B Z\n\tHeads: A\n\tTails: Z\n")
+        Evaluator.calculate_results(copied_file, DataSet.WN18, n=1, result_store=store)
+        assert len(store) == 3
+
+        runs = store.runs(evaluated_file=TEST_FILE)
+        assert [run["n"] for run in runs] == [1, 10]
+        assert runs[0]["data_set"] == str(DataSet.WN18)
+        assert runs[1]["result"]["filtered_hits_at_n_all"] == (
+            expected.filtered_hits_at_n_all
+        )
+        other_run = store.runs(evaluated_file=copied_file)[0]
+        delta = store.compare(runs[0]["key"], other_run["key"])
+        assert delta["filtered_hits_at_n_all"] == 2
+        assert "n" not in delta
+
+        # least recently used results are evicted first
+        store.get(runs[1]["key"])
+        assert store.evict(max_size=runs[1]["size"]) == 2
+        assert [run["key"] for run in store.runs()] == [runs[1]["key"]]
+
+    # the store is persistent
+    with ResultStore(store_file) as store:
+        assert len(store) == 1
+
+
+def test_compare_skips_values_missing_in_one_run(tmp_path):
+    with ResultStore(str(tmp_path / "results.sqlite")) as store:
+        plain = Evaluator.calculate_results(TEST_FILE, DataSet.WN18, n=10)
+        store.put("plain", plain, DataSet.WN18)
+        adjusted = Evaluator.calculate_results(
+            TEST_FILE, DataSet.WN18, n=10, is_calculate_adjusted_metrics=True
+        )
+        store.put("adjusted", adjusted, DataSet.WN18)
+        for delta in (
+            store.compare("plain", "adjusted"),
+            store.compare("adjusted", "plain"),
+        ):
+            assert delta["filtered_hits_at_n_all"] == 0
+            assert "filtered_adjusted_mean_rank" not in delta
+
+
+def test_put_keeps_the_new_result(tmp_path):
+    result = Evaluator.calculate_results(TEST_FILE, DataSet.WN18, n=10)
+    with ResultStore(str(tmp_path / "results.sqlite"), max_size=1) as store:
+        store.put("first", result, DataSet.WN18)
+        assert store.get("first") is not None
+        store.put("second", result, DataSet.WN18)
+        assert [run["key"] for run in store.runs()] == ["second"]
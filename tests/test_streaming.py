@@ -0,0 +1,142 @@
+import json
+import os
+
+from kbc_evaluation.dataset import DataSet
+from kbc_evaluation.evaluator import Evaluator
+from kbc_evaluation.streaming import (
+    RankAccumulator,
+    StreamingEvaluationRunner,
+    StreamingEvaluator,
+    calculate_ranks,
+)
+
+TEST_FILES = [
+    ("./tests/test_resources/eval_test_file.txt", DataSet.WN18),
+    ("./tests/test_resources/eval_test_file_with_confidences.txt", DataSet.WN18),
+    ("./tests/test_resources/eval_test_file_filtering.txt", DataSet.WN18),
+    (
+        "./tests/test_resources/eval_test_file_filtering_with_confidences.txt",
+        DataSet.WN18,
+    ),
+    ("./tests/test_resources/freebase_filtering_example.txt", DataSet.FB15K),
+]
+
+
+def test_calculate_ranks():
+    predictions = ["A", "B", "C", "D"]
+    assert calculate_ranks(predictions, "C") == (3, None)
+    assert calculate_ranks(predictions, "C", {"A", "C", "D"}) == (3, 2)
+    assert calculate_ranks(predictions, "X", {"A"}) == (None, None)
+
+
+def test_equal_to_evaluator():
+    for test_file_path, data_set in TEST_FILES:
+        for n in [1, 3, 10]:
+            expected = Evaluator.calculate_results(
+                file_to_be_evaluated=test_file_path, data_set=data_set, n=n
+            )
+            actual = StreamingEvaluator.calculate_results(
+                file_to_be_evaluated=test_file_path, data_set=data_set, n=n
+            )
+            assert vars(actual) == vars(expected)
+
+
+def test_checkpoint_and_resume(tmp_path):
+    test_file_path = "./tests/test_resources/eval_test_file_filtering.txt"
+    checkpoint_file = str(tmp_path / "checkpoint.json")
+    uninterrupted = StreamingEvaluationRunner(
+        file_to_be_evaluated=test_file_path, data_set=DataSet.WN18
+    ).run()
+
+    # the first run is interrupted after 4 of 9 records
+    runner = StreamingEvaluationRunner(
+        file_to_be_evaluated=test_file_path,
+        data_set=DataSet.WN18,
+        checkpoint_file=checkpoint_file,
+        checkpoint_interval=1,
+    )
+    partial = runner.run(max_records=4)
+    assert partial.records == 4
+    with open(checkpoint_file, "r", encoding="utf-8") as f:
+        assert 0 < json.load(f)["offset"] < os.path.getsize(test_file_path)
+
+    resumed = StreamingEvaluationRunner(
+        file_to_be_evaluated=test_file_path,
+        data_set=DataSet.WN18,
+        checkpoint_file=checkpoint_file,
+    ).run()
+    assert resumed.records == 9
+    assert resumed.to_state() == uninterrupted.to_state()
+
+    # a checkpoint of another configuration is ignored
+    other = StreamingEvaluationRunner(
+        file_to_be_evaluated=test_file_path,
+        data_set=DataSet.WN18,
+        hits_at=[5],
+        checkpoint_file=checkpoint_file,
+    ).run()
+    assert other.records == 9
+
+
+def test_checkpoint_with_ranks(tmp_path):
+    test_file_path = "./tests/test_resources/eval_test_file_filtering.txt"
+    checkpoint_file = str(tmp_path / "checkpoint.json")
+    uninterrupted = StreamingEvaluationRunner(
+        file_to_be_evaluated=test_file_path, data_set=DataSet.WN18, is_keep_ranks=True
+    )
+    uninterrupted.run()
+
+    runner = StreamingEvaluationRunner(
+        file_to_be_evaluated=test_file_path,
+        data_set=DataSet.WN18,
+        checkpoint_file=checkpoint_file,
+        checkpoint_interval=1,
+        is_keep_ranks=True,
+    )
+    runner.run(max_records=4)
+    # the checkpoint references the ranks file instead of containing the ranks
+    with open(checkpoint_file, "r", encoding="utf-8") as f:
+        assert "ranks" not in json.load(f)
+    with open(checkpoint_file + ".ranks", "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 4
+    # ranks that were appended after the last checkpoint (crash) are discarded
+    with open(checkpoint_file + ".ranks", "a", encoding="utf-8") as f:
+        f.write('["X", "Y", "Z", 1, 1, 1, 1]\n')
+
+    resumed = StreamingEvaluationRunner(
+        file_to_be_evaluated=test_file_path,
+        data_set=DataSet.WN18,
+        checkpoint_file=checkpoint_file,
+        is_keep_ranks=True,
+    )
+    resumed.run()
+    assert resumed.ranks == [list(ranks) for ranks in uninterrupted.ranks]
+    with open(checkpoint_file + ".ranks", "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 9
+
+
+def test_accumulator_state():
+    accumulator = RankAccumulator(hits_at=[1, 10])
+    accumulator.add_record(1, 5, 1, 2)
+    accumulator.add_record(None, 20, None, 11)
+    restored = RankAccumulator.from_state(
+        json.loads(json.dumps(accumulator.to_state()))
+    )
+    assert restored.to_state() == accumulator.to_state()
+    assert restored.hits(10, is_filtered=False) == (1, 1, 2)
+    assert restored.hits(1, is_filtered=True) == (1, 0, 1)
+
+    restored.merge(accumulator)
+    assert restored.records == 4
+    assert restored.hits(10, is_filtered=True) == (2, 2, 4)
+
+
+def test_crlf_equal_to_evaluator(tmp_path):
+    for test_file_path, data_set in TEST_FILES:
+        crlf_file = str(tmp_path / "crlf.txt")
+        with open(test_file_path, "rb") as f, open(crlf_file, "wb") as g:
+            g.write(f.read().replace(b"\n", b"\r\n"))
+        expected = Evaluator.calculate_results(test_file_path, data_set, n=10)
+        actual = StreamingEvaluator.calculate_results(crlf_file, data_set, n=10)
+        actual.evaluated_file = expected.evaluated_file
+        assert vars(actual) == vars(expected)
@@ -0,0 +1,51 @@
+from kbc_evaluation.validation import PredictionValidator, contains_concept
+
+TEST_FILE = "./tests/test_resources/eval_test_file_filtering.txt"
+
+
+def test_contains_concept():
+    line = b"\tHeads: AB B_{0.5} C D\n"
+    assert contains_concept(line, 8, b"AB")
+    assert contains_concept(line, 8, b"B")
+    assert contains_concept(line, 8, b"D")
+    assert not contains_concept(line, 8, b"A")
+    assert not contains_concept(line, 8, b"Heads:")
+
+
+def test_validate(custom_data_set, tmp_path):
+    validator = PredictionValidator(custom_data_set, is_check_candidates=True)
+    report = validator.validate(TEST_FILE)
+    assert report.is_valid
+    assert report.records == 9
+    assert report.counts["extra_triples"] == 5
+    assert report.counts["gold_heads_not_predicted"] == 3
+    assert report.counts["gold_tails_not_predicted"] == 4
+    assert {"record": 0, "concept": "X"} in report.examples["unknown_entities"]
+
+    with open(TEST_FILE, "r", encoding="utf8") as f:
+        lines = f.read().split("\n")
+    broken_file = str(tmp_path / "broken.txt")
+    # duplicate of A B C, without L M N (record 4), invalid heads line, incomplete last record
+    broken_lines = lines[0:3] + lines[0:12] + lines[15:21]
+    broken_lines[4] = broken_lines[4].replace("Heads:", "Head:")
+    broken_lines += ["X Y"]
+    with open(broken_file, "w", encoding="utf8") as f:
+        f.write("\n".join(broken_lines))
+    report = PredictionValidator(custom_data_set, max_examples=1).validate(broken_file)
+    assert not report.is_valid
+    assert report.counts["malformed_records"] == 2
+    assert report.examples["malformed_records"] == [
+        {"record": 1, "problems": ["invalid heads line"]}
+    ]
+    assert report.counts["duplicate_truths"] == 0
+    assert report.examples["missing_test_triples"] == [["L", "M", "N"]]
+    assert report.counts["missing_test_triples"] == 1
+    report.log_summary()
+
+    # the duplicate is reported once the first copy is well-formed
+    broken_lines[4] = broken_lines[4].replace("Head:", "Heads:")
+    with open(broken_file, "w", encoding="utf8") as f:
+        f.write("\n".join(broken_lines))
+    report = PredictionValidator(custom_data_set).validate(broken_file)
+    assert report.examples["duplicate_truths"] == [["A", "B", "C"]]
+    assert report.counts["malformed_records"] == 1
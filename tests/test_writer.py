@@ -0,0 +1,102 @@
+import numpy as np
+
+from kbc_evaluation.dataset import DataSet, ParsedSet
+from kbc_evaluation.filtering import FilterIndex
+from kbc_evaluation.streaming import StreamingEvaluationRunner
+from kbc_evaluation.writer import (
+    PredictionWriter,
+    convert_to_text,
+    iterate_binary_predictions,
+)
+
+ENTITIES = ["A", "B", "C", "D", "E", "F", "G", "H"]
+RELATIONS = ["r1", "r2"]
+TRIPLES = np.array([[0, 0, 2], [3, 1, 5]])
+HEAD_CANDIDATES = np.array([[1, 2, 3, 0, 4, 5, 6, 7], [3, 2, 1, 0, 4, 5, 6, 7]])
+TAIL_CANDIDATES = np.array([[7, 6, 5, 4, 3, 2, 1, 0], [5, 4, 3, 2, 1, 0, 7, 6]])
+HEAD_SCORES = -np.arange(16, dtype=np.float64).reshape(2, 8) / 3
+
+
+def read_records(file_path: str):
+    with open(file_path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    return [tuple(lines[i : i + 3]) for i in range(0, len(lines), 3)]
+
+
+def test_text_round_trip(tmp_path):
+    file_path = str(tmp_path / "predictions.txt")
+    with PredictionWriter(file_path, ENTITIES, RELATIONS) as writer:
+        writer.write_batch(
+            TRIPLES, HEAD_CANDIDATES, TAIL_CANDIDATES, HEAD_SCORES, HEAD_SCORES
+        )
+    assert writer.records == 2
+    records = read_records(file_path)
+    assert records[0][0] == "A r1 C\n"
+    assert records[0][1].startswith("\tHeads: B_{-0.000000} C_{-0.333333} D_{")
+
+    parsed_set = ParsedSet(
+        file_to_be_evaluated=file_path, data_set=DataSet.WN18, is_stop_early=False
+    )
+    for i, (h, r, t) in enumerate(TRIPLES.tolist()):
+        heads, tails = parsed_set.triple_predictions[
+            (ENTITIES[h], RELATIONS[r], ENTITIES[t])
+        ]
+        assert heads == [ENTITIES[e] for e in HEAD_CANDIDATES[i]]
+        assert tails == [ENTITIES[e] for e in TAIL_CANDIDATES[i]]
+
+
+def test_top_k_keeps_ranks(tmp_path):
+    full_path = str(tmp_path / "full.txt")
+    top_k_path = str(tmp_path / "top_k.txt")
+    with PredictionWriter(full_path, ENTITIES, RELATIONS) as writer:
+        writer.write_batch(TRIPLES, HEAD_CANDIDATES, TAIL_CANDIDATES)
+    with PredictionWriter(top_k_path, ENTITIES, RELATIONS, top_k=2) as writer:
+        for i in range(len(TRIPLES)):
+            writer.write(TRIPLES[i], HEAD_CANDIDATES[i], TAIL_CANDIDATES[i])
+
+    top_k_records = read_records(top_k_path)
+    # gold head A at position 4, gold tail C at position 6, gold head D at position 1, gold tail F at position 1
+    assert top_k_records[0][1] == "\tHeads: B C D A\n"
+    assert top_k_records[0][2] == "\tTails: H G F E D C\n"
+    assert top_k_records[1][1] == "\tHeads: D C\n"
+    assert top_k_records[1][2] == "\tTails: F E\n"
+
+    filter_index = FilterIndex()
+    filter_index.add(["D", "r2", "A"])
+    for hits_at in [[1], [2]]:
+        assert (
+            StreamingEvaluationRunner.evaluate_records(
+                read_records(full_path), filter_index, hits_at
+            ).to_state()
+            == StreamingEvaluationRunner.evaluate_records(
+                top_k_records, filter_index, hits_at
+            ).to_state()
+        )
+
+
+def test_binary_format(tmp_path):
+    text_path = str(tmp_path / "predictions.txt")
+    for binary_path in [
+        str(tmp_path / "predictions.bin"),
+        str(tmp_path / "predictions.bin.gz"),
+    ]:
+        for scores in [None, HEAD_SCORES]:
+            with PredictionWriter(
+                text_path, ENTITIES, RELATIONS, score_digits=3
+            ) as writer:
+                writer.write_batch(
+                    TRIPLES, HEAD_CANDIDATES, TAIL_CANDIDATES, scores, scores
+                )
+            with PredictionWriter(
+                binary_path, ENTITIES, RELATIONS, file_format="binary"
+            ) as writer:
+                writer.write_batch(
+                    TRIPLES, HEAD_CANDIDATES, TAIL_CANDIDATES, scores, scores
+                )
+            assert list(
+                iterate_binary_predictions(binary_path, score_digits=3)
+            ) == read_records(text_path)
+
+            converted_path = str(tmp_path / "converted.txt")
+            convert_to_text(binary_path, converted_path)
+            assert len(read_records(converted_path)) == 2